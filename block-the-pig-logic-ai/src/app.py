@@ -1,6 +1,19 @@
-from flask import Flask, render_template, request, jsonify
-import os, re, time, json, hashlib, tempfile, subprocess
+from flask import Flask, Response, render_template, request, jsonify
+import os, re, sys, time, json, codecs, hashlib, hmac, tempfile, subprocess, queue, threading
 from collections import deque
+from contextlib import contextmanager
+
+import debug_capture
+import metrics
+import move_cache
+import opening_book
+import profiler
+import search
+import spectra_recorder
+import strategy_rules
+import timings as stage_timings
+import traffic_log
+from board import INF, PIG_START, cell_index, cell_qr, walls_to_mask, pig_steps, iter_bits
 
 app = Flask(__name__)
 
@@ -20,16 +33,132 @@ TEMPLATE_CLJ = os.path.join(SPECTRA_DIR, "block_the_pig.clj")
 TOOLS_DIR = os.path.join(PROJECT_ROOT, "tools")
 SPECTRA_JAR = os.path.join(TOOLS_DIR, "Spectra.jar")
 
-JAVA17_EXE = r"C:\Program Files\Eclipse Adoptium\jdk-17.0.17.10-hotspot\bin\java.exe"
+# Java 17 for Spectra: BTP_JAVA, else $JAVA_HOME/bin/java, else java on PATH
+JAVA_EXE = os.environ.get("BTP_JAVA") or (
+    os.path.join(os.environ["JAVA_HOME"], "bin", "java") if os.environ.get("JAVA_HOME") else "java")
+
+# "jar" runs Spectra.jar; "fake" runs tools/fake_spectra.py, which answers the
+# same problems with simulated latency and failures (see its docstring for
+# FAKE_SPECTRA_ARGS), for tests and load tests without a JVM.
+SPECTRA_BACKEND = os.environ.get("BTP_SPECTRA_BACKEND", "jar")
+FAKE_SPECTRA = os.path.join(TOOLS_DIR, "fake_spectra.py")
+FAKE_SPECTRA_ARGS = os.environ.get("BTP_FAKE_SPECTRA_ARGS", "").split()
+
+# "record" saves every Spectra run (problem, output or failure, duration) in
+# SPECTRA_RECORDINGS_DIR; "replay" answers from those recordings without
+# starting Java, sleeping the recorded duration times SPECTRA_REPLAY_SPEED.
+SPECTRA_RECORDING = os.environ.get("BTP_SPECTRA_RECORDING", "off")
+SPECTRA_RECORDINGS_DIR = os.environ.get("BTP_SPECTRA_RECORDINGS", os.path.join(PROJECT_ROOT, "data", "spectra_recordings"))
+SPECTRA_REPLAY_SPEED = float(os.environ.get("BTP_SPECTRA_REPLAY_SPEED", "1.0"))
+SPECTRA_RECORDER = spectra_recorder.Recorder(SPECTRA_RECORDINGS_DIR)
 
 # If Spectra sometimes takes ~20s on first run, caching matters a lot.
 SPECTRA_TIMEOUT_SECONDS = 45
 
-# In-memory cache: key(board_state) -> move dict
-SPECTRA_CACHE = {}
-
+# Spectra keeps running (and logging) after it prints its plan. Its output is
+# read while it runs, and the JVM is stopped at the first complete [...] plan
+# or at one of these markers, which mean no plan is coming.
+SPECTRA_FAILURE_MARKERS = ("Exception in thread", "OutOfMemoryError")
+SPECTRA_STOP_GRACE_SECONDS = 1.0
+
+# Per-stage timings (perf_counter_ns spans) in every /api/move response and
+# in the app log; when off, the spans are no-ops.
+STAGE_TIMINGS = True
+
+# Admin-only request profiling: with BTP_PROFILE_DIR set, a request carrying
+# the X-BTP-Profile header (or ?profile=1) runs under profiler.Sampler and its
+# collapsed stacks go to <dir>/<board key>-<ms>.folded, named in the response
+# as "profile". Unset, requests are never profiled. With BTP_PROFILE_TOKEN set
+# the header must carry that token; without it only loopback clients may ask.
+# The directory keeps the newest PROFILE_MAX_FILES profiles.
+PROFILE_DIR = os.environ.get("BTP_PROFILE_DIR", "")
+PROFILE_TOKEN = os.environ.get("BTP_PROFILE_TOKEN", "")
+PROFILE_HEADER = "X-BTP-Profile"
+PROFILE_INTERVAL = profiler.INTERVAL
+PROFILE_MAX_FILES = 200
+LOOPBACK_ADDRS = ("127.0.0.1", "::1")
+
+# Latency budget for a whole /api/move request (book, Spectra, search,
+# fallback); a request may send "budget_ms" to override it, up to the cap.
+# Spectra stops starting candidates once only SEARCH_RESERVE_SECONDS are left
+# (and never starts a JVM with less than MIN_SPECTRA_SECONDS); the search then
+# deepens until the deadline minus FALLBACK_RESERVE_SECONDS.
+REQUEST_BUDGET_SECONDS = 20.0
+MAX_REQUEST_BUDGET_SECONDS = 120.0
+SEARCH_RESERVE_SECONDS = 1.0
+MIN_SPECTRA_SECONDS = 2.0
+FALLBACK_RESERVE_SECONDS = 0.05
+SEARCH_PIG_MODEL = "random"
+SEARCH_MAX_DEPTH = search.DEFAULT_MAX_DEPTH
+
+# Cache: spectra_cache_key -> move dict. In-process LRU backed by a directory
+# shared by all worker processes (None = this process only), holding at most
+# SPECTRA_CACHE_DISK_ENTRIES moves for SPECTRA_CACHE_MAX_AGE seconds each.
+# Concurrent requests for the same board wait for one Spectra computation;
+# the computing process keeps its lock fresh, so the lock timeout only has to
+# notice dead processes.
+SPECTRA_CACHE_DIR = os.path.join(PROJECT_ROOT, "data", "move_cache")
+SPECTRA_CACHE_ENTRIES = 10_000
+SPECTRA_CACHE_DISK_ENTRIES = 100_000
+SPECTRA_CACHE_MAX_AGE = 30 * 24 * 3600
+SPECTRA_CACHE_LOCK_TIMEOUT = 600
+SPECTRA_CACHE = move_cache.MoveCache(SPECTRA_CACHE_DIR, SPECTRA_CACHE_ENTRIES, SPECTRA_CACHE_LOCK_TIMEOUT,
+                                     disk_entries=SPECTRA_CACHE_DISK_ENTRIES, max_age=SPECTRA_CACHE_MAX_AGE)
+
+# ShadowAdjudicator strategy rules compiled into candidate filters. Off by
+# default: in seeded self-play the btp.sadj rules lower the win rate.
+STRATEGY_RULES_FILE = os.path.join(PROJECT_ROOT, "adjudicator", "btp.sadj")
+ENFORCE_STRATEGY_RULES = False
+MOVE_FILTER = strategy_rules.MoveFilter(strategy_rules.load(STRATEGY_RULES_FILE)) if ENFORCE_STRATEGY_RULES else None
+
+# Precomputed opening walls (tools/build_opening_book.py); None if not built.
+# On boards with walls outside the pig's 2-ring only entries the builder
+# confirmed on such boards answer (opening_book.OUTER_OK).
+OPENING_BOOK = opening_book.load()
+
+# Speculation: while the client animates the pig (500-800 ms before it asks
+# again), a background thread solves the position after each likely pig reply
+# into SPECTRA_CACHE. It only starts while no request is being served. A
+# request for the board being solved joins that computation; a request for any
+# other board stops the running Spectra process (checked every
+# SPECULATION_CANCEL_POLL_SECONDS). Each position gets at most
+# SPECULATION_BUDGET_SECONDS. Its Spectra processes run at a lower OS priority.
+SPECULATE = True
+SPECULATION_BUDGET_SECONDS = 20.0
+SPECULATION_CANCEL_POLL_SECONDS = 0.05
+SPECULATION_QUEUE_SIZE = 8
+SPECULATION_NICE = 10
+
+# Unparseable Spectra outputs go to a rotating compressed archive written by a
+# background thread; read them back with tools/query_debug.py <board key>.
 DEBUG_DIR = os.path.join(PROJECT_ROOT, "spectra_debug")
-os.makedirs(DEBUG_DIR, exist_ok=True)
+DEBUG_SEGMENT_BYTES = 8 << 20
+DEBUG_MAX_SEGMENTS = 8
+DEBUG_CAPTURE = debug_capture.DebugCapture(DEBUG_DIR, DEBUG_SEGMENT_BYTES, DEBUG_MAX_SEGMENTS)
+
+# BTP_TRAFFIC_LOG=<file> appends every /api/move request (arrival time, body)
+# and its answer to that JSONL file from a background thread; replay it with
+# tools/replay_traffic.py. Off when unset.
+TRAFFIC_LOG_PATH = os.environ.get("BTP_TRAFFIC_LOG", "")
+TRAFFIC_LOG = traffic_log.TrafficLog(TRAFFIC_LOG_PATH) if TRAFFIC_LOG_PATH else None
+
+# Metrics, served at /metrics. Fallback rate and engine mix come from the
+# per-engine counts of btp_move_request_seconds.
+REQUEST_SECONDS = metrics.REGISTRY.histogram(
+    "btp_move_request_seconds", "Time to answer /api/move, by the engine that produced the move.", ["engine"])
+SPECTRA_RUNS = metrics.REGISTRY.histogram(
+    "btp_spectra_run_seconds", "Time of one Spectra run (one candidate goal), by outcome.", ["outcome"])
+TIMEOUTS = metrics.REGISTRY.counter(
+    "btp_timeouts_total", "Timeouts by stage: spectra (one run), budget (request budget spent), search.", ["stage"])
+CACHE_LOOKUPS = metrics.REGISTRY.counter(
+    "btp_move_cache_lookups_total", "Spectra move cache lookups by source; computed is a miss.", ["source"])
+metrics.REGISTRY.callback(
+    "btp_move_cache_evictions_total", "Entries evicted from the in-process move cache.", "counter",
+    lambda: getattr(SPECTRA_CACHE, "evictions", 0))
+SEARCH_NODES = metrics.REGISTRY.histogram(
+    "btp_search_nodes", "Search nodes per move answered by the search engine.", buckets=metrics.COUNT_BUCKETS)
+SEARCH_BFS_CALLS = metrics.REGISTRY.histogram(
+    "btp_search_bfs_calls", "BFS calls per move answered by the search engine.", buckets=metrics.COUNT_BUCKETS)
 
 # Routes
 @app.route("/")
@@ -120,7 +249,17 @@ def build_start_block(pig_pos: dict, walls: list) -> str:
 def build_goal_block(goal_cell: str) -> str:
     return f":goal [\n    (HasWall {goal_cell})\n ]"
 
-def write_temp_clj(pig_pos: dict, walls: list, goal_cell: str) -> str:
+def write_temp_clj(pig_pos: dict, walls: list, goal_cell: str, timings=stage_timings.NULL) -> str:
+    with timings.span("render"):
+        text = render_problem(pig_pos, walls, goal_cell)
+    with timings.span("write"):
+        fd, tmp_path = tempfile.mkstemp(prefix="btp_", suffix=".clj", dir=PROJECT_ROOT, text=True)
+        os.close(fd)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+    return tmp_path
+
+def render_problem(pig_pos: dict, walls: list, goal_cell: str) -> str:
     if not os.path.exists(TEMPLATE_CLJ):
         raise FileNotFoundError(f"Template .clj not found: {TEMPLATE_CLJ}")
 
@@ -138,47 +277,132 @@ def write_temp_clj(pig_pos: dict, walls: list, goal_cell: str) -> str:
     if not goal_re.search(text):
         raise RuntimeError("Template missing :goal [ ... ]")
     text = goal_re.sub(build_goal_block(goal_cell) + "\n", text, count=1)
-
-    fd, tmp_path = tempfile.mkstemp(prefix="btp_", suffix=".clj", dir=PROJECT_ROOT, text=True)
-    os.close(fd)
-    with open(tmp_path, "w", encoding="utf-8") as f:
-        f.write(text)
-    return tmp_path
+    return text
 
 def spectra_cmd():
-    java = JAVA17_EXE if os.path.exists(JAVA17_EXE) else "java"
-    return [java, "-jar", SPECTRA_JAR]
-
-def run_spectra(clj_path: str, timeout_s: int) -> str:
-    if not os.path.exists(SPECTRA_JAR):
+    """Command line without the problem path, for the configured backend."""
+    if SPECTRA_BACKEND == "fake":
+        return [sys.executable, FAKE_SPECTRA] + FAKE_SPECTRA_ARGS
+    return [JAVA_EXE, "-jar", SPECTRA_JAR]
+
+class SpeculationCancelled(Exception):
+    """A speculative Spectra run gave way to a request. Not a RuntimeError, so
+    recordings never store it as a Spectra failure."""
+
+def _lower_priority():
+    os.nice(SPECULATION_NICE)
+
+def _pump(stream, name, chunks):
+    """Forward raw output chunks to the queue as they arrive; None marks EOF."""
+    for chunk in iter(lambda: stream.read1(4096), b""):
+        chunks.put((name, chunk))
+    chunks.put((name, None))
+
+def stop_spectra(proc):
+    if proc.poll() is None:
+        proc.terminate()
+        try:
+            proc.wait(timeout=SPECTRA_STOP_GRACE_SECONDS)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+def run_spectra(clj_path: str, timeout_s: float, low_priority: bool = False, timings=stage_timings.NULL,
+                cancel=None) -> str:
+    """launch_spectra, or its recording when SPECTRA_RECORDING is "replay"."""
+    if SPECTRA_RECORDING == "off":
+        return launch_spectra(clj_path, timeout_s, low_priority, timings, cancel)
+    with open(clj_path, "r", encoding="utf-8") as f:
+        problem = f.read()
+    if SPECTRA_RECORDING == "replay":
+        with timings.span("replay"):
+            return SPECTRA_RECORDER.replay(problem, timeout_s, SPECTRA_REPLAY_SPEED)
+    return SPECTRA_RECORDER.record(problem, timeout_s,
+                                   lambda: launch_spectra(clj_path, timeout_s, low_priority, timings, cancel))
+
+def launch_spectra(clj_path: str, timeout_s: float, low_priority: bool = False, timings=stage_timings.NULL,
+                   cancel=None) -> str:
+    """Spectra's stdout up to and including the first plan (or everything it
+    printed, if it exits without one). The process is stopped as soon as the
+    plan or a failure marker shows up, or when cancel() turns true
+    (SpeculationCancelled)."""
+    if SPECTRA_BACKEND == "jar" and not os.path.exists(SPECTRA_JAR):
         raise FileNotFoundError(f"Spectra.jar not found: {SPECTRA_JAR}")
 
     cmd = spectra_cmd() + [clj_path]
-    result = subprocess.run(
+    launched = time.perf_counter_ns()
+    first_output = None
+    proc = subprocess.Popen(
         cmd,
         cwd=PROJECT_ROOT,
-        capture_output=True,
-        text=True,
-        timeout=timeout_s
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        preexec_fn=_lower_priority if low_priority and os.name == "posix" else None
     )
-    out = (result.stdout or "").strip()
-    err = (result.stderr or "").strip()
-
-    if result.returncode != 0:
-        raise RuntimeError(f"Spectra failed (code {result.returncode}). STDERR:\n{err}\nSTDOUT:\n{out}")
+    chunks = queue.Queue()
+    for name, stream in (("out", proc.stdout), ("err", proc.stderr)):
+        threading.Thread(target=_pump, args=(stream, name, chunks), daemon=True).start()
+
+    text = {"out": "", "err": ""}
+    decoders = {name: codecs.getincrementaldecoder("utf-8")(errors="replace") for name in text}
+    marker_len = max(map(len, SPECTRA_FAILURE_MARKERS), default=0)
+    give_up = time.monotonic() + timeout_s
+    open_streams = 2
+    try:
+        while open_streams:
+            wait = max(0.0, give_up - time.monotonic())
+            try:
+                name, chunk = chunks.get(timeout=wait if cancel is None else min(wait, SPECULATION_CANCEL_POLL_SECONDS))
+            except queue.Empty:
+                if cancel is not None and cancel():
+                    raise SpeculationCancelled() from None
+                if time.monotonic() < give_up:
+                    continue
+                raise subprocess.TimeoutExpired(cmd, timeout_s, output=text["out"], stderr=text["err"]) from None
+            if chunk is None:
+                open_streams -= 1
+                continue
+            if first_output is None:
+                first_output = time.perf_counter_ns()
+                timings.add("jvm_first_output", first_output - launched)
+            seen = len(text[name])
+            text[name] += decoders[name].decode(chunk)
+            if name == "out" and "]" in text["out"][seen:]:
+                plan = PLAN_RE.search(text["out"])
+                if plan:
+                    return text["out"][:plan.end()].strip()
+            recent = text[name][max(0, seen - marker_len):]
+            for marker in SPECTRA_FAILURE_MARKERS:
+                if marker in recent:
+                    raise RuntimeError(f"Spectra failed ({marker}). STDERR:\n{text['err'].strip()}\nSTDOUT:\n{text['out'].strip()}")
+        returncode = proc.wait(timeout=max(0.0, give_up - time.monotonic()))
+    finally:
+        stop_spectra(proc)
+        proc.stdout.close()
+        proc.stderr.close()
+        if first_output is None:
+            timings.add("jvm_first_output", time.perf_counter_ns() - launched)
+        else:
+            timings.add("jvm_run", time.perf_counter_ns() - first_output)
+
+    out, err = text["out"].strip(), text["err"].strip()
+    if returncode != 0:
+        raise RuntimeError(f"Spectra failed (code {returncode}). STDERR:\n{err}\nSTDOUT:\n{out}")
 
     return out or err
 
-def save_debug(tag: str, out: str) -> str:
-    path = os.path.join(DEBUG_DIR, f"spectra_{tag}.txt")
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(out)
-    return path
+def save_debug(key: str, tag: str, out: str) -> str:
+    """Queue out for the debug archive; returns how to find it (never blocks on disk)."""
+    if not DEBUG_CAPTURE.capture(key, tag, out):
+        return "dropped (capture queue full)"
+    return f"capture {tag}, board key {key[:12]}"
 
 # Plan parsing
+PLAN_RE = re.compile(r"\[[^\]]*\]", flags=re.DOTALL)
+
 def parse_first_bracket_list(out: str) -> str | None:
     # find first [...] segment
-    m = re.search(r"\[[^\]]*\]", out, flags=re.DOTALL)
+    m = PLAN_RE.search(out)
     return m.group(0).strip() if m else None
 
 def extract_placewall_cell(plan_txt: str) -> str | None:
@@ -218,42 +442,105 @@ def candidate_goal_cells_ui(pig_pos: dict, walls: list):
             if is_valid(*nn) and nn not in wall_set and nn != (pq, pr):
                 yield nn
 
+def filter_candidates(pig_pos, walls, cells):
+    """Drop candidates eliminated by the strategy rules before any Spectra call."""
+    cells = list(dict.fromkeys(cells))
+    if MOVE_FILTER is None:
+        return cells
+    pig = cell_index(pig_pos["q"], pig_pos["r"])
+    kept = MOVE_FILTER.filter(pig, walls_to_mask(walls), [cell_index(q, r) for q, r in cells])
+    return [cell_qr(i) for i in kept]
+
 # Spectra move (with caching)
 def board_cache_key(pig_pos: dict, walls: list) -> str:
     walls_sorted = sorted([(w["q"], w["r"]) for w in walls])
     payload = {"pig": (pig_pos["q"], pig_pos["r"]), "walls": walls_sorted}
     return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
 
-def spectra_move(pig_pos: dict, walls: list):
+def spectra_cache_key(pig_pos: dict, walls: list) -> str:
+    """Board key prefixed with where answers come from, so fake or replayed
+    moves are never served as real Spectra answers."""
+    source = SPECTRA_BACKEND + ("-replay" if SPECTRA_RECORDING == "replay" else "")
+    return f"{source}-{board_cache_key(pig_pos, walls)}"
+
+def spectra_move(pig_pos: dict, walls: list, low_priority: bool = False, deadline=None,
+                 timings=stage_timings.NULL):
     thoughts = []
     thoughts.append("[SPECTRA] One-step planning mode: try candidate goal cells until Spectra returns a non-empty plan.")
 
     key = board_cache_key(pig_pos, walls)
-    if key in SPECTRA_CACHE:
-        cached = SPECTRA_CACHE[key]
+    wait = deadline.remaining(SEARCH_RESERVE_SECONDS) if deadline is not None else None
+    # "cache" is lookup plus any wait on an identical request; our own Spectra
+    # stages are recorded separately and subtracted
+    started, inner = time.perf_counter_ns(), timings.total_ns()
+    compute = lambda: spectra_search(pig_pos, walls, key, thoughts, low_priority, deadline, timings)
+    try:
+        try:
+            move, source = SPECTRA_CACHE.get_or_compute(spectra_cache_key(pig_pos, walls), compute, timeout=wait)
+        except SpeculationCancelled:
+            if low_priority:
+                raise
+            # We joined a speculative run that stopped for us: compute it ourselves
+            wait = deadline.remaining(SEARCH_RESERVE_SECONDS) if deadline is not None else None
+            move, source = SPECTRA_CACHE.get_or_compute(spectra_cache_key(pig_pos, walls), compute, timeout=wait)
+    finally:
+        timings.add("cache", time.perf_counter_ns() - started - (timings.total_ns() - inner))
+    CACHE_LOOKUPS.inc(source)
+    if source in (move_cache.MEMORY, move_cache.DISK):
         thoughts.append("[SPECTRA] Cache hit: returning previously computed move.")
-        return cached, thoughts
+    elif source == move_cache.JOINED:
+        thoughts.append("[SPECTRA] Joined an identical request already in flight.")
+    return move, thoughts
 
+def spectra_search(pig_pos: dict, walls: list, key: str, thoughts: list, low_priority: bool = False,
+                   deadline=None, timings=stage_timings.NULL):
+    """Try candidate goal cells until Spectra returns a PlaceWall plan; the move is cached by the caller."""
     wall_cells_logic = {ui_to_cell(w["q"], w["r"]) for w in walls}
 
     tried = 0
     start_t = time.time()
 
-    for (cq, cr) in candidate_goal_cells_ui(pig_pos, walls):
+    with timings.span("candidates"):
+        candidates = filter_candidates(pig_pos, walls, candidate_goal_cells_ui(pig_pos, walls))
+    if MOVE_FILTER is not None:
+        thoughts.append(f"[RULES] {len(candidates)} candidates after strategy rules ({MOVE_FILTER.report()})")
+
+    for (cq, cr) in candidates:
         goal_cell = ui_to_cell(cq, cr)
         if goal_cell in wall_cells_logic:
             continue
 
+        timeout_s = SPECTRA_TIMEOUT_SECONDS
+        if deadline is not None:
+            if deadline.cancelled():
+                raise SpeculationCancelled()
+            timeout_s = min(timeout_s, deadline.remaining(SEARCH_RESERVE_SECONDS))
+            if timeout_s < MIN_SPECTRA_SECONDS:
+                if not low_priority:
+                    TIMEOUTS.inc("budget")
+                raise TimeoutError(f"request budget spent after {tried} candidates")
+
         tried += 1
         tmp_path = None
         try:
-            tmp_path = write_temp_clj(pig_pos, walls, goal_cell)
-            out = run_spectra(tmp_path, timeout_s=SPECTRA_TIMEOUT_SECONDS)
-
-            plan = parse_first_bracket_list(out)
+            tmp_path = write_temp_clj(pig_pos, walls, goal_cell, timings)
+            run_start = time.perf_counter()
+            try:
+                out = run_spectra(tmp_path, timeout_s=timeout_s, low_priority=low_priority, timings=timings,
+                                  cancel=deadline.cancel if deadline is not None else None)
+            except subprocess.TimeoutExpired:
+                TIMEOUTS.inc("spectra")
+                SPECTRA_RUNS.observe(time.perf_counter() - run_start, "timeout")
+                raise
+            except Exception:
+                SPECTRA_RUNS.observe(time.perf_counter() - run_start, "error")
+                raise
+
+            with timings.span("parse"):
+                plan = parse_first_bracket_list(out)
+            SPECTRA_RUNS.observe(time.perf_counter() - run_start, "plan" if plan and plan.strip() != "[]" else "no_plan")
             if not plan:
-                tag = key[:8] + f"_{tried}"
-                dbg = save_debug(tag, out)
+                dbg = save_debug(key, f"{key[:8]}_{tried}", out)
                 thoughts.append(f"[SPECTRA] Candidate {goal_cell}: no bracket plan found. Saved: {dbg}")
                 continue
 
@@ -261,10 +548,10 @@ def spectra_move(pig_pos: dict, walls: list):
                 thoughts.append(f"[SPECTRA] Candidate {goal_cell}: plan was empty [] (goal already true or unreachable).")
                 continue
 
-            cell = extract_placewall_cell(plan)
+            with timings.span("parse"):
+                cell = extract_placewall_cell(plan)
             if not cell:
-                tag = key[:8] + f"_{tried}"
-                dbg = save_debug(tag, out)
+                dbg = save_debug(key, f"{key[:8]}_{tried}", out)
                 thoughts.append(f"[SPECTRA] Candidate {goal_cell}: couldn't parse PlaceWall cell. Saved: {dbg}")
                 thoughts.append(f"[SPECTRA] Plan text: {plan}")
                 continue
@@ -275,9 +562,7 @@ def spectra_move(pig_pos: dict, walls: list):
             thoughts.append(f"[SPECTRA] SUCCESS after {tried} candidates in {elapsed:.2f}s")
             thoughts.append(f"[SPECTRA] Plan: {plan}")
             thoughts.append(f"[SPECTRA] Move: PlaceWall {cell} -> UI=({move['q']},{move['r']})")
-
-            SPECTRA_CACHE[key] = move
-            return move, thoughts
+            return move
 
         finally:
             if tmp_path and os.path.exists(tmp_path):
@@ -288,6 +573,25 @@ def spectra_move(pig_pos: dict, walls: list):
 
     raise RuntimeError("Spectra did not return a usable PlaceWall plan for any candidate goal cell.")
 
+# Opening book
+def book_move(pig_pos, walls, opening_left=None):
+    """Book wall for an opening position, or (None, thoughts) on a miss."""
+    if OPENING_BOOK is None:
+        return None, ["[BOOK] No opening book loaded."]
+    if (pig_pos["q"], pig_pos["r"]) != PIG_START:
+        return None, ["[BOOK] Pig is off its start cell."]
+    wall_mask = walls_to_mask(walls)
+    # Older clients don't send opening_left; try the longest plan first
+    lefts = [opening_left] if opening_left else range(opening_book.OPENING_WALLS, 0, -1)
+    for left in lefts:
+        move = OPENING_BOOK.lookup(wall_mask, left)
+        if move is not None:
+            q, r = cell_qr(move)
+            return {"q": q, "r": r}, [f"[BOOK] Opening wall ({q}, {r}) with {left} opening wall(s) left."]
+    if OPENING_BOOK.lookup(wall_mask & opening_book.WINDOW_MASK, lefts[0]) is not None:
+        return None, ["[BOOK] Book wall not confirmed with walls outside the pig's 2-ring."]
+    return None, ["[BOOK] Position not in the opening book."]
+
 # Fallback move
 def fallback_move(pig_pos, walls):
     pq, pr = pig_pos["q"], pig_pos["r"]
@@ -308,29 +612,194 @@ def fallback_move(pig_pos, walls):
 
     return None, thoughts
 
-# API
-@app.route("/api/move", methods=["POST"])
-def get_move():
-    data = request.json or {}
-    pig_pos = data.get("pig_pos", {"q": UI_CENTER_Q, "r": UI_CENTER_R})
-    walls = data.get("walls", [])
+# Speculation worker
+_speculation_jobs = queue.Queue(maxsize=SPECULATION_QUEUE_SIZE)
+_speculation_lock = threading.Lock()
+_speculation_thread = None
+_foreground = threading.Condition()
+_foreground_active = 0
+_foreground_keys = {}   # Spectra cache key -> requests in progress for that board
+
+@contextmanager
+def foreground_request(key=None):
+    """Marks a request for the board with Spectra cache key `key` in progress;
+    speculation waits until none are, and stops for requests on other boards."""
+    global _foreground_active
+    with _foreground:
+        _foreground_active += 1
+        _foreground_keys[key] = _foreground_keys.get(key, 0) + 1
+    try:
+        yield
+    finally:
+        with _foreground:
+            _foreground_active -= 1
+            _foreground_keys[key] -= 1
+            if not _foreground_keys[key]:
+                del _foreground_keys[key]
+            _foreground.notify_all()
+
+def requests_elsewhere(key):
+    """Whether a request for a board other than `key` is in progress."""
+    return _foreground_active > _foreground_keys.get(key, 0)
+
+def predicted_replies(pig_pos, walls):
+    """Pig cells after each shortest first step (game.js picks one at random)."""
+    dist, steps = pig_steps(cell_index(pig_pos["q"], pig_pos["r"]), walls_to_mask(walls))
+    if dist in (0, 1, INF):
+        return []  # the pig escapes or is trapped: no next request
+    return [dict(zip(("q", "r"), cell_qr(c))) for c in iter_bits(steps)]
+
+def speculate(pig_pos, walls, move, pig_moves=True):
+    """Queue the position after `move`; a full queue drops the job."""
+    global _speculation_thread
+    if not SPECULATE or move is None:
+        return
+    with _speculation_lock:
+        if _speculation_thread is None:
+            _speculation_thread = threading.Thread(target=_speculation_worker, name="speculation", daemon=True)
+            _speculation_thread.start()
+    try:
+        _speculation_jobs.put_nowait((pig_pos, walls + [move], pig_moves))
+    except queue.Full:
+        pass
+
+def _speculation_worker():
+    while True:
+        pig_pos, walls, pig_moves = _speculation_jobs.get()
+        replies = predicted_replies(pig_pos, walls) if pig_moves else [pig_pos]
+        for reply in replies:
+            with _foreground:
+                _foreground.wait_for(lambda: _foreground_active == 0)
+            key = spectra_cache_key(reply, walls)
+            if key in SPECTRA_CACHE:
+                continue
+            try:
+                spectra_move(reply, walls, low_priority=True,
+                             deadline=Deadline(SPECULATION_BUDGET_SECONDS, cancel=lambda: requests_elsewhere(key)))
+            except Exception:
+                pass  # a failed or cancelled guess only costs the next request its cache hit
+        _speculation_jobs.task_done()
 
-    thoughts = ["Decision engine: Spectra planner (fallback = minimax)."]
+# API
+class Deadline:
+    """Request budget on the monotonic clock, shared by every engine in the pipeline.
+    cancel, if given, is polled to stop work early (speculation giving way)."""
+    def __init__(self, seconds, cancel=None):
+        self.seconds = seconds
+        self.start = time.monotonic()
+        self.expires = self.start + seconds
+        self.cancel = cancel
+
+    def cancelled(self):
+        return self.cancel is not None and self.cancel()
+
+    def remaining(self, reserve=0.0):
+        return max(0.0, self.expires - reserve - time.monotonic())
+
+    def used(self):
+        return time.monotonic() - self.start
+
+def request_budget(data):
+    """Seconds for this request: budget_ms from the client if valid, capped."""
+    budget_ms = data.get("budget_ms")
+    if isinstance(budget_ms, (int, float)) and budget_ms > 0:
+        return min(budget_ms / 1000.0, MAX_REQUEST_BUDGET_SECONDS)
+    return REQUEST_BUDGET_SECONDS
+
+def profile_requested():
+    """Whether the current request asked to be profiled and may be."""
+    if not PROFILE_DIR:
+        return False
+    if PROFILE_TOKEN:
+        return hmac.compare_digest(request.headers.get(PROFILE_HEADER, ""), PROFILE_TOKEN)
+    return bool(request.headers.get(PROFILE_HEADER) or request.args.get("profile")) \
+        and request.remote_addr in LOOPBACK_ADDRS
+
+def choose_move(pig_pos, walls, data, deadline, timings=stage_timings.NULL, stats=None):
+    """(move, thoughts, engine) from the engine chain: opening book, Spectra, search, fallback.
+    A stats dict, if given, receives search.Searcher.stats() when the search ran."""
+    thoughts = [f"Decision engine: book -> Spectra -> search -> fallback, budget {deadline.seconds:.1f}s."]
+    opening = data.get("phase") == "OPENING"
+
+    if opening:
+        with timings.span("book"):
+            move, t = book_move(pig_pos, walls, data.get("opening_left"))
+        thoughts.extend(t)
+        if move is not None:
+            return move, thoughts, "book"
 
     try:
-        move, t = spectra_move(pig_pos, walls)
+        move, t = spectra_move(pig_pos, walls, deadline=deadline, timings=timings)
         thoughts.extend(t)
-        return jsonify({"move": move, "thoughts": thoughts})
+        return move, thoughts, "spectra"
 
-    except subprocess.TimeoutExpired:
-        thoughts.append(f"[SPECTRA] Timed out after {SPECTRA_TIMEOUT_SECONDS}s.")
+    except subprocess.TimeoutExpired as e:
+        thoughts.append(f"[SPECTRA] Timed out after {e.timeout:.1f}s.")
     except Exception as e:
         thoughts.append(f"[SPECTRA] Failed: {e}")
 
-    move, t = fallback_move(pig_pos, walls)
+    if deadline.remaining(FALLBACK_RESERVE_SECONDS) > 0:
+        free_walls = (data.get("opening_left") or 1) if opening else 1
+        stats = {} if stats is None else stats
+        with timings.span("search"):
+            move, t = search.search_move(pig_pos, walls, SEARCH_MAX_DEPTH, SEARCH_PIG_MODEL, free_walls=free_walls,
+                                         deadline=deadline.expires - FALLBACK_RESERVE_SECONDS, stats=stats)
+        thoughts.extend(t)
+        if stats.get("timed_out"):
+            TIMEOUTS.inc("search")
+        if move is not None:
+            SEARCH_NODES.observe(stats["nodes"])
+            SEARCH_BFS_CALLS.observe(stats["bfs_calls"])
+            return move, thoughts, "search"
+
+    with timings.span("fallback"):
+        move, t = fallback_move(pig_pos, walls)
     thoughts.extend(t)
-    thoughts.append("[FALLBACK] Returned heuristic move (Spectra unavailable).")
-    return jsonify({"move": move, "thoughts": thoughts})
+    thoughts.append("[FALLBACK] Returned heuristic move (Spectra and search unavailable).")
+    return move, thoughts, "fallback"
+
+@app.route("/api/move", methods=["POST"])
+def get_move():
+    arrival = time.time()
+    data = request.json or {}
+    pig_pos = data.get("pig_pos", {"q": UI_CENTER_Q, "r": UI_CENTER_R})
+    walls = data.get("walls", [])
+    deadline = Deadline(request_budget(data))
+    timings = stage_timings.Timings() if STAGE_TIMINGS else stage_timings.NULL
+    sampler = profiler.NULL
+    if profile_requested():
+        sampler = profiler.Sampler(PROFILE_INTERVAL)
+
+    search_stats = {}
+    with foreground_request(spectra_cache_key(pig_pos, walls)), sampler:
+        move, thoughts, engine = choose_move(pig_pos, walls, data, deadline, timings, search_stats)
+    REQUEST_SECONDS.observe(deadline.used(), engine)
+    if timings.enabled:
+        app.logger.info("move engine=%s used=%.1fms %s", engine, deadline.used() * 1000, timings.summary())
+
+    # In the opening the pig stays put and the same pig asks again
+    opening_left = data.get("opening_left") or 0
+    speculate(pig_pos, walls, move, pig_moves=not (data.get("phase") == "OPENING" and opening_left > 1))
+    answer = {
+        "move": move,
+        "engine": engine,
+        "budget_ms": round(deadline.seconds * 1000),
+        "used_ms": round(deadline.used() * 1000, 1),
+        "timings_ms": timings.as_ms(),
+        "search_stats": search_stats,
+    }
+    if TRAFFIC_LOG is not None:
+        TRAFFIC_LOG.log(arrival, data, answer)
+    if sampler.enabled:
+        path = sampler.save(PROFILE_DIR, board_cache_key(pig_pos, walls))
+        profiler.prune(PROFILE_DIR, PROFILE_MAX_FILES)
+        app.logger.info("profiled move: %d samples in %s", sampler.samples, path)
+        answer["profile"] = os.path.basename(path)
+    return jsonify({"thoughts": thoughts, **answer})
+
+@app.route("/metrics")
+def get_metrics():
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,135 @@
+"""
+Bitmask view of the 5x11 Block the Pig board.
+
+Cells are indexed row-major (index = r * NUM_COLS + q), so a set of walls is
+a single 55-bit integer and a BFS frontier can be expanded with a handful of
+shifts. Neighbour rules match game.js / app.py (odd-r offset, pointy-top).
+"""
+
+COL_MIN, COL_MAX = 0, 4
+ROW_MIN, ROW_MAX = 0, 10
+NUM_COLS = COL_MAX - COL_MIN + 1
+NUM_ROWS = ROW_MAX - ROW_MIN + 1
+NUM_CELLS = NUM_COLS * NUM_ROWS
+
+PIG_START = (2, 5)
+
+INF = float("inf")
+
+def get_neighbors(q, r):
+    # MUST match game.js odd-row rules
+    if r % 2 == 0:
+        return [(q+1, r), (q, r-1), (q-1, r-1), (q-1, r), (q-1, r+1), (q, r+1)]
+    else:
+        return [(q+1, r), (q+1, r-1), (q, r-1), (q-1, r), (q, r+1), (q+1, r+1)]
+
+def is_valid(q, r):
+    return COL_MIN <= q <= COL_MAX and ROW_MIN <= r <= ROW_MAX
+
+def is_escape(q, r):
+    return is_valid(q, r) and (q == COL_MIN or q == COL_MAX or r == ROW_MIN or r == ROW_MAX)
+
+def cell_index(q, r):
+    return (r - ROW_MIN) * NUM_COLS + (q - COL_MIN)
+
+def cell_qr(idx):
+    r, q = divmod(idx, NUM_COLS)
+    return q + COL_MIN, r + ROW_MIN
+
+# Neighbour indices in get_neighbors order (off-board cells dropped)
+NEIGHBORS = tuple(
+    tuple(cell_index(nq, nr) for nq, nr in get_neighbors(*cell_qr(i)) if is_valid(nq, nr))
+    for i in range(NUM_CELLS)
+)
+NEIGHBOR_MASKS = tuple(sum(1 << n for n in ns) for ns in NEIGHBORS)
+
+FULL_MASK = (1 << NUM_CELLS) - 1
+ESCAPE_MASK = sum(1 << i for i in range(NUM_CELLS) if is_escape(*cell_qr(i)))
+
+_COL_FIRST = sum(1 << cell_index(COL_MIN, r) for r in range(ROW_MIN, ROW_MAX + 1))
+_COL_LAST = sum(1 << cell_index(COL_MAX, r) for r in range(ROW_MIN, ROW_MAX + 1))
+_EVEN_ROWS = sum(1 << i for i in range(NUM_CELLS) if cell_qr(i)[1] % 2 == 0)
+_ODD_ROWS = FULL_MASK ^ _EVEN_ROWS
+
+# Shift-friendly masks: cells that may step W/E, and per-parity diagonals
+_NOT_FIRST = FULL_MASK ^ _COL_FIRST
+_NOT_LAST = FULL_MASK ^ _COL_LAST
+_EVEN_DIAG = _EVEN_ROWS & _NOT_FIRST   # even rows step to (q-1, r±1)
+_ODD_DIAG = _ODD_ROWS & _NOT_LAST      # odd rows step to (q+1, r±1)
+
+def expand(mask):
+    """All cells adjacent to any cell in mask (mask itself not included)."""
+    out = ((mask & _NOT_LAST) << 1) | ((mask & _NOT_FIRST) >> 1)
+    out |= (mask << NUM_COLS) | (mask >> NUM_COLS)
+    e = mask & _EVEN_DIAG
+    out |= (e >> (NUM_COLS + 1)) | (e << (NUM_COLS - 1))
+    o = mask & _ODD_DIAG
+    out |= (o >> (NUM_COLS - 1)) | (o << (NUM_COLS + 1))
+    return out & FULL_MASK
+
+def iter_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def cells_to_mask(cells):
+    """(q, r) tuples -> wall mask."""
+    m = 0
+    for q, r in cells:
+        m |= 1 << cell_index(q, r)
+    return m
+
+def walls_to_mask(walls):
+    """API wall list [{'q':..,'r':..}] -> wall mask."""
+    return cells_to_mask((w["q"], w["r"]) for w in walls)
+
+def mask_to_walls(mask):
+    return [dict(zip(("q", "r"), cell_qr(i))) for i in iter_bits(mask)]
+
+def escape_distance(pig, walls):
+    """Steps from pig (cell index) to the nearest free escape cell, INF if trapped."""
+    bit = 1 << pig
+    if bit & ESCAPE_MASK:
+        return 0
+    open_cells = FULL_MASK & ~walls
+    seen = bit
+    frontier = bit
+    dist = 0
+    while frontier:
+        dist += 1
+        frontier = expand(frontier) & open_cells & ~seen
+        if frontier & ESCAPE_MASK:
+            return dist
+        seen |= frontier
+    return INF
+
+def pig_steps(pig, walls):
+    """
+    Returns (distance, steps_mask): steps_mask holds every first step that
+    starts a shortest escape path. Layers grow backwards from the free escape
+    cells until they touch the pig.
+    """
+    bit = 1 << pig
+    if bit & ESCAPE_MASK:
+        return 0, 0
+    open_cells = FULL_MASK & ~walls
+    layer = ESCAPE_MASK & open_cells
+    seen = layer
+    dist = 1
+    around = NEIGHBOR_MASKS[pig]
+    while layer:
+        hit = around & layer
+        if hit:
+            return dist, hit
+        layer = expand(layer) & open_cells & ~seen & ~bit
+        seen |= layer
+        dist += 1
+    return INF, 0
+
+def first_step(pig, steps_mask):
+    """The step the Python pig takes: first shortest step in get_neighbors order."""
+    for n in NEIGHBORS[pig]:
+        if steps_mask >> n & 1:
+            return n
+    return None
@@ -0,0 +1,233 @@
+"""
+Bulk position corpora as NumPy arrays.
+
+Positions are the (pig cell index, wall mask) pairs of board.py, held as a
+uint8 array of pigs and a uint64 array of wall masks so that millions of
+boards can be sampled and checked at once. The BFS kernels are board.expand
+and board.pig_steps with every shift applied to a whole array.
+
+Distributions:
+    start    resetGame's 5-15 random walls, pig on its start cell
+    midgame  starts followed by up to max_plies random wall / pig moves,
+             as positions.midgame_positions plays them
+    endgame  near-trapped boards: the pig sits in a walled-off region with
+             1..max_exits free border cells, so walling those traps it
+and from_records() takes positions from a self-play game-record file.
+Every corpus is filtered to playable boards (pig inside the board, not on a
+wall, still able to escape). Chunk i is drawn from default_rng([seed, i]),
+so a corpus depends only on its distribution, options, seed and count.
+"""
+import json
+import os
+
+import numpy as np
+
+import board
+import game_records
+from board import ESCAPE_MASK, FULL_MASK, NEIGHBORS, NEIGHBOR_MASKS, NUM_CELLS, NUM_COLS
+from positions import START
+
+CHUNK_SIZE = 1 << 16
+MAX_EMPTY_CHUNKS = 50         # give up when this many chunks in a row yield nothing
+MIN_START_WALLS, MAX_START_WALLS = 5, 15
+TRAPPED = -1                  # distance of a pig that cannot reach the border
+
+CORPUS_DTYPE = np.dtype([("walls", "<u8"), ("pig", "u1")])
+
+_U = np.uint64
+_ONE = _U(1)
+_FULL = _U(FULL_MASK)
+_ESCAPE = _U(ESCAPE_MASK)
+# board.expand's shift masks
+_NOT_FIRST_U, _NOT_LAST_U = _U(board._NOT_FIRST), _U(board._NOT_LAST)
+_EVEN_DIAG_U, _ODD_DIAG_U = _U(board._EVEN_DIAG), _U(board._ODD_DIAG)
+_NEIGHBOR_MASKS = np.array(NEIGHBOR_MASKS, dtype=np.uint64)
+_CELLS = np.arange(NUM_CELLS, dtype=np.uint64)
+_INNER = np.array([c for c in range(NUM_CELLS) if not ESCAPE_MASK >> c & 1])
+# Neighbour cells per cell, in get_neighbors order, padded with -1
+NEIGHBOR_TABLE = np.array([list(ns) + [-1] * (6 - len(ns)) for ns in NEIGHBORS], dtype=np.int64)
+
+def expand(mask):
+    """board.expand over an array of masks."""
+    out = ((mask & _NOT_LAST_U) << _U(1)) | ((mask & _NOT_FIRST_U) >> _U(1))
+    out |= (mask << _U(NUM_COLS)) | (mask >> _U(NUM_COLS))
+    e = mask & _EVEN_DIAG_U
+    out |= (e >> _U(NUM_COLS + 1)) | (e << _U(NUM_COLS - 1))
+    o = mask & _ODD_DIAG_U
+    out |= (o >> _U(NUM_COLS - 1)) | (o << _U(NUM_COLS + 1))
+    return out & _FULL
+
+def popcount(mask):
+    """Set bits per uint64."""
+    m = mask - ((mask >> _U(1)) & _U(0x5555555555555555))
+    m = (m & _U(0x3333333333333333)) + ((m >> _U(2)) & _U(0x3333333333333333))
+    m = (m + (m >> _U(4))) & _U(0x0F0F0F0F0F0F0F0F)
+    return ((m * _U(0x0101010101010101)) >> _U(56)).astype(np.int64)
+
+def pig_steps(pigs, walls):
+    """board.pig_steps for arrays: (distance, first-step masks), TRAPPED where
+    the pig cannot escape (steps 0 there and on the border)."""
+    n = len(pigs)
+    pig_bits = _ONE << pigs.astype(np.uint64)
+    open_cells = _FULL & ~walls
+    around = _NEIGHBOR_MASKS[pigs]
+    dist = np.full(n, TRAPPED, dtype=np.int16)
+    steps = np.zeros(n, dtype=np.uint64)
+    on_border = (pig_bits & _ESCAPE) != 0
+    dist[on_border] = 0
+    pending = ~on_border
+    layer = _ESCAPE & open_cells
+    seen = layer.copy()
+    d = 1
+    while True:
+        pending &= layer != 0
+        if not pending.any():
+            break
+        hit = around & layer
+        found = pending & (hit != 0)
+        dist[found] = d
+        steps[found] = hit[found]
+        pending &= ~found
+        layer = expand(layer) & open_cells & ~seen & ~pig_bits
+        seen |= layer
+        d += 1
+    return dist, steps
+
+def escape_distances(pigs, walls):
+    return pig_steps(pigs, walls)[0]
+
+def reachable(pigs, walls):
+    """Masks of the free cells the pig can reach (its own cell included)."""
+    open_cells = _FULL & ~walls
+    region = _ONE << pigs.astype(np.uint64)
+    while True:
+        grown = region | (expand(region) & open_cells)
+        if np.array_equal(grown, region):
+            return region
+        region = grown
+
+def playable(pigs, walls):
+    """Boolean mask of legal positions the pig can still escape from."""
+    pigs = np.asarray(pigs)
+    ok = (pigs >= 0) & (pigs < NUM_CELLS) & ((walls & ~_FULL) == 0)
+    safe = np.where(ok, pigs, 0)
+    ok &= ((walls >> safe.astype(np.uint64)) & _ONE) == 0
+    dist = escape_distances(safe, walls)
+    return ok & (dist > 0)
+
+def pick_neighbor(pigs, masks, rng):
+    """A random neighbour of each pig that is set in masks, -1 where none is."""
+    cells = NEIGHBOR_TABLE[pigs]
+    ok = (cells >= 0) & (((masks[:, None] >> np.maximum(cells, 0).astype(np.uint64)) & _ONE) == 1)
+    keys = np.where(ok, rng.random(cells.shape), -1.0)
+    picked = cells[np.arange(len(cells)), keys.argmax(axis=1)]
+    return np.where(ok.any(axis=1), picked, -1)
+
+def pick_cell(masks, rng):
+    """A random set cell of each mask, -1 where the mask is empty."""
+    ok = ((masks[:, None] >> _CELLS) & _ONE) == 1
+    keys = np.where(ok, rng.random(ok.shape), -1.0)
+    return np.where(ok.any(axis=1), keys.argmax(axis=1), -1)
+
+# Samplers: (rng, n, **options) -> (pigs, walls), not yet filtered for playability
+def sample_start(rng, n):
+    keys = rng.random((n, NUM_CELLS))
+    keys[:, START] = 2.0   # never walled
+    cells = np.argsort(keys, axis=1)[:, :MAX_START_WALLS].astype(np.uint64)
+    counts = rng.integers(MIN_START_WALLS, MAX_START_WALLS + 1, n)
+    take = np.arange(MAX_START_WALLS)[None, :] < counts[:, None]
+    walls = np.bitwise_or.reduce(np.where(take, _ONE << cells, _U(0)), axis=1)
+    return np.full(n, START, dtype=np.int64), walls
+
+def sample_midgame(rng, n, max_plies=8):
+    pigs, walls = sample_start(rng, n)
+    plies = rng.integers(0, int(max_plies) + 1, n)
+    live = np.arange(n)
+    for t in range(int(max_plies)):
+        live = live[plies[live] > t]
+        if not len(live):
+            break
+        pig = pigs[live]
+        wall = pick_neighbor(pig, _NEIGHBOR_MASKS[pig] & ~walls[live], rng)
+        live, pig, wall = live[wall >= 0], pig[wall >= 0], wall[wall >= 0]
+        walls[live] |= _ONE << wall.astype(np.uint64)
+        _, steps = pig_steps(pig, walls[live])
+        nxt = pick_neighbor(pig, steps, rng)
+        live, nxt = live[nxt >= 0], nxt[nxt >= 0]
+        pigs[live] = nxt
+    return pigs, walls
+
+def sample_endgame(rng, n, max_exits=2, max_region=12):
+    """Grow a random open region around an inner pig holding 1..max_exits
+    border cells, then wall its whole boundary."""
+    pigs = _INNER[rng.integers(0, len(_INNER), n)]
+    region = _ONE << pigs.astype(np.uint64)
+    size = rng.integers(2, int(max_region) + 1, n)
+    exits = rng.integers(1, int(max_exits) + 1, n)
+    for step in range(1, int(max_region)):
+        grow = step < size
+        room = expand(region) & ~region
+        full = popcount(region & _ESCAPE) >= exits
+        room[full] &= ~_ESCAPE
+        cell = pick_cell(room, rng)
+        grow &= cell >= 0
+        region[grow] |= _ONE << cell[grow].astype(np.uint64)
+    walls = expand(region) & ~region
+    return pigs, walls
+
+DISTRIBUTIONS = {
+    "start": sample_start,
+    "midgame": sample_midgame,
+    "endgame": sample_endgame,
+}
+
+def generate(distribution, count, seed=0, chunk_size=CHUNK_SIZE, **options):
+    """count playable positions from a distribution: (pigs uint8, walls uint64)."""
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution: {distribution} (choose from {', '.join(DISTRIBUTIONS)})")
+    sampler = DISTRIBUTIONS[distribution]
+    pig_parts, wall_parts = [], []
+    have = chunk = empty = 0
+    while have < count:
+        rng = np.random.default_rng([seed, chunk])
+        pigs, walls = sampler(rng, chunk_size, **options)
+        keep = playable(pigs, walls)
+        pig_parts.append(pigs[keep].astype(np.uint8))
+        wall_parts.append(walls[keep])
+        have += int(keep.sum())
+        empty = 0 if keep.any() else empty + 1
+        if empty >= MAX_EMPTY_CHUNKS:
+            raise ValueError(f"{distribution} {options}: no playable positions in {empty} chunks")
+        chunk += 1
+    return np.concatenate(pig_parts)[:count], np.concatenate(wall_parts)[:count]
+
+def from_records(path, count=None, seed=0):
+    """Distinct playable positions from a game-record file (game_records.py),
+    all of them or a seeded sample of count."""
+    with game_records.Reader(path) as reader:
+        plies = reader.as_array()
+        pigs, walls = plies["pig"].astype(np.int64), plies["walls"].copy()
+        del plies
+    keep = playable(pigs, walls)
+    keys = np.unique((walls[keep] << _U(6)) | pigs[keep].astype(np.uint64))
+    if count is not None and count < len(keys):
+        keys = np.sort(np.random.default_rng(seed).choice(keys, count, replace=False))
+    return (keys & _U(0x3F)).astype(np.uint8), keys >> _U(6)
+
+def save(path, pigs, walls, meta=None):
+    """One structured .npy (fields walls, pig); meta goes to a .json beside it."""
+    arr = np.empty(len(pigs), dtype=CORPUS_DTYPE)
+    arr["walls"], arr["pig"] = walls, pigs
+    np.save(path, arr)
+    if meta is not None:
+        with open(os.path.splitext(path)[0] + ".json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+def load(path, mmap=False):
+    """(pigs, walls) from a corpus .npy."""
+    arr = np.load(path, mmap_mode="r" if mmap else None)
+    return arr["pig"], arr["walls"]
+
+def to_positions(pigs, walls):
+    """Python (pig, walls) tuples for board.py / search.py."""
+    return list(zip(pigs.tolist(), walls.tolist()))
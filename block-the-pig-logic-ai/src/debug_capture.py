@@ -0,0 +1,160 @@
+"""
+Debug capture archive for Spectra outputs that could not be parsed.
+
+capture() only queues the text; a background thread compresses each capture
+(one zlib stream per record) and appends it to the current segment file
+captures.<n>.z. Every record gets a line in captures.idx:
+
+    key <TAB> tag <TAB> segment <TAB> offset <TAB> length <TAB> unix time
+
+so a capture is found by board hash and read back with a single seek. A
+segment is closed once it reaches segment_bytes; only the newest max_segments
+are kept, and index lines for deleted segments are dropped.
+
+Several app processes may share one directory: each append, rotation and
+index rewrite holds an flock on captures.lock and starts from the newest
+segment on disk. Where fcntl is missing (Windows) there is no lock, and the
+archive is only safe for a single process.
+"""
+import json
+import os
+import queue
+import re
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+INDEX_NAME = "captures.idx"
+LOCK_NAME = "captures.lock"
+SEGMENT_RE = re.compile(r"captures\.(\d+)\.z$")
+
+def segment_path(directory, segment):
+    return os.path.join(directory, f"captures.{segment:06d}.z")
+
+def segments(directory):
+    """Sorted numbers of the segment files present."""
+    found = []
+    for name in os.listdir(directory):
+        m = SEGMENT_RE.match(name)
+        if m:
+            found.append(int(m.group(1)))
+    return sorted(found)
+
+def read_index(directory):
+    """Index entries as dicts, oldest first."""
+    entries = []
+    try:
+        with open(os.path.join(directory, INDEX_NAME), "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) != 6:
+                    continue  # torn last line after a crash
+                key, tag, segment, offset, length, stamp = parts
+                entries.append({"key": key, "tag": tag, "segment": int(segment),
+                                "offset": int(offset), "length": int(length), "time": float(stamp)})
+    except FileNotFoundError:
+        pass
+    return entries
+
+def read_record(directory, entry):
+    with open(segment_path(directory, entry["segment"]), "rb") as f:
+        f.seek(entry["offset"])
+        return json.loads(zlib.decompress(f.read(entry["length"])).decode("utf-8"))
+
+def find(directory, prefix):
+    """Every surviving capture whose board key starts with prefix, oldest first."""
+    records = []
+    for entry in read_index(directory):
+        if entry["key"].startswith(prefix):
+            try:
+                records.append(read_record(directory, entry))
+            except OSError:
+                pass  # segment rotated away
+    return records
+
+class DebugCapture:
+    def __init__(self, directory, segment_bytes=8 << 20, max_segments=8, queue_size=256, level=6):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.level = level
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        present = segments(directory)
+        self.segment = present[-1] if present else 0
+
+    def capture(self, key, tag, text):
+        """Queue one capture without touching disk; False if the queue was full."""
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._writer, daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait({"key": key, "tag": tag, "time": time.time(), "text": text})
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self):
+        """Block until everything queued so far is on disk."""
+        self._queue.join()
+
+    def _writer(self):
+        while True:
+            record = self._queue.get()
+            try:
+                self._append(record)
+            except OSError:
+                self.dropped += 1
+            finally:
+                self._queue.task_done()
+
+    @contextmanager
+    def _locked(self):
+        """Hold the directory's lock file; closing it releases the lock."""
+        with open(os.path.join(self.directory, LOCK_NAME), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def _append(self, record):
+        blob = zlib.compress(json.dumps(record).encode("utf-8"), self.level)
+        with self._locked():
+            # Another process may have rotated since this one last wrote
+            present = segments(self.directory)
+            if present and present[-1] > self.segment:
+                self.segment = present[-1]
+            path = segment_path(self.directory, self.segment)
+            if os.path.exists(path) and os.path.getsize(path) >= self.segment_bytes:
+                self._rotate()
+                path = segment_path(self.directory, self.segment)
+            with open(path, "ab") as f:
+                offset = f.tell()
+                f.write(blob)
+            with open(os.path.join(self.directory, INDEX_NAME), "a", encoding="utf-8") as f:
+                f.write(f"{record['key']}\t{record['tag']}\t{self.segment}\t{offset}\t{len(blob)}\t{record['time']:.3f}\n")
+
+    def _rotate(self):
+        """Start the next segment; called with the lock held."""
+        self.segment += 1
+        oldest_kept = self.segment - self.max_segments + 1
+        for segment in segments(self.directory):
+            if segment < oldest_kept:
+                os.remove(segment_path(self.directory, segment))
+        index = os.path.join(self.directory, INDEX_NAME)
+        kept = [e for e in read_index(self.directory) if e["segment"] >= oldest_kept]
+        with open(index + ".tmp", "w", encoding="utf-8") as f:
+            for e in kept:
+                f.write(f"{e['key']}\t{e['tag']}\t{e['segment']}\t{e['offset']}\t{e['length']}\t{e['time']:.3f}\n")
+        os.replace(index + ".tmp", index)
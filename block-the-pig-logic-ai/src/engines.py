@@ -0,0 +1,200 @@
+"""
+Wall engines and pig policies for offline play (self-play, benchmarks).
+
+An engine is built with make_engine(name, **options) and called as
+choose(pig, walls, opening_left) -> cell index or None, with positions as in
+board.py. opening_left > 0 means the pig will not move before that many more
+walls are down. A pig policy is called as policy(pig, walls, rng) -> cell
+index, or None when the pig cannot reach the border.
+
+Engines that search keep their last decision's Searcher.stats() in
+choose.stats ({} when no search ran); selfplay.play_game sums them per game.
+
+Spectra is not here: it needs the JVM per move and is measured through
+app.py (tools/benchmark.py, the fake backend) instead.
+"""
+from board import (
+    ESCAPE_MASK, INF, NEIGHBORS, NEIGHBOR_MASKS,
+    cell_index, cell_qr, escape_distance, expand, first_step, iter_bits, mask_to_walls, pig_steps,
+)
+import logic_ai
+import opening_book
+from positions import pig_reply
+import search
+import trap_optimizer
+
+def fallback_engine():
+    """app.fallback_move: block the pig's next step on its shortest path."""
+    def choose(pig, walls, opening_left=0):
+        dist, steps = pig_steps(pig, walls)
+        if dist == INF or dist == 0:
+            return None
+        return first_step(pig, steps)
+    return choose
+
+def greedy_engine():
+    """One-ply lookahead: the wall next to the pig that leaves the longest escape."""
+    def choose(pig, walls, opening_left=0):
+        dist, steps = pig_steps(pig, walls)
+        if dist == INF or dist == 0:
+            return None
+        best, best_key = None, None
+        for c in iter_bits(NEIGHBOR_MASKS[pig] & ~walls):
+            after, _ = pig_steps(pig, walls | 1 << c)
+            key = (after, bool(steps >> c & 1))
+            if best_key is None or key > best_key:
+                best, best_key = c, key
+        return best
+    return choose
+
+def search_engine(depth=search.DEFAULT_MAX_DEPTH, pig_model="random", evaluation="distance",
+                  quiescence=True, book=False):
+    """Expectimax from search.py; the opening walls are searched as a set, or
+    taken from the opening book when book=True and the position is covered."""
+    depth, quiescence, book = int(depth), _flag(quiescence), _flag(book)
+    opening = opening_book.load() if book else None
+    def choose(pig, walls, opening_left=0):
+        choose.stats = {}
+        if opening is not None and opening_left:
+            move = opening.lookup(walls, opening_left)
+            if move is not None:
+                return move
+        searcher = search.Searcher(pig_model, evaluation=evaluation, quiescence=quiescence)
+        move, _, _ = searcher.search(pig, walls, depth, free_walls=max(1, opening_left))
+        choose.stats = searcher.stats()
+        return move
+    choose.stats = {}
+    return choose
+
+def optimizer_engine(time_budget=1.0, depth=4):
+    """trap_optimizer's minimum-walls plan when it finds one in time, else search."""
+    geometry = trap_optimizer.game_geometry()
+    backup = search_engine(depth=depth)
+    def choose(pig, walls, opening_left=0):
+        result = trap_optimizer.minimum_walls(geometry, cell_qr(pig), [cell_qr(c) for c in iter_bits(walls)],
+                                              time_budget=float(time_budget))
+        choose.stats = {}
+        if result["move"] is not None:
+            return geometry.index[result["move"]]
+        move = backup(pig, walls, opening_left)
+        choose.stats = backup.stats
+        return move
+    choose.stats = {}
+    return choose
+
+def logic_ai_engine():
+    """logic_ai.find_best_move, the original selector."""
+    def choose(pig, walls, opening_left=0):
+        q, r = cell_qr(pig)
+        move, _ = logic_ai.find_best_move({"q": q, "r": r}, mask_to_walls(walls))
+        return None if move is None else cell_index(move["q"], move["r"])
+    return choose
+
+def minimax2_engine():
+    """The 2-ply minimax of tests/test_minimax.py: every free cell within two
+    steps of the pig, scored by the pig's distance after its reply."""
+    def choose(pig, walls, opening_left=0):
+        dist, _ = pig_steps(pig, walls)
+        if dist == INF or dist == 0:
+            return None
+        near = NEIGHBOR_MASKS[pig] & ~walls
+        best, best_score = None, None
+        for c in sorted(iter_bits((near | expand(near)) & ~walls & ~(1 << pig)), key=cell_qr):
+            after = walls | 1 << c
+            dist, steps = pig_steps(pig, after)
+            if dist == INF:
+                return c
+            reply = first_step(pig, steps)
+            if ESCAPE_MASK >> reply & 1:
+                score = -100
+            else:
+                score = escape_distance(reply, after)
+                score = 100 if score == INF else score
+            if best_score is None or score > best_score:
+                best, best_score = c, score
+        return best
+    return choose
+
+def heuristic_engine():
+    """The rule-based selector of tests/test_realistic.py: trap if one wall
+    can, else lengthen the escape path, else a 2-ply look near the pig."""
+    def choose(pig, walls, opening_left=0):
+        dist, _ = pig_steps(pig, walls)
+        if dist == INF or dist == 0:
+            return None
+        neighbors = [n for n in NEIGHBORS[pig] if not walls >> n & 1]
+        for c in neighbors:
+            if escape_distance(pig, walls | 1 << c) == INF:
+                return c
+        path = _escape_path(pig, walls)
+        for c in path:
+            if escape_distance(pig, walls | 1 << c) > dist:
+                return c
+        candidates = set(neighbors)
+        for n in neighbors:
+            candidates.update(iter_bits(NEIGHBOR_MASKS[n] & ~walls & ~(1 << pig)))
+        best, best_key = None, None
+        for c in sorted(candidates):
+            after = walls | 1 << c
+            new_dist, steps = pig_steps(pig, after)
+            if new_dist == INF:
+                return c
+            reply = first_step(pig, steps)
+            score = -100 if ESCAPE_MASK >> reply & 1 else escape_distance(reply, after)
+            key = (100 if score == INF else score, 2 if c in neighbors else 1 if c in path else 0)
+            if best_key is None or key > best_key:
+                best, best_key = c, key
+        return best if best is not None else (neighbors[0] if neighbors else None)
+    return choose
+
+def _escape_path(pig, walls):
+    """Cells of the Python pig's shortest escape, first step first."""
+    path = []
+    while not ESCAPE_MASK >> pig & 1:
+        dist, steps = pig_steps(pig, walls)
+        if dist == INF:
+            return []
+        pig = first_step(pig, steps)
+        path.append(pig)
+    return path
+
+ENGINES = {
+    "fallback": fallback_engine,
+    "greedy": greedy_engine,
+    "search": search_engine,
+    "optimizer": optimizer_engine,
+    "logic_ai": logic_ai_engine,
+    "minimax2": minimax2_engine,
+    "heuristic": heuristic_engine,
+}
+
+def make_engine(name, **options):
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine: {name} (choose from {', '.join(ENGINES)})")
+    return ENGINES[name](**options)
+
+def parse_spec(spec):
+    """'search:depth=4,pig_model=random' -> ('search', {'depth': '4', 'pig_model': 'random'})"""
+    name, _, rest = spec.partition(":")
+    options = dict(pair.partition("=")[::2] for pair in rest.split(",") if pair)
+    return name, options
+
+def from_spec(spec):
+    name, options = parse_spec(spec)
+    return make_engine(name, **options)
+
+def random_pig(pig, walls, rng):
+    """game.js pigTurn: a shortest step, picked at random when several tie."""
+    return pig_reply(pig, walls, rng)
+
+def deterministic_pig(pig, walls, rng=None):
+    """The Python pig: first shortest step in get_neighbors order."""
+    return pig_reply(pig, walls)
+
+PIG_POLICIES = {
+    "random": random_pig,
+    "deterministic": deterministic_pig,
+}
+
+def _flag(value):
+    return value if isinstance(value, bool) else str(value).lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,189 @@
+"""
+Fixed-width binary game records.
+
+A record file is the 8-byte magic b"BTPPLY01" followed by one 24-byte record
+per ply (little-endian):
+
+    walls       uint64  wall mask before the move (55 bits used)
+    game        uint32  game id
+    latency_us  uint32  time the engine took for the move
+    ply         uint16  ply number within the game
+    pig         uint8   pig cell index before the move
+    move        uint8   wall cell placed (NO_MOVE if the engine had none)
+    engine      uint8   ENGINE_CODES value
+    flags       uint8   FLAG_* bits
+    (2 bytes padding)
+
+Files are only ever appended to. Each write also appends (game, first record,
+count) to a sidecar <path>.idx, so readers find a game without scanning;
+Reader rebuilds the index from the records if the sidecar is missing or
+behind. A writer killed mid-game can leave a torn record or a game without its
+last ply at the end of the file; the next Writer cuts those off and rewrites
+the sidecar before appending. Game ids are unique within a file: Writer
+refuses one that is already recorded, and next_game is the first id after
+every game in the file, for runs that append to an existing one. Reader maps
+the file with mmap; as_array() gives a zero-copy NumPy structured array when
+NumPy is installed.
+"""
+import mmap
+import os
+import struct
+
+MAGIC = b"BTPPLY01"
+RECORD = struct.Struct("<QIIHBBBB2x")
+INDEX_ENTRY = struct.Struct("<III")
+NO_MOVE = 255
+
+FLAG_LAST = 1       # last ply of the game
+FLAG_WON = 2        # the game was won (set on every ply of a won game)
+FLAG_PIG_MOVED = 4  # the pig replied to this move (not an opening wall)
+
+ENGINE_CODES = {"unknown": 0, "book": 1, "spectra": 2, "search": 3, "fallback": 4,
+                "greedy": 5, "optimizer": 6, "logic_ai": 7, "minimax2": 8, "heuristic": 9}
+ENGINE_NAMES = {code: name for name, code in ENGINE_CODES.items()}
+
+NUMPY_DTYPE = [("walls", "<u8"), ("game", "<u4"), ("latency_us", "<u4"), ("ply", "<u2"),
+               ("pig", "u1"), ("move", "u1"), ("engine", "u1"), ("flags", "u1"), ("pad", "V2")]
+
+class Writer:
+    def __init__(self, path):
+        self.path = path
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        games = {}
+        if not new:
+            _cut_unfinished(path)
+            with Reader(path) as r:
+                games = r.games
+        self.f = open(path, "ab")
+        self.index = open(path + ".idx", "ab")
+        self.index.truncate(0)
+        if new:
+            self.f.write(MAGIC)
+        for game, (first, count) in sorted(games.items(), key=lambda g: g[1]):
+            self.index.write(INDEX_ENTRY.pack(game, first, count))
+        self.count = (self.f.tell() - len(MAGIC)) // RECORD.size
+        self.games = set(games)
+
+    @property
+    def next_game(self):
+        return max(self.games) + 1 if self.games else 0
+
+    def write_game(self, game, won, plies):
+        """plies: (walls, pig, move, engine name, latency ms, pig moved) in order."""
+        if game in self.games:
+            raise ValueError(f"{self.path}: game {game} is already recorded")
+        buf = bytearray()
+        won_flag = FLAG_WON if won else 0
+        for i, (walls, pig, move, engine, latency_ms, pig_moved) in enumerate(plies):
+            flags = won_flag | (FLAG_LAST if i == len(plies) - 1 else 0) | (FLAG_PIG_MOVED if pig_moved else 0)
+            buf += RECORD.pack(walls, game, min(int(latency_ms * 1000), 0xFFFFFFFF), i, pig,
+                               NO_MOVE if move is None else move, ENGINE_CODES.get(engine, 0), flags)
+        self.f.write(buf)
+        self.index.write(INDEX_ENTRY.pack(game, self.count, len(plies)))
+        self.count += len(plies)
+        self.games.add(game)
+
+    def flush(self):
+        self.f.flush()
+        self.index.flush()
+
+    def close(self):
+        self.f.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _cut_unfinished(path):
+    """Truncate path after the last whole record that ends a game."""
+    with open(path, "r+b") as f:
+        size = os.fstat(f.fileno()).st_size
+        end = len(MAGIC) + max(size - len(MAGIC), 0) // RECORD.size * RECORD.size
+        while end > len(MAGIC):
+            f.seek(end - RECORD.size)
+            if RECORD.unpack(f.read(RECORD.size))[-1] & FLAG_LAST:
+                break
+            end -= RECORD.size
+        if end < size:
+            f.truncate(end)
+
+def write_selfplay(writer, game, record, engine):
+    """Append a selfplay.play_game record."""
+    pig, walls = record["start_pig"], record["start_walls"]
+    plies = []
+    for wall, reply, ms in record["plies"]:
+        plies.append((walls, pig, wall, engine, ms, reply is not None))
+        if wall is not None:
+            walls |= 1 << wall
+        if reply is not None:
+            pig = reply
+    writer.write_game(game, record["won"], plies)
+
+class Reader:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < len(MAGIC):
+            raise ValueError(f"{path}: not a game record file")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}: not a game record file")
+        self.count = (size - len(MAGIC)) // RECORD.size
+        self.games = self._load_index()
+
+    def _load_index(self):
+        """{game id: (first record, count)}, from the sidecar when it covers the file."""
+        games, covered = {}, 0
+        try:
+            with open(self.path + ".idx", "rb") as f:
+                for game, first, count in INDEX_ENTRY.iter_unpack(f.read()):
+                    games[game] = (first, count)
+                    covered = max(covered, first + count)
+        except (FileNotFoundError, struct.error):
+            games, covered = {}, 0
+        if covered == self.count:
+            return games
+        games = {}
+        for i in range(self.count):
+            game = RECORD.unpack_from(self._map, len(MAGIC) + i * RECORD.size)[1]
+            first, count = games.get(game, (i, 0))
+            games[game] = (first, count + 1)
+        return games
+
+    def __len__(self):
+        return self.count
+
+    def ply(self, i):
+        walls, game, latency_us, ply, pig, move, engine, flags = RECORD.unpack_from(
+            self._map, len(MAGIC) + i * RECORD.size)
+        return {"walls": walls, "game": game, "latency_ms": latency_us / 1000, "ply": ply, "pig": pig,
+                "move": None if move == NO_MOVE else move, "engine": ENGINE_NAMES.get(engine, "unknown"),
+                "flags": flags}
+
+    def game(self, game):
+        """Plies of one game, in order."""
+        first, count = self.games[game]
+        return [self.ply(i) for i in range(first, first + count)]
+
+    def iter_raw(self):
+        """Unpacked record tuples for the whole file, without building dicts."""
+        return RECORD.iter_unpack(memoryview(self._map)[len(MAGIC):len(MAGIC) + self.count * RECORD.size])
+
+    def as_array(self):
+        """NumPy structured array over the mapped records (no copy)."""
+        import numpy as np
+        return np.frombuffer(self._map, dtype=np.dtype(NUMPY_DTYPE), count=self.count, offset=len(MAGIC))
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,182 @@
+"""
+Process-local counters and histograms, rendered in the Prometheus text format.
+
+Recording is cheap and takes no lock: every thread updates its own shard (a
+plain dict keyed by label values) and render() sums the shards. Only the first
+update from a new thread takes the metric's lock to register its shard; it
+also folds the shards of finished threads (Flask serves each request on a new
+thread) into one, as does every read, so the list of shards stays as long as
+the number of live threads. Values read while a thread is mid-update may be
+one event behind, which is fine for monitoring.
+"""
+import bisect
+import threading
+
+# Seconds; Spectra candidates run from ~1s up to SPECTRA_TIMEOUT_SECONDS
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 45, 90)
+# Search nodes and BFS calls per move
+COUNT_BUCKETS = (10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._shards = []    # (thread, shard) for threads that have recorded
+        self._retired = {}   # merged shards of finished threads
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._fold_finished()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _fold_finished(self):
+        """Merge the shards of finished threads into _retired; call with _lock held."""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._merge(self._retired, shard)
+        self._shards = live
+
+    def _merged(self):
+        """One shard with every thread's values."""
+        with self._lock:
+            self._fold_finished()
+            live = list(self._shards)
+            merged = {}
+            self._merge(merged, self._retired)
+        for _, shard in live:
+            self._merge(merged, shard)
+        return merged
+
+    def _labels(self, values):
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+        return tuple(str(v) for v in values)
+
+    def _format_labels(self, values, extra=()):
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in pairs) + "}"
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        key = self._labels(labels)
+        shard = self._shard()
+        shard[key] = shard.get(key, 0) + amount
+
+    def _merge(self, into, shard):
+        for key, value in list(shard.items()):
+            into[key] = into.get(key, 0) + value
+
+    def values(self):
+        """{label values: total} over all threads."""
+        return self._merged()
+
+    def _samples(self):
+        return [f"{self.name}{self._format_labels(k)} {v}" for k, v in sorted(self.values().items())]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        key = self._labels(labels)
+        shard = self._shard()
+        cell = shard.get(key)
+        if cell is None:
+            # per-bucket counts (last one is +Inf), then sum
+            cell = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def _merge(self, into, shard):
+        for key, cell in list(shard.items()):
+            total = into.setdefault(key, [0] * len(cell))
+            for i, v in enumerate(list(cell)):
+                total[i] += v
+
+    def values(self):
+        """{label values: (cumulative bucket counts, sum, count)} over all threads."""
+        result = {}
+        for key, cell in self._merged().items():
+            cumulative, running = [], 0
+            for c in cell[:-1]:
+                running += c
+                cumulative.append(running)
+            result[key] = (cumulative, cell[-1], running)
+        return result
+
+    def _samples(self):
+        lines = []
+        for key, (cumulative, total, count) in sorted(self.values().items()):
+            for bound, c in zip(self.buckets + ("+Inf",), cumulative):
+                lines.append(f"{self.name}_bucket{self._format_labels(key, [('le', bound)])} {c}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {count}")
+        return lines
+
+class Callback(Metric):
+    """A value owned elsewhere (e.g. a cache's eviction count), read at scrape time."""
+
+    def __init__(self, name, help, kind, read):
+        super().__init__(name, help)
+        self.kind = kind
+        self.read = read
+
+    def _samples(self):
+        return [f"{self.name} {self.read()}"]
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"metric {metric.name} already registered")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, kind, read):
+        return self._add(Callback(name, help, kind, read))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,241 @@
+"""
+Move cache with single-flight computation.
+
+Lookups go to an in-process LRU, then to an optional directory shared by all
+worker processes (one JSON file per board key). A miss is computed once: in
+this process later callers for the same key wait on the first caller's
+future, and other processes wait on a lock file in the shared directory until
+the result file appears. The computing process touches its lock every
+lock_timeout / 4, so a lock older than lock_timeout was left behind by a dead
+process; a waiter takes it over by renaming it away, which only one waiter
+can do, and checks that what it renamed is the stale lock it looked at.
+
+The directory holds about disk_entries results, each for at most max_age
+seconds. Pruning lists the whole directory, so it runs on a background thread
+after this process's first write and then every prune_every writes; it drops
+expired files, then the oldest past the cap. Between prunes each process can
+add up to prune_every files over the cap.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+MEMORY = "memory"        # hit in this process
+DISK = "disk"            # hit in the shared directory
+JOINED = "joined"        # waited for another request's computation
+COMPUTED = "computed"    # computed by this call
+
+class MoveCache:
+    def __init__(self, directory=None, max_entries=10_000, lock_timeout=120.0, poll_interval=0.05,
+                 disk_entries=100_000, max_age=None, prune_every=1000):
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_entries = max_entries
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.disk_entries = disk_entries
+        self.max_age = max_age
+        self.prune_every = prune_every
+        self._writes = 0
+        self._pruner = None   # the running or last prune thread
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def _remember(self, key, move):
+        with self._lock:
+            self._entries[key] = move
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key, ".json")
+        try:
+            if self.max_age is not None and time.time() - os.path.getmtime(path) > self.max_age:
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)["move"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key, move):
+        tmp = self._path(key, f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"move": move}, f)
+        os.replace(tmp, self._path(key, ".json"))
+        with self._lock:
+            due = self._writes % self.prune_every == 0 and not (self._pruner and self._pruner.is_alive())
+            self._writes += 1
+            if due:
+                self._pruner = threading.Thread(target=self._prune_disk, daemon=True)
+                self._pruner.start()
+
+    def _prune_disk(self):
+        """Drop expired results, then the oldest ones past disk_entries."""
+        now = time.time()
+        files = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    files.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    continue
+        files.sort()
+        excess = len(files) - self.disk_entries if self.disk_entries is not None else 0
+        for i, (mtime, path) in enumerate(files):
+            if i >= excess and (self.max_age is None or now - mtime <= self.max_age):
+                break
+            try:
+                os.remove(path)
+                self.disk_evictions += 1
+            except OSError:
+                pass
+
+    def get(self, key):
+        """Cached move or None; disk hits are promoted to memory."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        move = self._read_disk(key)
+        if move is not None:
+            self._remember(key, move)
+        return move
+
+    def put(self, key, move):
+        self._remember(key, move)
+        if self.directory:
+            self._write_disk(key, move)
+
+    def get_or_compute(self, key, compute, timeout=None):
+        """(move, source). compute() runs at most once per key across callers;
+        its exception is raised in every caller waiting on it and nothing is cached.
+        timeout bounds the wait for someone else's computation (TimeoutError)."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key], MEMORY
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            try:
+                return future.result(timeout), JOINED
+            except FutureTimeout:
+                raise TimeoutError(f"waited {timeout:.1f}s for an identical request") from None
+
+        # The key leaves _inflight before waiters wake, so a waiter that retries
+        # after a failure starts a new computation instead of rejoining this one
+        try:
+            move, source = self._compute_shared(key, compute, timeout)
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._inflight[key]
+        future.set_result(move)
+        return move, source
+
+    def _compute_shared(self, key, compute, timeout=None):
+        """Leader in this process: coordinate with other processes through the lock file."""
+        if not self.directory:
+            move = compute()
+            self._remember(key, move)
+            return move, COMPUTED
+        lock = self._path(key, ".lock")
+        waited = False
+        give_up = None if timeout is None else time.monotonic() + timeout
+        while True:
+            move = self.get(key)
+            if move is not None:
+                return move, JOINED if waited else DISK
+            try:
+                fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if self._take_over_stale(lock):
+                    continue
+                waited = True
+                if give_up is not None and time.monotonic() > give_up:
+                    raise TimeoutError(f"waited {timeout:.1f}s for another process")
+                time.sleep(self.poll_interval)
+                continue
+            inode = os.fstat(fd).st_ino
+            os.close(fd)
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=self._heartbeat, args=(lock, inode, stop), daemon=True)
+            heartbeat.start()
+            try:
+                # Another process may have finished between our read and the lock
+                move = self._read_disk(key)
+                if move is not None:
+                    self._remember(key, move)
+                    return move, DISK
+                move = compute()
+                self.put(key, move)
+                return move, COMPUTED
+            finally:
+                stop.set()
+                heartbeat.join()
+                try:
+                    if os.stat(lock).st_ino == inode:   # still ours
+                        os.remove(lock)
+                except OSError:
+                    pass
+
+    def _heartbeat(self, lock, inode, stop):
+        """Keep our lock's mtime fresh while compute() runs."""
+        while not stop.wait(self.lock_timeout / 4):
+            try:
+                if os.stat(lock).st_ino != inode:
+                    return
+                os.utime(lock)
+            except OSError:
+                return
+
+    def _take_over_stale(self, lock):
+        """Remove lock if it is stale; True when the caller should retry at once."""
+        try:
+            st = os.stat(lock)
+        except OSError:
+            return True   # released meanwhile
+        if time.time() - st.st_mtime <= self.lock_timeout:
+            return False
+        grave = f"{lock}.{os.getpid()}.{threading.get_ident()}.stale"
+        try:
+            os.rename(lock, grave)
+        except OSError:
+            return True   # another waiter took it over first
+        try:
+            if os.stat(grave).st_ino != st.st_ino:
+                # A waiter replaced the stale lock after our stat: put the live one back
+                try:
+                    os.link(grave, lock)
+                except OSError:
+                    pass
+        finally:
+            os.remove(grave)
+        return True
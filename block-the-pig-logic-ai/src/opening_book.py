@@ -0,0 +1,116 @@
+"""
+Opening book for the three free walls game.js gives the player before the pig
+moves (phase 'OPENING').
+
+The pig stays on PIG_START for the whole opening, so a position is keyed by
+the walls inside its 2-ring (18 cells) and the number of opening walls still
+to place. Entries are computed offline by tools/build_opening_book.py for
+every ring layout up to a few random walls, with walls outside the ring
+absent. The builder then re-checks each move on boards with random resetGame
+walls outside the ring and sets OUTER_OK when it held on all of them; lookup
+answers a board with outer walls only from such entries, so serving a move
+never takes a search. Keys are canonical under the board's one symmetry, the
+vertical flip r -> ROW_MAX - r, which fixes the pig's start cell.
+
+File layout (little endian): MAGIC, uint32 count, count sorted uint32 keys,
+count uint8 moves (cell index, | OUTER_OK).
+"""
+import os
+import struct
+from array import array
+from bisect import bisect_left
+
+from board import (
+    PIG_START, ROW_MAX, NUM_CELLS, NEIGHBOR_MASKS,
+    cell_index, cell_qr, expand, iter_bits,
+)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+OPENING_BOOK_PATH = os.path.join(PROJECT_ROOT, "data", "opening_book.bin")
+
+MAGIC = b"BTPBOOK1"
+
+OPENING_WALLS = 3
+
+# Move byte flag: the move also held with walls outside the 2-ring
+OUTER_OK = 0x80
+
+START = cell_index(*PIG_START)
+WINDOW_CELLS = tuple(iter_bits(expand(NEIGHBOR_MASKS[START]) & ~(1 << START)))
+WINDOW_MASK = sum(1 << c for c in WINDOW_CELLS)
+
+def _flip(idx):
+    q, r = cell_qr(idx)
+    return cell_index(q, ROW_MAX - r)
+
+FLIP = tuple(_flip(i) for i in range(NUM_CELLS))
+
+def flip_mask(mask):
+    out = 0
+    for c in iter_bits(mask):
+        out |= 1 << FLIP[c]
+    return out
+
+def pattern(walls):
+    """Window walls as an 18-bit pattern, bit i = WINDOW_CELLS[i]."""
+    p = 0
+    for i, c in enumerate(WINDOW_CELLS):
+        if walls >> c & 1:
+            p |= 1 << i
+    return p
+
+def canonical_key(walls, left):
+    """(key, flipped): flipped means moves for this key are stored mirrored."""
+    plain, mirrored = pattern(walls), pattern(flip_mask(walls))
+    flipped = mirrored < plain
+    return min(plain, mirrored) | left << len(WINDOW_CELLS), flipped
+
+def save(path, entries):
+    """entries: {key: cell index, | OUTER_OK when confirmed with outer walls}."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    keys = sorted(entries)
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(keys)))
+        f.write(struct.pack(f"<{len(keys)}I", *keys))
+        f.write(bytes(entries[k] for k in keys))
+
+class OpeningBook:
+    def __init__(self, keys, moves):
+        self.keys = keys
+        self.moves = moves
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, walls, left):
+        """Book wall (cell index) for the pig on its start cell, or None."""
+        key, flipped = canonical_key(walls, left)
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return None
+        move = self.moves[i]
+        if walls & ~WINDOW_MASK and not move & OUTER_OK:
+            return None
+        move &= ~OUTER_OK
+        if flipped:
+            move = FLIP[move]
+        if walls >> move & 1:
+            return None
+        return move
+
+def load(path=OPENING_BOOK_PATH):
+    """OpeningBook from disk, or None if the book has not been built."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        blob = f.read()
+    if blob[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"Not an opening book: {path}")
+    pos = len(MAGIC)
+    (count,) = struct.unpack_from("<I", blob, pos)
+    pos += 4
+    keys = array("I")
+    keys.frombytes(blob[pos:pos + 4 * count])
+    pos += 4 * count
+    return OpeningBook(keys, blob[pos:pos + count])
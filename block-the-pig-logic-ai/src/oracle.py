@@ -0,0 +1,184 @@
+"""
+Brute-force move oracle for judging engines.
+
+Unlike the engines, the oracle tries every free cell on the board, not just
+cells near the pig, and lets the pig take any of its shortest steps, assuming
+the one worst for the wall player, so its answer holds whatever game.js's
+random pig rolls.
+
+    one_ply  the walls that leave the pig the longest escape (INF when the
+             wall traps it): find_TRUE_optimal from the legacy tests
+    k_ply    exact minimax over k walls with the pig's replies in between,
+             scored as search.py scores: trapped WIN - walls, escaped
+             -WIN + walls, otherwise the escape distance after the k-th wall
+
+Both return (value, mask of every wall that reaches it); a move agrees with
+the oracle when its bit is in the mask. Positions are (pig, walls) as in
+board.py, with the pig inside the board and able to escape.
+
+solve() answers many positions at once: each worker takes BATCH_SIZE positions
+and runs the same minimax a tree level at a time with corpus.py's NumPy
+kernels, merging transpositions within the level. Answers are kept in a lookup
+file, a structured .npy sorted by position key, read with Answers.
+"""
+import os
+from multiprocessing import Pool
+
+import numpy as np
+
+import corpus
+from board import ESCAPE_MASK, FULL_MASK, INF, NUM_CELLS, escape_distance, iter_bits, pig_steps
+from search import WIN, WIN_THRESHOLD, escaped_score, trapped_score
+
+DEFAULT_PLIES = 2
+BATCH_SIZE = 64
+ANSWERS_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "oracle", "answers.npy"))
+
+# Answer files: one row per position, sorted by key. A one-ply value of
+# ONE_PLY_TRAPPED means the best wall traps the pig.
+ANSWER_DTYPE = np.dtype([("key", "<u8"), ("plies", "u1"), ("one_value", "<i2"), ("one_moves", "<u8"),
+                         ("k_value", "<i2"), ("k_moves", "<u8")])
+ONE_PLY_TRAPPED = np.iinfo(np.int16).max
+_NO_WALL = -WIN - 1   # below any reachable score
+_CELL_BITS = np.uint64(1) << np.arange(NUM_CELLS, dtype=np.uint64)
+
+def one_ply(pig, walls):
+    best, moves = None, 0
+    for c in iter_bits(FULL_MASK & ~walls & ~(1 << pig)):
+        value = escape_distance(pig, walls | 1 << c)
+        if best is None or value > best:
+            best, moves = value, 1 << c
+        elif value == best:
+            moves |= 1 << c
+    return best, moves
+
+def k_ply(pig, walls, k=DEFAULT_PLIES):
+    return _walls_turn(pig, walls, k, {}, root=True)
+
+def _walls_turn(pig, walls, k, memo, root=False):
+    key = (pig, walls, k)
+    if not root and key in memo:
+        return memo[key]
+    best, moves = None, 0
+    for c in iter_bits(FULL_MASK & ~walls & ~(1 << pig)):
+        value = _pig_turn(pig, walls | 1 << c, k - 1, memo)
+        if best is None or value > best:
+            best, moves = value, 1 << c
+        elif value == best:
+            moves |= 1 << c
+    if best is None:   # board full
+        best = escaped_score(walls)
+    memo[key] = best
+    return (best, moves) if root else best
+
+def _pig_turn(pig, walls, k, memo):
+    dist, steps = pig_steps(pig, walls)
+    if dist == INF:
+        return trapped_score(walls)
+    if k == 0:
+        return dist
+    worst = None
+    for step in iter_bits(steps):
+        if ESCAPE_MASK >> step & 1:
+            value = escaped_score(walls)
+        else:
+            value = _walls_turn(step, walls, k, memo)
+        if worst is None or value < worst:
+            worst = value
+    return worst
+
+# Batches
+def position_key(pig, walls):
+    return walls << 6 | pig
+
+def wall_values(pigs, walls, k):
+    """_walls_turn for arrays of wall-turn nodes with k walls left, a whole
+    tree level at a time: (values, masks of the walls reaching them)."""
+    free = np.uint64(FULL_MASK) & ~walls & ~(np.uint64(1) << pigs.astype(np.uint64))
+    node, cell = np.nonzero((free[:, None] & _CELL_BITS) != 0)
+    after = walls[node] | _CELL_BITS[cell]
+    dist, steps = corpus.pig_steps(pigs[node], after)
+    trapped = dist == corpus.TRAPPED
+    # Edge values: the pig's turn after each wall
+    value = np.where(trapped, WIN - corpus.popcount(after), dist).astype(np.int32)
+    if k > 1:
+        cand = corpus.NEIGHBOR_TABLE[pigs[node]]
+        is_step = (cand >= 0) & (((steps[:, None] >> np.maximum(cand, 0).astype(np.uint64)) & np.uint64(1)) == 1)
+        edge, slot = np.nonzero(is_step & ~trapped[:, None])
+        child_pig, child_walls = cand[edge, slot], after[edge]
+        child_value = (-WIN + corpus.popcount(child_walls)).astype(np.int32)   # pig escapes
+        inner = (np.uint64(ESCAPE_MASK) & _CELL_BITS[child_pig]) == 0
+        keys = child_walls[inner] << np.uint64(6) | child_pig[inner].astype(np.uint64)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        sub, _ = wall_values((unique & np.uint64(0x3F)).astype(np.int64), unique >> np.uint64(6), k - 1)
+        child_value[inner] = sub[inverse.ravel()]
+        value[~trapped] = WIN
+        np.minimum.at(value, edge, child_value)
+    best = np.full(len(pigs), _NO_WALL, dtype=np.int32)
+    np.maximum.at(best, node, value)
+    hit = value == best[node]
+    moves = np.zeros(len(pigs), dtype=np.uint64)
+    np.bitwise_or.at(moves, node[hit], _CELL_BITS[cell[hit]])
+    full = best == _NO_WALL   # no free cell: the pig walks out
+    best[full] = -WIN + corpus.popcount(walls[full])
+    return best, moves
+
+def solve_batch(positions, plies=DEFAULT_PLIES):
+    """Answer rows (ANSWER_DTYPE) for a list of (pig, walls)."""
+    pigs = np.array([p for p, _ in positions], dtype=np.int64)
+    walls = np.array([w for _, w in positions], dtype=np.uint64)
+    one_best, one_moves = wall_values(pigs, walls, 1)
+    rows = np.zeros(len(positions), dtype=ANSWER_DTYPE)
+    rows["key"] = walls << np.uint64(6) | pigs.astype(np.uint64)
+    rows["plies"] = plies
+    rows["one_value"] = np.where(one_best > WIN_THRESHOLD, ONE_PLY_TRAPPED, one_best)
+    rows["one_moves"] = one_moves
+    rows["k_value"], rows["k_moves"] = (one_best, one_moves) if plies == 1 else wall_values(pigs, walls, plies)
+    return rows
+
+def _solve_job(job):
+    return solve_batch(*job)
+
+def solve(positions, plies=DEFAULT_PLIES, workers=None, batch_size=BATCH_SIZE):
+    """Answer rows for every position, BATCH_SIZE positions per pool task."""
+    jobs = [(positions[i:i + batch_size], plies) for i in range(0, len(positions), batch_size)]
+    if workers == 1:
+        parts = [_solve_job(job) for job in jobs]
+    else:
+        with Pool(workers) as pool:
+            parts = pool.map(_solve_job, jobs)
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=ANSWER_DTYPE)
+
+# Answer files
+def save_answers(rows, path=ANSWERS_PATH):
+    """Merge rows into the answer file; a position keeps its deepest answer."""
+    if os.path.exists(path):
+        rows = np.concatenate([np.load(path), rows])
+    rows = rows[np.lexsort((-rows["plies"].astype(np.int64), rows["key"]))]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = rows["key"][1:] != rows["key"][:-1]
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.save(path, rows[first])
+    return int(first.sum())
+
+class Answers:
+    """Lookups in an answer file."""
+    def __init__(self, path=ANSWERS_PATH):
+        self.rows = np.load(path, mmap_mode="r")
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, pig, walls):
+        """(one_ply value, one-ply moves, plies, k_ply value, k-ply moves), or None."""
+        key = np.uint64(position_key(pig, walls))
+        i = int(np.searchsorted(self.rows["key"], key))
+        if i == len(self.rows) or self.rows["key"][i] != key:
+            return None
+        row = self.rows[i]
+        one = INF if row["one_value"] == ONE_PLY_TRAPPED else int(row["one_value"])
+        return one, int(row["one_moves"]), int(row["plies"]), int(row["k_value"]), int(row["k_moves"])
+
+    def positions(self, limit=None):
+        keys = self.rows["key"][:limit]
+        return corpus.to_positions(keys & np.uint64(0x3F), keys >> np.uint64(6))
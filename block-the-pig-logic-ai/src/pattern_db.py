@@ -0,0 +1,187 @@
+"""
+Pattern database over the 18 cells around the pig (its 1-ring and 2-ring).
+
+For every interior pig cell the ring cells fall on the board in one of a few
+ways (off-board / escape / interior), which gives the edge-and-parity classes.
+Each class stores one byte per wall pattern of its on-board ring cells:
+
+    bits 0-2  cut   minimum extra walls that would seal the pig inside the ring
+    bits 3-5  exit  local steps to leave the ring (0 = already sealed)
+
+Both values are exact for the local graph. The table is built offline with
+tools/build_pattern_db.py and looked up in O(1) by the search evaluation.
+"""
+import os
+import struct
+
+from board import (
+    NUM_CELLS, ESCAPE_MASK,
+    cell_index, cell_qr, is_valid, is_escape,
+)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PATTERN_DB_PATH = os.path.join(PROJECT_ROOT, "data", "pattern_db.bin")
+
+MAGIC = b"BTPPDB01"
+
+OFF_BOARD, ESCAPE, INTERIOR = 0, 1, 2
+
+# Cube (x, z) directions; ring order only has to be fixed, not match get_neighbors
+_DIRS = [(1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1)]
+
+def _to_cube(q, r):
+    return q - (r - (r & 1)) // 2, r
+
+def _to_offset(x, z):
+    return x + (z - (z & 1)) // 2, z
+
+def _ring_cube(x, z):
+    """Cube coords of the 6 ring-1 cells then the 12 ring-2 cells, in a fixed direction order."""
+    ring = [(x + dx, z + dz) for dx, dz in _DIRS]
+    for i, (dx, dz) in enumerate(_DIRS):
+        ex, ez = _DIRS[(i + 1) % 6]
+        ring.append((x + 2 * dx, z + 2 * dz))
+        ring.append((x + dx + ex, z + dz + ez))
+    return ring
+
+def ring_cells(q, r):
+    return [_to_offset(*c) for c in _ring_cube(*_to_cube(q, r))]
+
+def _status(q, r):
+    if not is_valid(q, r):
+        return OFF_BOARD
+    return ESCAPE if is_escape(q, r) else INTERIOR
+
+def _build_layout():
+    """Class signatures, and per interior pig cell: (class id, [board cell per pattern bit])."""
+    signatures = []
+    layout = {}
+    for i in range(NUM_CELLS):
+        if ESCAPE_MASK >> i & 1:
+            continue
+        ring = ring_cells(*cell_qr(i))
+        sig = tuple(_status(q, r) for q, r in ring)
+        if sig not in signatures:
+            signatures.append(sig)
+        cells = [cell_index(q, r) for q, r in ring if is_valid(q, r)]
+        layout[i] = (signatures.index(sig), cells)
+    return signatures, layout
+
+CLASS_SIGNATURES, PIG_LAYOUT = _build_layout()
+
+def _local_graph(signature):
+    """Local adjacency for a class: (pig_adj, adjacency per pattern bit, escape bits, outer bits)."""
+    # Ring geometry is translation invariant in cube space, so centre it on the origin
+    cube = _ring_cube(0, 0)
+    on_board = [j for j, s in enumerate(signature) if s != OFF_BOARD]
+    bit_of = {cube[j]: b for b, j in enumerate(on_board)}
+
+    adjacency = []
+    for j in on_board:
+        x, z = cube[j]
+        adj = 0
+        for dx, dz in _DIRS:
+            b = bit_of.get((x + dx, z + dz))
+            if b is not None:
+                adj |= 1 << b
+        adjacency.append(adj)
+    pig_adj = sum(1 << bit_of[c] for c in cube[:6])
+    escape = sum(1 << b for b, j in enumerate(on_board) if signature[j] == ESCAPE)
+    outer = sum(1 << b for b, j in enumerate(on_board) if j >= 6 and signature[j] == INTERIOR)
+    return pig_adj, adjacency, escape, outer
+
+def build_class(signature):
+    """Exact (cut, exit) byte for every wall pattern of one class."""
+    pig_adj, adjacency, escape, outer = _local_graph(signature)
+    k = len(adjacency)
+    size = 1 << k
+    full = size - 1
+    table = bytearray(size)
+    cut = bytearray(size)
+
+    for m in range(full, -1, -1):
+        free = full & ~m
+        frontier = pig_adj & free
+        seen = frontier
+        step = 1
+        exit_steps = 0
+        while frontier:
+            if frontier & escape:
+                exit_steps = step
+                break
+            if frontier & outer and not exit_steps:
+                # one more step leaves the ring; keep looking for a closer escape
+                exit_steps = step + 1
+            nxt = 0
+            f = frontier
+            while f:
+                low = f & -f
+                nxt |= adjacency[low.bit_length() - 1]
+                f ^= low
+            frontier = nxt & free & ~seen
+            seen |= frontier
+            step += 1
+            if exit_steps and step >= exit_steps:
+                break
+
+        if exit_steps:
+            best = 7
+            f = free
+            while f:
+                low = f & -f
+                c = cut[m | low]
+                if c < best:
+                    best = c
+                f ^= low
+            cut[m] = min(best + 1, 7)
+        table[m] = cut[m] | min(exit_steps, 7) << 3
+    return bytes(table)
+
+def save(path, tables):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(tables)))
+        for t in tables:
+            f.write(struct.pack("<I", len(t)))
+        for t in tables:
+            f.write(t)
+
+class PatternDB:
+    def __init__(self, data, offsets):
+        self.data = data
+        # Per pig cell: (table offset, ((board_bit, pattern_bit), ...))
+        self.by_pig = {}
+        for pig, (cls, cells) in PIG_LAYOUT.items():
+            self.by_pig[pig] = (offsets[cls], tuple((1 << c, 1 << b) for b, c in enumerate(cells)))
+
+    def lookup(self, pig, walls):
+        """(cut, exit) for the ring around an interior pig cell."""
+        offset, bits = self.by_pig[pig]
+        pattern = 0
+        for board_bit, pattern_bit in bits:
+            if walls & board_bit:
+                pattern |= pattern_bit
+        v = self.data[offset + pattern]
+        return v & 7, v >> 3
+
+def load(path=PATTERN_DB_PATH):
+    """PatternDB from disk, or None if the table has not been built."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        blob = f.read()
+    if blob[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"Not a pattern database: {path}")
+    pos = len(MAGIC)
+    (count,) = struct.unpack_from("<I", blob, pos)
+    pos += 4
+    sizes = struct.unpack_from(f"<{count}I", blob, pos)
+    pos += 4 * count
+    if count != len(CLASS_SIGNATURES):
+        raise ValueError(f"Pattern database has {count} classes, expected {len(CLASS_SIGNATURES)}")
+    offsets = []
+    for s in sizes:
+        offsets.append(pos)
+        pos += s
+    return PatternDB(blob, offsets)
@@ -0,0 +1,59 @@
+"""
+Seeded positions for benchmarks and self-play.
+
+start_position follows resetGame in static/game.js: 5-15 random walls anywhere
+except the pig's start cell. pig_reply follows pigTurn: a shortest step to the
+border, picked at random among the shortest steps (game.js shuffles
+neighbours), or the Python pig's fixed choice when no rng is given.
+Positions are (pig cell index, wall mask) as used by board.py and search.py.
+"""
+import random
+
+from board import INF, NUM_CELLS, NEIGHBOR_MASKS, PIG_START, cell_index, first_step, iter_bits, pig_steps
+
+START = cell_index(*PIG_START)
+
+def start_position(rng):
+    walls = 0
+    for _ in range(rng.randint(5, 15)):
+        while True:
+            c = rng.randrange(NUM_CELLS)
+            if c != START and not walls >> c & 1:
+                walls |= 1 << c
+                break
+    return START, walls
+
+def pig_reply(pig, walls, rng=None):
+    """Cell the pig moves to, or None if it cannot reach the border."""
+    dist, steps = pig_steps(pig, walls)
+    if dist == INF or dist == 0:
+        return None
+    if rng is None:
+        return first_step(pig, steps)
+    return rng.choice(list(iter_bits(steps)))
+
+def midgame_positions(seed, count, max_plies=8):
+    """count positions with the pig inside the board and able to escape: game
+    starts followed by up to max_plies random wall/pig move pairs."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        pig, walls = start_position(rng)
+        for _ in range(rng.randint(0, max_plies)):
+            free = NEIGHBOR_MASKS[pig] & ~walls
+            if not free:
+                break
+            walls |= 1 << rng.choice(list(iter_bits(free)))
+            nxt = pig_reply(pig, walls, rng)
+            if nxt is None:
+                break
+            pig = nxt
+        dist, _ = pig_steps(pig, walls)
+        if 0 < dist < INF:
+            positions.append((pig, walls))
+    return positions
+
+def start_positions(seed, count):
+    """count game starts (before the opening walls) from one seed."""
+    rng = random.Random(seed)
+    return [start_position(rng) for _ in range(count)]
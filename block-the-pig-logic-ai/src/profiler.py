@@ -0,0 +1,97 @@
+"""
+Sampling profiler for single requests.
+
+A Sampler started on a request thread wakes every interval seconds on a
+background thread and records that thread's Python stack
+(sys._current_frames); save() writes the counts as collapsed stacks, one
+"outer;...;inner count" line per distinct stack with frames as
+file.py:function, the input of flamegraph.pl and speedscope. Only the
+sampled thread is seen: Spectra runs show up as the wait on its subprocess.
+The sampler takes the GIL at every wake-up, so CPU-bound code runs measurably
+slower while profiled; compare a profile's proportions, not its timings.
+prune() keeps a profile directory to its newest files.
+
+Code that is not profiling gets NULL, whose context does nothing.
+"""
+import os
+import sys
+import threading
+import time
+
+INTERVAL = 0.001
+
+class Sampler:
+    enabled = True
+
+    def __init__(self, interval=INTERVAL, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks = {}   # (outer, ..., inner) -> samples
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack and self.thread_id != me:
+                key = tuple(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+                self.samples += 1
+
+    def collapsed(self):
+        return "".join(f"{';'.join(stack)} {n}\n" for stack, n in sorted(self.stacks.items()))
+
+    def save(self, directory, key):
+        """Write <key>-<unix ms>.folded in directory; returns its path."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{key}-{int(time.time() * 1000)}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        return path
+
+def prune(directory, keep):
+    """Delete all but the newest keep .folded files in directory."""
+    try:
+        names = [n for n in os.listdir(directory) if n.endswith(".folded")]
+    except FileNotFoundError:
+        return
+    paths = sorted((os.path.join(directory, n) for n in names), key=_mtime, reverse=True)
+    for path in paths[keep:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+class NullSampler:
+    enabled = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL = NullSampler()
@@ -0,0 +1,505 @@
+"""
+Depth-limited game-tree search for the wall player.
+
+The pig can be modelled two ways:
+  - "deterministic": the pig takes the first shortest step in get_neighbors
+    order, exactly what bfs_escape_path returns (the Python model).
+  - "random": the pig is a chance node over every shortest first step, which
+    is what game.js does by shuffling neighbours before its BFS.
+
+Chance nodes are memoized in CHANCE_TABLES (shared across moves, iterations
+and requests) and pruned with Star1/Star2 bounds, so the random model stays
+affordable at the depths the deterministic search uses. A value whose subtree
+ran into the quiescence budget depends on how much of the budget was left, so
+it is only memoized for the rest of that search() call.
+
+Leaf evaluation is the pig's escape distance, or with evaluation="pattern"
+the distance refined by the local pattern database (pattern_db.py). The
+pattern evaluation is meant for shallow, low-latency searches.
+
+At the depth cutoff a quiescence search keeps following forcing lines (pig
+within two steps of an escape, or a single shortest step that one wall can
+close) under its own node budget, so a pig about to break out is not scored
+by its raw distance. That lets the main search run shallower. The budget is
+renewed for each iterative-deepening iteration, so a deeper iteration is not
+left with whatever the shallower ones did not spend, and quiescence checks
+the deadline as the main search does.
+
+Searcher.stats() reports what a search cost: nodes, BFS calls, chance-table
+probes and hits, beta cutoffs by the index of the move that caused them and
+Star1/Star2 cutoffs at chance nodes, the deepest ply reached (quiescence
+included), the effective branching factor between the last two iterations
+and each iteration's nodes, quiescence nodes and time. add_stats/merge_stats
+sum them over many moves and summarize_stats turns the sums into per-move
+rates.
+"""
+import time
+from itertools import combinations
+
+import pattern_db
+from board import (
+    INF, NUM_CELLS, NEIGHBORS, NEIGHBOR_MASKS,
+    cell_index, cell_qr, walls_to_mask, pig_steps, first_step, iter_bits, expand,
+)
+
+PIG_MODELS = ("deterministic", "random")
+EVALUATIONS = ("distance", "pattern")
+DEFAULT_MAX_DEPTH = 6
+
+# Quiescence: escape distance at or below which every wall is tried past the
+# cutoff, and the node allowance per iteration of search()
+QUIESCENCE_DISTANCE = 2
+QUIESCENCE_NODE_BUDGET = 20_000
+
+# Pattern evaluation: escape distance minus this many steps per wall still
+# needed to seal the pig's 2-ring
+PATTERN_CUT_WEIGHT = 0.5
+
+# Score range. Trapping with fewer walls on the board scores higher, escaping
+# later scores higher; depth-cutoff evaluations are escape distances.
+WIN = 1000
+WIN_THRESHOLD = WIN - NUM_CELLS
+
+MAX_TABLE_ENTRIES = 500_000
+
+# wall_candidates: at most the pig's six neighbours
+MAX_WALL_CANDIDATES = 6
+
+# (pig, walls) -> (draft, lower, upper) for chance nodes,
+# one table per (pig model, evaluation, quiescence)
+CHANCE_TABLES = {}
+
+_PATTERN_DB = []
+
+def get_pattern_db():
+    """The pattern database, loaded once; None if it has not been built."""
+    if not _PATTERN_DB:
+        _PATTERN_DB.append(pattern_db.load())
+    return _PATTERN_DB[0]
+
+class SearchTimeout(Exception):
+    """Raised inside the tree when the deadline passes; search() keeps the last full iteration."""
+
+def trapped_score(walls):
+    return WIN - walls.bit_count()
+
+def escaped_score(walls):
+    return -WIN + walls.bit_count()
+
+class Searcher:
+    def __init__(self, pig_model="deterministic", pruning=True, table=None, evaluation="distance",
+                 move_filter=None, quiescence=True):
+        if pig_model not in PIG_MODELS:
+            raise ValueError(f"Unknown pig model: {pig_model}")
+        if evaluation not in EVALUATIONS:
+            raise ValueError(f"Unknown evaluation: {evaluation}")
+        self.pig_model = pig_model
+        self.random_pig = pig_model == "random"
+        self.pruning = pruning
+        # strategy_rules.MoveFilter; its eliminations change values, so it gets its own table
+        self.move_filter = move_filter
+        self.pattern_db = get_pattern_db() if evaluation == "pattern" else None
+        # Without a built database the pattern evaluation degrades to distance
+        self.evaluation = evaluation if self.pattern_db else "distance"
+        self.quiescence = quiescence
+        if table is None:
+            table = {} if move_filter else CHANCE_TABLES.setdefault(
+                (pig_model, self.evaluation, quiescence), {})
+        self.table = table
+        # Chance nodes whose subtree hit QUIESCENCE_NODE_BUDGET, for this search() only
+        self.cut_table = {}
+        self.q_cuts = 0    # quiescence nodes scored flat because the budget was spent
+        self.nodes = 0
+        self.bfs_calls = 0
+        self.q_nodes = 0
+        self.q_start = 0   # q_nodes when the running iteration started, for its budget
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.cutoffs = [0] * MAX_WALL_CANDIDATES   # beta cutoffs by move index in max_node
+        self.star_cutoffs = 0                      # chance nodes cut short by Star1/Star2 bounds
+        self.depth = 0     # nominal depth of the running iteration
+        self.max_ply = 0   # deepest ply from the root reached, quiescence included
+        self.iterations = []
+        # Walls of the best root move: one wall, or the whole set with free_walls > 1
+        self.plan = ()
+        # time.monotonic() value after which search() stops deepening
+        self.deadline = None
+        self.timed_out = False
+
+    def steps(self, pig, walls):
+        self.bfs_calls += 1
+        return pig_steps(pig, walls)
+
+    def wall_candidates(self, pig, walls, steps):
+        """Free cells around the pig, shortest-path steps first."""
+        free = NEIGHBOR_MASKS[pig] & ~walls
+        first = [n for n in NEIGHBORS[pig] if steps >> n & 1]
+        rest = [n for n in NEIGHBORS[pig] if free >> n & 1 and not steps >> n & 1]
+        if self.move_filter is not None:
+            return self.move_filter.filter(pig, walls, first + rest)
+        return first + rest
+
+    def evaluate(self, pig, walls, dist):
+        """Depth-cutoff score for an interior pig with a finite escape distance."""
+        if self.pattern_db is None:
+            return dist
+        cut, _ = self.pattern_db.lookup(pig, walls)
+        return dist - PATTERN_CUT_WEIGHT * cut
+
+    def pig_replies(self, pig, steps):
+        if self.random_pig:
+            return list(iter_bits(steps))
+        return [first_step(pig, steps)]
+
+    def max_node(self, pig, walls, draft, alpha, beta, probe=False):
+        """Player to place a wall. probe=True only tries the first move (Star2)."""
+        self.nodes += 1
+        if self.deadline is not None and self.nodes & 1023 == 0 and time.monotonic() > self.deadline:
+            raise SearchTimeout()
+        dist, steps = self.steps(pig, walls)
+        if dist == INF:
+            return trapped_score(walls)
+        if draft <= 0:
+            if self.quiescence:
+                return self.quiesce(pig, walls, dist, steps, alpha, beta, draft)
+            if self.depth - draft > self.max_ply:
+                self.max_ply = self.depth - draft
+            return self.evaluate(pig, walls, dist)
+
+        best = -WIN
+        for i, m in enumerate(self.wall_candidates(pig, walls, steps)):
+            v = self.chance_node(pig, walls | 1 << m, draft - 1, alpha, beta)
+            if v > best:
+                best = v
+            if v > alpha:
+                alpha = v
+            if alpha >= beta:
+                self.cutoffs[i] += 1
+                break
+            if probe:
+                break
+        return best
+
+    def chance_node(self, pig, walls, draft, alpha, beta):
+        """Pig to move after a wall was placed."""
+        self.nodes += 1
+        key = (pig, walls)
+        entry = self.table.get(key)
+        if entry is None:
+            entry = self.cut_table.get(key)
+            if entry is not None:
+                # Whatever this entry feeds into is budget-dependent too
+                self.q_cuts += 1
+        self.tt_probes += 1
+        if entry is not None and entry[0] >= draft:
+            self.tt_hits += 1
+            _, lo, hi = entry
+            if lo >= beta:
+                return lo
+            if hi <= alpha or lo == hi:
+                return hi
+            alpha, beta = max(alpha, lo), min(beta, hi)
+
+        dist, steps = self.steps(pig, walls)
+        if dist == INF:
+            return trapped_score(walls)
+        if dist == 1:
+            return escaped_score(walls)
+        if draft <= 0:
+            if self.quiescence:
+                return self.quiesce_chance(pig, walls, dist, steps, alpha, beta, draft)
+            if self.depth - draft > self.max_ply:
+                self.max_ply = self.depth - draft
+            return self.evaluate(pig, walls, dist)
+
+        q_cuts = self.q_cuts
+        v = self.expect(self.pig_replies(pig, steps), walls, draft - 1, alpha, beta)
+
+        table = self.table if self.q_cuts == q_cuts else self.cut_table
+        if len(table) >= MAX_TABLE_ENTRIES:
+            table.clear()
+        if entry is not None and entry[0] > draft:
+            return v
+        lo, hi = -WIN, WIN
+        if entry is not None and entry[0] == draft:
+            lo, hi = entry[1], entry[2]
+        if v <= alpha:
+            hi = min(hi, v)
+        elif v >= beta:
+            lo = max(lo, v)
+        else:
+            lo = hi = v
+        table[key] = (draft, lo, hi)
+        return v
+
+    def expect(self, children, walls, draft, alpha, beta):
+        """Expected value over equally likely pig steps, Star1 + Star2 pruned."""
+        n = len(children)
+        if n == 1:
+            return self.max_node(children[0], walls, draft, alpha, beta)
+        p = 1.0 / n
+        if not self.pruning:
+            return p * sum(self.max_node(c, walls, draft, -WIN, WIN) for c in children)
+
+        # Star2: probe the first move of every successor for lower bounds
+        lower = [-WIN] * n
+        lower_sum = -WIN
+        if draft > 0:
+            for i, c in enumerate(children):
+                others = lower_sum - p * lower[i]
+                b = (beta - others) / p
+                v = self.max_node(c, walls, draft, lower[i], min(b, WIN), probe=True)
+                if v >= b:
+                    self.star_cutoffs += 1
+                    return others + p * v
+                if v > lower[i]:
+                    lower_sum += p * (v - lower[i])
+                    lower[i] = v
+            if lower_sum >= beta:
+                self.star_cutoffs += 1
+                return lower_sum
+
+        # Star1: full searches with windows derived from the remaining bounds
+        done = 0.0
+        rest_lower = lower_sum
+        rest_prob = 1.0
+        for i, c in enumerate(children):
+            rest_lower -= p * lower[i]
+            rest_prob -= p
+            a = (alpha - done - rest_prob * WIN) / p
+            b = (beta - done - rest_lower) / p
+            v = self.max_node(c, walls, draft, max(a, -WIN), min(b, WIN))
+            if v <= a or v >= b:
+                self.star_cutoffs += 1
+            if v <= a:
+                return done + p * v + rest_prob * WIN
+            if v >= b:
+                return done + p * v + rest_lower
+            done += p * v
+        return done
+
+    def quiesce(self, pig, walls, dist, steps, alpha, beta, draft=0):
+        """Player to move past the cutoff: only forcing lines are followed.
+        draft counts down from 0 past the cutoff, for max_ply."""
+        if self.depth - draft > self.max_ply:
+            self.max_ply = self.depth - draft
+        if self.q_nodes - self.q_start >= QUIESCENCE_NODE_BUDGET:
+            self.q_cuts += 1
+            return self.evaluate(pig, walls, dist)
+        if dist <= QUIESCENCE_DISTANCE:
+            # The pig is about to break out: no standing pat, every wall is tried
+            best = -WIN
+            moves = self.wall_candidates(pig, walls, steps)
+        elif steps & (steps - 1) == 0:
+            # One shortest step: closing it is the forcing move, anything else stands pat
+            best = self.evaluate(pig, walls, dist)
+            if best >= beta:
+                return best
+            moves = [steps.bit_length() - 1]
+        else:
+            return self.evaluate(pig, walls, dist)
+
+        for m in moves:
+            v = self.quiesce_chance(pig, walls | 1 << m, None, None, max(alpha, best), beta, draft - 1)
+            if v > best:
+                best = v
+            if best >= beta:
+                break
+        return best
+
+    def quiesce_chance(self, pig, walls, dist, steps, alpha, beta, draft=0):
+        """Pig to move past the cutoff. dist/steps may be passed in when already known."""
+        self.q_nodes += 1
+        if self.deadline is not None and self.q_nodes & 1023 == 0 and time.monotonic() > self.deadline:
+            raise SearchTimeout()
+        if self.depth - draft > self.max_ply:
+            self.max_ply = self.depth - draft
+        if steps is None:
+            self.nodes += 1
+            dist, steps = self.steps(pig, walls)
+        if dist == INF:
+            return trapped_score(walls)
+        if dist == 1:
+            return escaped_score(walls)
+        replies = self.pig_replies(pig, steps)
+        if len(replies) > 1:
+            alpha, beta = -WIN, WIN
+        total = 0.0
+        for c in replies:
+            self.nodes += 1
+            c_dist, c_steps = self.steps(c, walls)
+            total += self.quiesce(c, walls, c_dist, c_steps, alpha, beta, draft - 1)
+        return total / len(replies)
+
+    def opening_candidates(self, pig, walls, steps):
+        """Free cells within two steps of the pig, shortest-path steps first."""
+        near = self.wall_candidates(pig, walls, steps)
+        ring2 = expand(NEIGHBOR_MASKS[pig]) & ~NEIGHBOR_MASKS[pig] & ~walls & ~(1 << pig)
+        return near + [c for c in iter_bits(ring2) if c not in near]
+
+    def search(self, pig, walls, max_depth=DEFAULT_MAX_DEPTH, free_walls=1, deadline=None):
+        """
+        Iterative deepening from the root (player to move).
+        free_walls > 1 means that many walls go down before the pig moves (the
+        opening phase); they commute, so sets of walls are searched.
+        deadline (a time.monotonic() value) makes the search anytime: an
+        iteration cut short is dropped and the last completed one answers.
+        Returns (move_index, score, log); move_index is None if the game is over.
+        """
+        log = []
+        self.q_nodes = self.q_start = 0
+        self.cut_table = {}
+        self.iterations = []
+        self.deadline = deadline
+        self.timed_out = False
+        dist, steps = self.steps(pig, walls)
+        if dist == INF or dist == 0:
+            return None, (trapped_score(walls) if dist == INF else escaped_score(walls)), log
+
+        if free_walls > 1:
+            cells = self.opening_candidates(pig, walls, steps)
+            moves = list(combinations(cells, min(free_walls, len(cells))))
+        else:
+            moves = [(m,) for m in self.wall_candidates(pig, walls, steps)]
+        # Before any iteration completes, the move ordering is the answer
+        best_move, best_score = moves[0], dist
+        try:
+            for depth in range(2, max_depth + 1, 2):
+                if deadline is not None and time.monotonic() > deadline:
+                    raise SearchTimeout()
+                self.depth = depth
+                self.q_start = self.q_nodes
+                started, nodes, bfs_calls = time.perf_counter(), self.nodes, self.bfs_calls
+                self.iterations.append({"depth": depth})
+                alpha = -WIN
+                scored = []
+                for m in moves:
+                    after = walls
+                    for c in m:
+                        after |= 1 << c
+                    v = self.chance_node(pig, after, depth - 1, alpha, WIN)
+                    scored.append((v, m))
+                    if v > alpha:
+                        alpha = v
+                scored.sort(key=lambda x: -x[0])
+                best_score, best_move = scored[0]
+                moves = [m for _, m in scored]
+                log.append((depth, best_move[0], best_score, self.nodes))
+                self.end_iteration(True, started, nodes, bfs_calls)
+                if best_score >= WIN_THRESHOLD:
+                    break
+        except SearchTimeout:
+            self.timed_out = True
+            if self.iterations and "ms" not in self.iterations[-1]:
+                self.end_iteration(False, started, nodes, bfs_calls)
+        self.plan = best_move
+        return best_move[0], best_score, log
+
+    def end_iteration(self, completed, started, nodes, bfs_calls):
+        self.iterations[-1].update(completed=completed, nodes=self.nodes - nodes, bfs_calls=self.bfs_calls - bfs_calls,
+                                   q_nodes=self.q_nodes - self.q_start,
+                                   ms=round((time.perf_counter() - started) * 1000, 3))
+
+    def stats(self):
+        """Counters of the last search() as a JSON-ready dict."""
+        done = [it for it in self.iterations if it["completed"]]
+        ebf = None
+        if len(done) >= 2 and done[-2]["nodes"]:
+            # Iterations deepen by two plies
+            ebf = round((done[-1]["nodes"] / done[-2]["nodes"]) ** 0.5, 3)
+        return {"nodes": self.nodes, "q_nodes": self.q_nodes, "bfs_calls": self.bfs_calls,
+                "tt_probes": self.tt_probes, "tt_hits": self.tt_hits, "cutoffs": list(self.cutoffs),
+                "star_cutoffs": self.star_cutoffs,
+                "depth": done[-1]["depth"] if done else 0, "max_ply": self.max_ply, "ebf": ebf,
+                "iterations": [dict(it) for it in self.iterations], "timed_out": self.timed_out}
+
+def add_stats(totals, stats):
+    """Fold one move's Searcher.stats() into totals; returns totals."""
+    return merge_stats(totals, {
+        "moves": 1, "nodes": stats["nodes"], "q_nodes": stats["q_nodes"], "bfs_calls": stats["bfs_calls"],
+        "tt_probes": stats["tt_probes"], "tt_hits": stats["tt_hits"], "cutoffs": stats["cutoffs"],
+        "star_cutoffs": stats["star_cutoffs"], "depth": stats["depth"], "max_ply": stats["max_ply"],
+        "timed_out": int(stats["timed_out"]), "ebf": stats["ebf"] or 0.0, "ebf_moves": int(stats["ebf"] is not None),
+        "iteration_ms": {str(it["depth"]): [it["ms"], 1] for it in stats["iterations"] if it["completed"]}})
+
+def merge_stats(totals, other):
+    """Add the totals other into totals (both from add_stats); returns totals."""
+    for key, value in other.items():
+        if key == "max_ply":
+            totals[key] = max(totals.get(key, 0), value)
+        elif key == "cutoffs":
+            cutoffs = totals.setdefault(key, [0] * MAX_WALL_CANDIDATES)
+            for i, n in enumerate(value):
+                cutoffs[i] += n
+        elif key == "iteration_ms":
+            per_depth = totals.setdefault(key, {})
+            for depth, (ms, n) in value.items():
+                entry = per_depth.setdefault(depth, [0.0, 0])
+                entry[0] += ms
+                entry[1] += n
+        else:
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+def summarize_stats(totals):
+    """Per-move means and rates from add_stats totals; {} for no moves."""
+    moves = totals.get("moves", 0)
+    if not moves:
+        return {}
+    cutoffs = totals["cutoffs"]
+    return {
+        "moves": moves,
+        "nodes_per_move": totals["nodes"] / moves,
+        "bfs_per_node": totals["bfs_calls"] / max(totals["nodes"], 1),
+        "tt_hit_rate": totals["tt_hits"] / max(totals["tt_probes"], 1),
+        "first_move_cutoffs": cutoffs[0] / max(sum(cutoffs), 1),
+        "cutoffs": cutoffs,
+        "star_cutoffs_per_move": totals["star_cutoffs"] / moves,
+        "mean_depth": totals["depth"] / moves,
+        "max_ply": totals["max_ply"],
+        "mean_ebf": totals["ebf"] / totals["ebf_moves"] if totals["ebf_moves"] else None,
+        "timeouts": totals["timed_out"],
+        "iteration_ms": {d: ms / n for d, (ms, n) in sorted(totals["iteration_ms"].items(), key=lambda x: int(x[0]))},
+    }
+
+def format_stats(s):
+    """summarize_stats output as three report lines."""
+    ebf = f"{s['mean_ebf']:.2f}" if s["mean_ebf"] is not None else "-"
+    iterations = " ".join(f"d{d}={ms:.1f}ms" for d, ms in s["iteration_ms"].items())
+    return (f"Search: {s['nodes_per_move']:,.0f} nodes/move, {s['bfs_per_node']:.2f} BFS/node, "
+            f"TT hits {s['tt_hit_rate']:.1%}, depth {s['mean_depth']:.1f} (max ply {s['max_ply']}), EBF {ebf}\n"
+            f"        cutoffs by move {s['cutoffs']} ({s['first_move_cutoffs']:.0%} on the first), "
+            f"{s['star_cutoffs_per_move']:.1f} Star cutoffs/move, {s['timeouts']} timeouts\n"
+            f"        per iteration: {iterations or '-'}")
+
+def format_score(score):
+    if score >= WIN_THRESHOLD:
+        return f"trap (walls={WIN - round(score)})"
+    if score <= -WIN_THRESHOLD:
+        return "escape"
+    return f"{score:.2f}"
+
+def search_move(pig_pos, walls, max_depth=DEFAULT_MAX_DEPTH, pig_model="deterministic",
+                evaluation="distance", move_filter=None, free_walls=1, deadline=None, stats=None):
+    """Same (move, thoughts) contract as fallback_move in app.py. A stats dict,
+    if given, receives Searcher.stats()."""
+    searcher = Searcher(pig_model, evaluation=evaluation, move_filter=move_filter)
+    thoughts = [f"[SEARCH] Pig model: {pig_model}, evaluation: {searcher.evaluation}, max depth {max_depth}."]
+    if free_walls > 1:
+        thoughts.append(f"[SEARCH] Opening: {free_walls} walls before the pig moves.")
+    pig = cell_index(pig_pos["q"], pig_pos["r"])
+    move, score, log = searcher.search(pig, walls_to_mask(walls), max_depth, free_walls, deadline)
+    if stats is not None:
+        stats.update(searcher.stats())
+    for depth, m, s, nodes in log:
+        thoughts.append(f"[SEARCH] depth {depth}: best {cell_qr(m)} score {format_score(s)} ({nodes} nodes)")
+    if searcher.timed_out:
+        thoughts.append("[SEARCH] Deadline reached; answering from the last completed depth.")
+    if move_filter is not None:
+        thoughts.append(f"[RULES] Pruned moves: {move_filter.report()}")
+    if move is None:
+        thoughts.append("[SEARCH] Game already decided; no move to search.")
+        return None, thoughts
+    q, r = cell_qr(move)
+    thoughts.append(f"[SEARCH] Decision: Block ({q}, {r}) after {searcher.nodes} nodes, {searcher.bfs_calls} BFS calls.")
+    return {"q": q, "r": r}, thoughts
@@ -0,0 +1,69 @@
+"""
+Offline games between a wall engine and a pig policy (see engines.py).
+
+The rules follow static/game.js: the board starts with resetGame's 5-15
+random walls, the player places the opening walls while the pig stands still,
+then wall and pig moves alternate. The player wins once the pig cannot reach
+the border and loses when the pig steps onto it.
+"""
+import math
+import random
+import time
+
+from board import INF, escape_distance
+from positions import start_position
+from search import add_stats
+
+OPENING_WALLS = 3
+MAX_PLIES = 200
+
+def game_rng(seed, game_id):
+    """Per-game generator: the same (seed, game_id) plays the same game in any
+    process, provided searching engines start it from empty search.CHANCE_TABLES
+    (tools/selfplay.py clears them before every game)."""
+    return random.Random(f"{seed}:{game_id}")
+
+def play_game(choose, pig_policy, rng, opening=OPENING_WALLS):
+    """Returns a record dict: won, the start position, and every ply as
+    [wall, pig cell after the reply (None if it did not move), engine ms].
+    For engines with choose.stats, "search" holds the game's search.add_stats totals."""
+    pig, walls = start_position(rng)
+    record = {"start_pig": pig, "start_walls": walls, "plies": [], "won": None}
+    placed = 0
+    while record["won"] is None:
+        if escape_distance(pig, walls) == INF:
+            record["won"] = True
+            break
+        if len(record["plies"]) >= MAX_PLIES:
+            record["won"] = False
+            break
+        start = time.perf_counter()
+        move = choose(pig, walls, max(0, opening - placed))
+        ms = (time.perf_counter() - start) * 1000
+        stats = getattr(choose, "stats", None)
+        if stats:
+            add_stats(record.setdefault("search", {}), stats)
+        if move is None or walls >> move & 1 or move == pig:
+            record["won"] = False   # no legal move: the engine gave up
+            record["plies"].append([move, None, ms])
+            break
+        walls |= 1 << move
+        placed += 1
+        if placed < opening or escape_distance(pig, walls) == INF:
+            record["plies"].append([move, None, ms])
+            continue
+        pig = pig_policy(pig, walls, rng)
+        record["plies"].append([move, pig, ms])
+        if escape_distance(pig, walls) == 0:
+            record["won"] = False
+    return record
+
+def wilson_interval(wins, games, z=1.96):
+    """95% Wilson score interval for a win rate."""
+    if games == 0:
+        return 0.0, 1.0
+    p = wins / games
+    denom = 1 + z * z / games
+    centre = (p + z * z / (2 * games)) / denom
+    half = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
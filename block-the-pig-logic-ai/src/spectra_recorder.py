@@ -0,0 +1,81 @@
+"""
+Record and replay Spectra runs.
+
+A recording is keyed by the sha256 of the problem text (the temp file name
+differs every run) and stored as <directory>/<key[:2]>/<key>.json with what
+run_spectra saw: the output it returned, or the failure or timeout it raised,
+and how long that took. Replay serves the recording without starting Java,
+after sleeping the recorded duration times `speed` (0 answers at once, 0.1
+is ten times faster than recorded); a run that would outlast the caller's
+timeout times out like the real one.
+"""
+import hashlib
+import json
+import os
+import subprocess
+import time
+
+OUTPUT = "output"     # run_spectra returned stdout
+FAILED = "failed"     # Spectra failed (RuntimeError)
+TIMEOUT = "timeout"   # killed at the caller's timeout
+
+REPLAY_CMD = ["spectra-replay"]
+
+def problem_key(problem):
+    return hashlib.sha256(problem.encode("utf-8")).hexdigest()
+
+class Recorder:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def load(self, problem):
+        try:
+            with open(self._path(problem_key(problem)), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, problem, outcome, duration, text="", timeout=None):
+        key = problem_key(problem)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        record = {"key": key, "outcome": outcome, "duration": round(duration, 4), "text": text,
+                  "timeout": timeout, "recorded": time.time(), "problem": problem}
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp, path)
+
+    def record(self, problem, timeout_s, run):
+        """run() (the real Spectra call), saving whatever it returns or raises."""
+        start = time.perf_counter()
+        try:
+            out = run()
+        except subprocess.TimeoutExpired:
+            self.save(problem, TIMEOUT, time.perf_counter() - start, timeout=timeout_s)
+            raise
+        except RuntimeError as e:
+            self.save(problem, FAILED, time.perf_counter() - start, str(e))
+            raise
+        self.save(problem, OUTPUT, time.perf_counter() - start, out)
+        return out
+
+    def replay(self, problem, timeout_s, speed=1.0):
+        """The recorded answer for problem, with its recorded latency scaled by speed."""
+        record = self.load(problem)
+        if record is None:
+            raise LookupError(f"no Spectra recording for problem {problem_key(problem)[:12]}")
+        duration = record["duration"] * speed
+        if duration >= timeout_s:
+            time.sleep(timeout_s)
+            raise subprocess.TimeoutExpired(REPLAY_CMD, timeout_s)
+        time.sleep(duration)
+        if record["outcome"] == FAILED:
+            raise RuntimeError(record["text"])
+        if record["outcome"] == TIMEOUT:
+            # Recorded under a shorter timeout than this caller's: still no answer
+            raise subprocess.TimeoutExpired(REPLAY_CMD, record["timeout"])
+        return record["text"]
@@ -451,7 +451,7 @@ aiMoveBtn.addEventListener('click', async () => {
         const response = await fetch('/api/move', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ pig_pos: pigPos, walls: walls, phase: phase })
+            body: JSON.stringify({ pig_pos: pigPos, walls: walls, phase: phase, opening_left: 3 - wallsPlacedCount })
         });
 
         const data = await response.json();
@@ -534,7 +534,7 @@ async function autoPlayStep() {
         const response = await fetch('/api/move', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ pig_pos: pigPos, walls: walls, phase: phase })
+            body: JSON.stringify({ pig_pos: pigPos, walls: walls, phase: phase, opening_left: 3 - wallsPlacedCount })
         });
 
         const data = await response.json();
@@ -0,0 +1,172 @@
+"""
+Compile ShadowAdjudicator strategy-elimination rules (.sadj) into move filters.
+
+A rule such as
+
+    strategy badMove(w : Cell) :- HasWall(w) & Escape(w).
+    eliminate badMove.
+
+is evaluated on the board *after* a candidate wall is placed. A variable that
+appears in a HasWall literal is bound to the placed wall, since that is the
+only wall a move changes. Rules with no such variable are state patterns and
+are grounded on the pig's neighbourhood (lostPattern: two adjacent free cells
+next to the pig). Every literal becomes a bitmask test, and rules whose
+literals on the move variable are all static (Escape) are folded into a
+single precomputed mask of eliminated cells.
+"""
+import re
+
+from board import FULL_MASK, ESCAPE_MASK, NEIGHBOR_MASKS, iter_bits
+
+UNARY = ("HasWall", "Free", "Escape", "OccupiedByPig")
+BINARY = ("Adjacent",)
+
+_COMMENT_RE = re.compile(r";[^\n]*")
+_STRATEGY_RE = re.compile(r"strategy\s+(\w+)\s*\(([^)]*)\)\s*:-\s*(.*?)\.\s", re.DOTALL)
+_ELIMINATE_RE = re.compile(r"eliminate\s+(\w+)\s*\.")
+_LITERAL_RE = re.compile(r"^([~¬!]?)\s*(\w+)\s*\(([^)]*)\)$")
+
+class RuleError(ValueError):
+    pass
+
+class Rule:
+    def __init__(self, name, variables, literals):
+        self.name = name
+        self.variables = variables
+        # (negated, predicate, args)
+        self.literals = literals
+        move_vars = {args[0] for neg, pred, args in literals if pred == "HasWall" and not neg}
+        self.move_var = next((v for v in variables if v in move_vars), None)
+        self.static_mask = self._fold_static()
+
+    def __repr__(self):
+        return f"Rule({self.name})"
+
+    def _fold_static(self):
+        """Eliminated-cell mask when the rule only tests the move cell against fixed sets."""
+        if self.move_var is None or len(self.variables) != 1:
+            return None
+        mask = FULL_MASK
+        for neg, pred, args in self.literals:
+            if pred == "HasWall":
+                continue  # true for the placed wall by construction
+            if pred != "Escape":
+                return None
+            mask &= ~ESCAPE_MASK if neg else ESCAPE_MASK
+        return mask & FULL_MASK
+
+    def _unary_mask(self, pred, pig_bit, walls):
+        if pred == "HasWall":
+            return walls
+        if pred == "Free":
+            return FULL_MASK & ~walls & ~pig_bit
+        if pred == "Escape":
+            return ESCAPE_MASK
+        return pig_bit
+
+    def fires(self, pig, walls, move):
+        """True if the rule eliminates placing a wall on `move` (walls excludes the move)."""
+        if self.static_mask is not None:
+            return bool(self.static_mask >> move & 1)
+
+        pig_bit = 1 << pig
+        after = walls | 1 << move
+        # State patterns are grounded on the pig's neighbourhood
+        ground = FULL_MASK if self.move_var is not None else NEIGHBOR_MASKS[pig]
+        domains = {v: (1 << move if v == self.move_var else ground) for v in self.variables}
+        adjacency = []
+        for neg, pred, args in self.literals:
+            if pred == "Adjacent":
+                adjacency.append((neg, args[0], args[1]))
+            else:
+                m = self._unary_mask(pred, pig_bit, after)
+                domains[args[0]] &= ~m if neg else m
+        if not all(domains.values()):
+            return False
+        return _satisfiable(self.variables, domains, adjacency, {})
+
+def _satisfiable(variables, domains, adjacency, chosen):
+    """Backtracking over cell assignments; Adjacent literals are neighbour-mask tests."""
+    if len(chosen) == len(variables):
+        return True
+    var = variables[len(chosen)]
+    for cell in iter_bits(domains[var]):
+        chosen[var] = cell
+        consistent = all(
+            bool(NEIGHBOR_MASKS[chosen[a]] >> chosen[b] & 1) != neg
+            for neg, a, b in adjacency if a in chosen and b in chosen
+        )
+        if consistent and _satisfiable(variables, domains, adjacency, chosen):
+            return True
+        del chosen[var]
+    return False
+
+def _parse_literal(text, variables, rule_name):
+    m = _LITERAL_RE.match(text.strip())
+    if not m:
+        raise RuleError(f"{rule_name}: cannot parse literal '{text.strip()}'")
+    neg, pred, args = m.group(1), m.group(2), [a.strip() for a in m.group(3).split(",") if a.strip()]
+    if pred in UNARY and len(args) == 1 or pred in BINARY and len(args) == 2:
+        for a in args:
+            if a not in variables:
+                raise RuleError(f"{rule_name}: unbound variable '{a}' in {pred}")
+        return bool(neg), pred, args
+    raise RuleError(f"{rule_name}: unsupported predicate {pred}/{len(args)}")
+
+def compile_rules(text):
+    """Rules named in `eliminate` statements, in file order."""
+    text = _COMMENT_RE.sub("", text) + "\n"
+    strategies = {}
+    for name, params, body in _STRATEGY_RE.findall(text):
+        variables = []
+        for group in params.split(":")[0].split(","):
+            if group.strip():
+                variables.append(group.strip())
+        literals = [_parse_literal(lit, variables, name) for lit in body.split("&")]
+        strategies[name] = Rule(name, variables, literals)
+    rules = []
+    for name in _ELIMINATE_RE.findall(text):
+        if name not in strategies:
+            raise RuleError(f"eliminate {name}: no such strategy")
+        rules.append(strategies[name])
+    return rules
+
+class MoveFilter:
+    """Applies compiled rules to candidate walls and counts prunes per rule."""
+    def __init__(self, rules):
+        self.rules = rules
+        self.pruned = {r.name: 0 for r in rules}
+        # Positions where every candidate was eliminated and the filter stood down
+        self.overridden = 0
+
+    def eliminated_by(self, pig, walls, move):
+        for rule in self.rules:
+            if rule.fires(pig, walls, move):
+                return rule.name
+        return None
+
+    def filter(self, pig, walls, moves):
+        kept = []
+        hits = []
+        for m in moves:
+            name = self.eliminated_by(pig, walls, m)
+            if name is None:
+                kept.append(m)
+            else:
+                hits.append(name)
+        if not kept:
+            self.overridden += 1
+            return list(moves)
+        for name in hits:
+            self.pruned[name] += 1
+        return kept
+
+    def report(self):
+        parts = [f"{name}={n}" for name, n in self.pruned.items()]
+        if self.overridden:
+            parts.append(f"overridden={self.overridden}")
+        return ", ".join(parts)
+
+def load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return compile_rules(f.read())
@@ -0,0 +1,81 @@
+"""
+Per-request stage timings.
+
+A Timings object sums perf_counter_ns spans by stage name; it is passed down
+the pipeline the same way as the request deadline. Code that runs without one
+(speculation, tools) gets NULL, whose spans do nothing.
+"""
+import time
+
+class _Span:
+    __slots__ = ("timings", "stage", "start")
+
+    def __init__(self, timings, stage):
+        self.timings = timings
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.add(self.stage, time.perf_counter_ns() - self.start)
+        return False
+
+class Timings:
+    enabled = True
+
+    def __init__(self):
+        self.stages = {}   # stage -> [total ns, count]
+
+    def span(self, stage):
+        return _Span(self, stage)
+
+    def add(self, stage, ns):
+        entry = self.stages.get(stage)
+        if entry is None:
+            self.stages[stage] = [ns, 1]
+        else:
+            entry[0] += ns
+            entry[1] += 1
+
+    def total_ns(self):
+        return sum(ns for ns, _ in self.stages.values())
+
+    def as_ms(self):
+        """{stage: milliseconds} in the order the stages first ran."""
+        return {stage: round(ns / 1e6, 3) for stage, (ns, _) in self.stages.items()}
+
+    def summary(self):
+        return " ".join(f"{stage}={ns / 1e6:.1f}ms" + (f"x{n}" if n > 1 else "")
+                        for stage, (ns, n) in self.stages.items())
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class NullTimings:
+    enabled = False
+    _span = _NullSpan()
+
+    def span(self, stage):
+        return self._span
+
+    def add(self, stage, ns):
+        pass
+
+    def total_ns(self):
+        return 0
+
+    def as_ms(self):
+        return {}
+
+    def summary(self):
+        return ""
+
+NULL = NullTimings()
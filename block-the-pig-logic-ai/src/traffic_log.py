@@ -0,0 +1,74 @@
+"""
+Append-only log of /api/move traffic, for replay with tools/replay_traffic.py.
+
+log() only queues the record; a background thread appends queued records to
+the log as JSON lines and flushes after each batch it drains, so a request
+never waits on disk. One line per answered request:
+
+    {"time": arrival unix time, "request": request body,
+     "response": {"move", "engine", "budget_ms", "used_ms", "timings_ms"}}
+
+Lines are written in completion order, so read() sorts by arrival time. When
+the queue is full the record is dropped and counted rather than slowing the
+request down.
+"""
+import json
+import queue
+import threading
+
+BATCH = 256
+
+class TrafficLog:
+    def __init__(self, path, queue_size=4096):
+        self.path = path
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def log(self, arrival, request, response):
+        """Queue one request/response pair; False if the queue was full."""
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._writer, daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait({"time": arrival, "request": request, "response": response})
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self):
+        """Block until everything queued so far is on disk."""
+        self._queue.join()
+
+    def _writer(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(record) + "\n" for record in batch))
+            except OSError:
+                self.dropped += len(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+def read(path):
+    """Logged records, oldest arrival first."""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # torn last line after a crash
+    records.sort(key=lambda r: r["time"])
+    return records
@@ -0,0 +1,369 @@
+"""
+Branch-and-bound solver for the spectra/block_the_pig.spc objective: the
+minimum number of wall placements that encloses the pig against its best play.
+
+The pig may step to any free neighbour (not only along a shortest path) and
+escapes on reaching an escape cell. The player wins once the pig can no longer
+reach any escape cell. A first probe with an unlimited wall budget looks for
+any forced trap (an upper bound, or a proof that the pig escapes), then the
+budget is deepened from the lower bound; the first budget that succeeds is
+optimal.
+
+Lower bounds come from the escape cut (one wall only seals the pig when it
+sits on every escape path), from threat zones that prove a position lost
+without search, and from budgets already refuted for a (pig, walls) position.
+When the time budget runs out the best plan found so far is returned with
+status "best_found", or "unknown" with the proven lower bound.
+"""
+import time
+
+import board
+
+INF = float("inf")
+
+STATUS_OPTIMAL = "optimal"            # value proven minimal
+STATUS_UNTRAPPABLE = "untrappable"    # proven: the pig always escapes
+STATUS_BEST_FOUND = "best_found"      # a trap was found, optimality not proven in time
+STATUS_UNKNOWN = "unknown"            # time ran out before any trap was found
+
+# Share of the time budget spent looking for any trap before proving the minimum
+PROBE_SHARE = 0.3
+
+# Pig steps looked ahead when proving a position lost without search
+THREAT_DEPTH = 2
+
+class Geometry:
+    """Cells, neighbour masks and escape mask of a board, plus which cells accept walls."""
+    def __init__(self, name, cells, neighbors, escape, escape_walls=True, expand=None):
+        self.name = name
+        self.cells = list(cells)
+        self.index = {c: i for i, c in enumerate(self.cells)}
+        self.neighbor_masks = [sum(1 << self.index[n] for n in neighbors(c) if n in self.index)
+                               for c in self.cells]
+        self.full = (1 << len(self.cells)) - 1
+        self.escape = sum(1 << i for i, c in enumerate(self.cells) if escape(c))
+        self.wallable = self.full if escape_walls else self.full & ~self.escape
+        if expand is not None:
+            self.expand = expand
+        else:
+            # Neighbour union per byte of the mask: one table lookup per 8 cells
+            self._byte_tables = []
+            for base in range(0, len(self.cells), 8):
+                table = [0] * 256
+                for b in range(256):
+                    for k in range(8):
+                        if b >> k & 1 and base + k < len(self.cells):
+                            table[b] |= self.neighbor_masks[base + k]
+                self._byte_tables.append(table)
+
+    def expand(self, mask):
+        out = 0
+        for table in self._byte_tables:
+            if mask & 255:
+                out |= table[mask & 255]
+            mask >>= 8
+            if not mask:
+                break
+        return out
+
+def game_geometry():
+    """The 5x11 web board; walls on escape cells are legal there."""
+    cells = [board.cell_qr(i) for i in range(board.NUM_CELLS)]
+    return Geometry("5x11", cells, lambda c: board.get_neighbors(*c),
+                    lambda c: board.is_escape(*c), expand=board.expand)
+
+_AXIAL_DIRS = [(1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1)]
+
+def hex_geometry(radius):
+    """Hexagon of the given radius, as generated by tools/test_spectra_performance.py.
+    The escape ring cannot hold walls ((HasWall c) -> (not (Escape c)))."""
+    cells = [(q, r) for q in range(-radius, radius + 1) for r in range(-radius, radius + 1)
+             if -radius <= q + r <= radius]
+    on_ring = lambda c: max(abs(c[0]), abs(c[1]), abs(c[0] + c[1])) == radius
+    neighbors = lambda c: [(c[0] + dq, c[1] + dr) for dq, dr in _AXIAL_DIRS]
+    return Geometry(f"hex-r{radius}", cells, neighbors, on_ring, escape_walls=False)
+
+class _OutOfTime(Exception):
+    pass
+
+class TrapOptimizer:
+    def __init__(self, geometry, time_budget=10.0):
+        self.g = geometry
+        self.deadline = time.perf_counter() + time_budget
+        self.nodes = 0
+        # (pig, walls) -> [refuted_budget, solved_budget, solved_move]
+        self.table = {}
+        # (pig, walls) -> static lower bound, reused across deepening iterations
+        self.bounds = {}
+
+    # Board queries
+
+    def region(self, pig, walls):
+        """Free cells the pig can reach, pig included."""
+        g = self.g
+        open_cells = g.full & ~walls
+        seen = frontier = 1 << pig
+        while frontier:
+            frontier = g.expand(frontier) & open_cells & ~seen
+            seen |= frontier
+        return seen
+
+    def distances(self, pig, walls):
+        """BFS layers from the pig over free cells: list of masks, layer 0 = pig."""
+        g = self.g
+        open_cells = g.full & ~walls
+        layers = [1 << pig]
+        seen = 1 << pig
+        while True:
+            nxt = g.expand(layers[-1]) & open_cells & ~seen
+            if not nxt:
+                return layers
+            layers.append(nxt)
+            seen |= nxt
+
+    def escape_distances(self, walls):
+        """Backward BFS layers from the free escape cells: list of masks, layer 0 = escapes."""
+        g = self.g
+        open_cells = g.full & ~walls
+        layers = [g.escape & open_cells]
+        seen = layers[0]
+        while True:
+            nxt = g.expand(layers[-1]) & open_cells & ~seen
+            if not nxt:
+                return layers
+            layers.append(nxt)
+            seen |= nxt
+
+    def shortest_path(self, pig, walls):
+        """Cells of one shortest escape path, pig excluded, or [] if sealed."""
+        g = self.g
+        layers = self.distances(pig, walls)
+        for d, layer in enumerate(layers):
+            hit = layer & g.escape
+            if hit:
+                break
+        else:
+            return []
+        cell = (hit & -hit).bit_length() - 1
+        path = [cell]
+        for layer in reversed(layers[1:d]):
+            back = g.neighbor_masks[cell] & layer
+            cell = (back & -back).bit_length() - 1
+            path.append(cell)
+        return path
+
+    def sealing_walls(self, pig, walls):
+        """Walls that enclose the pig on their own: the cut cells of size 1.
+        Such a cell lies on every escape path, so only one path needs checking."""
+        g = self.g
+        return [c for c in self.shortest_path(pig, walls)
+                if g.wallable >> c & 1 and not self.region(pig, walls | 1 << c) & g.escape]
+
+    def defuse(self, cell, walls, depth, memo):
+        """Walls that might save "pig on `cell`, player to move", or None if that is not a
+        proven loss within `depth` pig steps. Walls outside the returned set leave it lost."""
+        g = self.g
+        key = (cell, depth)
+        if key in memo:
+            return memo[key]
+        if g.escape >> cell & 1:
+            result = g.wallable & 1 << cell
+        elif depth == 0:
+            result = None
+        else:
+            zone, union = self.threat_zone(cell, walls, depth - 1, memo)
+            result = (1 << cell | union) if zone == 0 else None
+        memo[key] = result
+        return result
+
+    def threat_zone(self, pig, walls, depth=THREAT_DEPTH, memo=None):
+        """(zone, union) over the pig's threats: free neighbours it can step to and win from.
+
+        A wall outside a threat's defusing set lets the pig carry it out, so the
+        next wall must lie in `zone`, the intersection of those sets (None when
+        there is no threat, 0 when the pig wins). `union` is their union."""
+        if memo is None:
+            memo = {}
+        zone, union = None, 0
+        for h in board.iter_bits(self.g.neighbor_masks[pig] & ~walls):
+            fix = self.defuse(h, walls, depth, memo)
+            if fix is not None:
+                zone = fix if zone is None else zone & fix
+                union |= fix
+        return zone, union
+
+    def lower_bound(self, pig, walls):
+        """Valid lower bound on walls still needed (0 = already trapped, INF = lost)."""
+        key = (pig, walls)
+        lb = self.bounds.get(key)
+        if lb is None:
+            if not self.region(pig, walls) & self.g.escape:
+                lb = 0
+            elif self.threat_zone(pig, walls)[0] == 0:
+                lb = INF
+            else:
+                lb = 1 if self.sealing_walls(pig, walls) else 2
+            self.bounds[key] = lb
+        return lb
+
+    # Search
+
+    def _tick(self):
+        self.nodes += 1
+        if self.nodes & 255 == 0 and time.perf_counter() > self.deadline:
+            raise _OutOfTime()
+
+    def wall_candidates(self, pig, walls):
+        """Walls worth trying, nearest the pig first. Only cells the pig can still reach matter,
+        and under an immediate threat only the cells that defuse it."""
+        g = self.g
+        zone, _ = self.threat_zone(pig, walls)
+        allowed = g.wallable if zone is None else zone
+        to_escape = self.escape_distances(walls)
+        order = []
+        for layer in self.distances(pig, walls)[1:]:
+            # Within a layer, cells on the shorter escape routes first
+            for target in to_escape:
+                order.extend(board.iter_bits(layer & allowed & target))
+        return order
+
+    def pig_moves(self, pig, walls):
+        g = self.g
+        # Closest to an escape first: the pig's strongest replies refute a wall soonest
+        moves = []
+        free = g.neighbor_masks[pig] & ~walls
+        for layer in self.escape_distances(walls):
+            moves.extend(board.iter_bits(free & layer))
+            free &= ~layer
+        moves.extend(board.iter_bits(free))
+        return moves
+
+    def can_trap(self, pig, walls, budget):
+        """Returns the first wall of a plan that traps within `budget` walls, else None.
+        A failure that never depended on the budget is stored as INF (pig escapes)."""
+        self._tick()
+        key = (pig, walls)
+        entry = self.table.get(key)
+        if entry is None:
+            entry = self.table[key] = [0, INF, None]
+        if budget <= entry[0]:
+            return None
+        if budget >= entry[1]:
+            return entry[2]
+
+        g = self.g
+        result = None
+        limited = False
+        if budget == 1:
+            candidates = self.sealing_walls(pig, walls)
+            limited = len(candidates) < len(self.wall_candidates(pig, walls))
+        else:
+            candidates = self.wall_candidates(pig, walls)
+        for w in candidates:
+            after = walls | 1 << w
+            if not self.region(pig, after) & g.escape:
+                result = w
+                entry[1], entry[2] = 1, w
+                break
+            if budget == 1:
+                continue
+            # First look for a pig move that wins whatever the budget
+            replies = []
+            refuted = False
+            for s in self.pig_moves(pig, after):
+                lb = INF if g.escape >> s & 1 else self.lower_bound(s, after)
+                child = self.table.get((s, after))
+                if lb == INF or child is not None and child[0] == INF:
+                    refuted = True
+                    break
+                replies.append((s, lb))
+            if refuted:
+                continue
+            for s, lb in replies:
+                if lb > budget - 1 or self.can_trap(s, after, budget - 1) is None:
+                    refuted = True
+                    if self.table.get((s, after), (0,))[0] != INF:
+                        limited = True
+                    break
+            if not refuted:
+                result = w
+                if budget < entry[1]:
+                    entry[1], entry[2] = budget, w
+                break
+        if result is None:
+            entry[0] = max(entry[0], budget) if limited else INF
+        return result
+
+    def plan_length(self, pig, walls, memo=None):
+        """Worst-case walls used by the stored plan from this position."""
+        if memo is None:
+            memo = {}
+        key = (pig, walls)
+        if key not in memo:
+            w = self.table[key][2]
+            after = walls | 1 << w
+            if not self.region(pig, after) & self.g.escape:
+                memo[key] = 1
+            else:
+                memo[key] = 1 + max(self.plan_length(s, after, memo) for s in self.pig_moves(pig, after))
+        return memo[key]
+
+    def solve(self, pig, walls, max_walls=None, probe_share=PROBE_SHARE):
+        g = self.g
+        start = time.perf_counter()
+        deadline = self.deadline
+        region = self.region(pig, walls)
+        if max_walls is None:
+            max_walls = (region & g.wallable & ~(1 << pig)).bit_count()
+        result = {"geometry": g.name, "value": None, "move": None, "status": STATUS_UNKNOWN,
+                  "lower_bound": 0, "upper_bound": INF, "nodes": 0, "elapsed": 0.0}
+        lb = self.lower_bound(pig, walls)
+        if lb == 0:
+            result.update(value=0, lower_bound=0, upper_bound=0, status=STATUS_OPTIMAL)
+        elif lb == INF or max_walls == 0:
+            result.update(status=STATUS_UNTRAPPABLE, lower_bound=INF)
+        else:
+            result["lower_bound"] = lb
+            # Probe with the whole budget for any plan: an upper bound, or a proof the pig escapes
+            self.deadline = start + (deadline - start) * probe_share
+            try:
+                move = self.can_trap(pig, walls, max_walls)
+                if move is None:
+                    result.update(status=STATUS_UNTRAPPABLE, lower_bound=INF)
+                else:
+                    ub = self.plan_length(pig, walls)
+                    result.update(value=ub, move=move, upper_bound=ub, status=STATUS_BEST_FOUND)
+            except _OutOfTime:
+                pass
+            self.deadline = deadline
+            try:
+                # Deepen the wall budget from the lower bound: the first success is optimal
+                budget = lb
+                while result["status"] not in (STATUS_UNTRAPPABLE, STATUS_OPTIMAL):
+                    if budget >= min(result["upper_bound"], max_walls + 1):
+                        if result["move"] is None:
+                            result.update(status=STATUS_UNTRAPPABLE, lower_bound=INF)
+                        else:
+                            result.update(lower_bound=result["upper_bound"], status=STATUS_OPTIMAL)
+                        break
+                    move = self.can_trap(pig, walls, budget)
+                    if move is not None:
+                        result.update(value=budget, move=move, lower_bound=budget,
+                                      upper_bound=budget, status=STATUS_OPTIMAL)
+                    elif self.table[(pig, walls)][0] == INF:
+                        result.update(status=STATUS_UNTRAPPABLE, lower_bound=INF)
+                    else:
+                        result["lower_bound"] = budget = budget + 1
+            except _OutOfTime:
+                pass
+        if result["move"] is not None:
+            result["move"] = g.cells[result["move"]]
+        result["nodes"] = self.nodes
+        result["elapsed"] = time.perf_counter() - start
+        return result
+
+def minimum_walls(geometry, pig, walls=(), time_budget=10.0, max_walls=None):
+    """pig and walls in the geometry's own coordinates; returns the result dict from solve()."""
+    opt = TrapOptimizer(geometry, time_budget)
+    wall_mask = sum(1 << geometry.index[c] for c in walls)
+    return opt.solve(geometry.index[pig], wall_mask, max_walls)
@@ -0,0 +1,44 @@
+"""
+Tests for the seeded position corpora and the benchmark tool's comparison.
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tools')))
+
+import benchmark
+from board import INF, pig_steps
+from positions import START, midgame_positions, start_position
+
+def test_start_positions_follow_reset_game():
+    rng = random.Random(1)
+    for _ in range(200):
+        pig, walls = start_position(rng)
+        assert pig == START and not walls >> START & 1
+        assert 5 <= walls.bit_count() <= 15
+
+def test_corpus_is_seeded_and_playable():
+    corpus = midgame_positions(7, 50)
+    assert corpus == midgame_positions(7, 50)
+    assert corpus != midgame_positions(8, 50)
+    for pig, walls in corpus:
+        assert 0 < pig_steps(pig, walls)[0] < INF
+
+def test_compare_flags_regressions():
+    baseline = {"benchmarks": {"a": {"p50": 1.0}, "b": {"p50": 1.0}, "c": {"p50": 1.0}}}
+    current = {"benchmarks": {"a": {"p50": 1.05}, "b": {"p50": 1.5}, "c": {"p50": 0.5}, "new": {"p50": 1}}}
+    verdicts = {name: verdict for name, _, _, _, verdict in benchmark.compare(baseline, current)}
+    assert verdicts == {"a": "ok", "b": "REGRESSION", "c": "faster"}
+
+def test_kernel_benchmark_runs():
+    result = benchmark.run_one("kernel/pig_steps", seed=0, quick=True, repeats=3)
+    assert result["samples"] == 3 and result["p50"] > 0
+
+if __name__ == "__main__":
+    test_start_positions_follow_reset_game()
+    test_corpus_is_seeded_and_playable()
+    test_compare_flags_regressions()
+    test_kernel_benchmark_runs()
+    print("PASS: benchmark tests")
@@ -0,0 +1,68 @@
+"""
+Tests for the engine comparison harness: the brute-force oracle, the ported
+legacy engines, and the Pareto / tier selection.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tools')))
+
+import compare_engines
+import engines
+import oracle
+from board import FULL_MASK, INF, cell_index, escape_distance, iter_bits, walls_to_mask
+from positions import midgame_positions
+from search import WIN_THRESHOLD
+
+def test_one_ply_is_brute_force():
+    for pig, walls in midgame_positions(3, 30):
+        value, moves = oracle.one_ply(pig, walls)
+        scores = {c: escape_distance(pig, walls | 1 << c) for c in iter_bits(FULL_MASK & ~walls & ~(1 << pig))}
+        assert value == max(scores.values())
+        assert moves == sum(1 << c for c, s in scores.items() if s == value)
+
+def test_k_ply_finds_forced_traps():
+    # Pig at (2, 5) with five of its six neighbours walled: one wall traps
+    pig = cell_index(2, 5)
+    ring = [(3, 5), (3, 4), (2, 4), (1, 5), (2, 6)]
+    walls = walls_to_mask([{"q": q, "r": r} for q, r in ring])
+    value, moves = oracle.k_ply(pig, walls, 2)
+    assert value > WIN_THRESHOLD and moves == 1 << cell_index(3, 6)
+    assert oracle.one_ply(pig, walls) == (INF, moves)
+
+def test_ported_engines_play_legal_moves():
+    for name in ("logic_ai", "minimax2", "heuristic"):
+        choose = engines.make_engine(name)
+        for pig, walls in midgame_positions(5, 40):
+            move = choose(pig, walls, 0)
+            assert move is not None and move != pig and not walls >> move & 1
+
+def test_every_job_starts_from_empty_chance_tables(monkeypatch):
+    import search
+    compare_engines.init_worker("search:depth=2")
+    compare_engines.play(("game", 3, 17, None, None))
+    assert any(search.CHANCE_TABLES.values())
+    starts = []
+    def play_game(*args):
+        starts.append(any(search.CHANCE_TABLES.values()))
+        return {"won": True, "plies": []}
+    monkeypatch.setattr(compare_engines, "play_game", play_game)
+    compare_engines.play(("game", 3, 17, None, None))
+    assert starts == [False]
+
+def test_pareto_and_tiers():
+    rows = [{"engine": "fast", "win_rate": 0.3, "p50_ms": 0.01, "p99_ms": 0.05, "agree_kply": 0.5},
+            {"engine": "slow_weak", "win_rate": 0.3, "p50_ms": 5.0, "p99_ms": 50.0, "agree_kply": 0.9},
+            {"engine": "strong", "win_rate": 0.6, "p50_ms": 1.0, "p99_ms": 200.0, "agree_kply": 0.9}]
+    assert compare_engines.pareto_front(rows) == ["fast", "strong"]
+    assert compare_engines.tier_picks(rows, [0.01, 1, 1000]) == {0.01: None, 1: "fast", 1000: "strong"}
+    assert engines.parse_spec("search:depth=4,pig_model=random") == \
+        ("search", {"depth": "4", "pig_model": "random"})
+
+if __name__ == "__main__":
+    test_one_ply_is_brute_force()
+    test_k_ply_finds_forced_traps()
+    test_ported_engines_play_legal_moves()
+    test_pareto_and_tiers()
+    print("PASS: engine comparison tests (run the rest under pytest)")
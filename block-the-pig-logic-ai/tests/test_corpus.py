@@ -0,0 +1,75 @@
+"""
+Tests for the NumPy position corpora: the batch kernels agree with board.py,
+every distribution is seeded and playable, and corpora survive a save/load.
+"""
+import os
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import board
+import corpus
+import engines
+import game_records
+from positions import START, midgame_positions
+from selfplay import game_rng, play_game
+
+def test_kernels_match_board():
+    rng = random.Random(4)
+    masks = [rng.getrandbits(board.NUM_CELLS) for _ in range(500)]
+    assert corpus.expand(np.array(masks, dtype=np.uint64)).tolist() == [board.expand(m) for m in masks]
+    assert corpus.popcount(np.array(masks, dtype=np.uint64)).tolist() == [m.bit_count() for m in masks]
+    positions = midgame_positions(2, 500) + [(START, rng.getrandbits(board.NUM_CELLS) & ~(1 << START))
+                                             for _ in range(200)]
+    pigs = np.array([p for p, _ in positions])
+    walls = np.array([w for _, w in positions], dtype=np.uint64)
+    dist, steps = corpus.pig_steps(pigs, walls)
+    for (pig, w), d, s in zip(positions, dist.tolist(), steps.tolist()):
+        expected, expected_steps = board.pig_steps(pig, w)
+        assert (board.INF if d == corpus.TRAPPED else d) == expected and s == expected_steps
+
+def test_distributions_are_seeded_and_playable():
+    for name in corpus.DISTRIBUTIONS:
+        pigs, walls = corpus.generate(name, 3000, seed=5, chunk_size=4096)
+        again = corpus.generate(name, 3000, seed=5, chunk_size=4096)
+        assert len(pigs) == 3000 and np.array_equal(pigs, again[0]) and np.array_equal(walls, again[1])
+        assert not np.array_equal(walls, corpus.generate(name, 3000, seed=6, chunk_size=4096)[1])
+        for pig, w in corpus.to_positions(pigs[:300], walls[:300]):
+            assert not w >> pig & 1 and 0 < board.escape_distance(pig, w) < board.INF
+
+def test_start_follows_reset_game():
+    pigs, walls = corpus.generate("start", 2000, seed=1, chunk_size=4096)
+    counts = corpus.popcount(walls)
+    assert (pigs == START).all() and counts.min() == 5 and counts.max() == 15
+
+def test_endgames_are_near_trapped():
+    pigs, walls = corpus.generate("endgame", 500, seed=1, chunk_size=4096, max_exits=1)
+    exits = corpus.popcount(corpus.reachable(pigs, walls) & np.uint64(board.ESCAPE_MASK))
+    assert (exits == 1).all()
+
+def test_save_load_and_records(tmp_path):
+    path = str(tmp_path / "games.bin")
+    choose = engines.make_engine("greedy")
+    with game_records.Writer(path) as w:
+        for i in range(10):
+            game_records.write_selfplay(w, i, play_game(choose, engines.random_pig, game_rng(0, i)), "greedy")
+    pigs, walls = corpus.from_records(path)
+    assert len(pigs) > 0 and corpus.playable(pigs, walls).all()
+    assert len(set(zip(pigs.tolist(), walls.tolist()))) == len(pigs)
+    out = str(tmp_path / "c.npy")
+    corpus.save(out, pigs, walls, {"distribution": "selfplay"})
+    loaded = corpus.load(out, mmap=True)
+    assert np.array_equal(loaded[0], pigs) and np.array_equal(loaded[1], walls)
+    assert os.path.exists(str(tmp_path / "c.json"))
+
+if __name__ == "__main__":
+    import pathlib, tempfile
+    test_kernels_match_board()
+    test_distributions_are_seeded_and_playable()
+    test_start_follows_reset_game()
+    test_endgames_are_near_trapped()
+    test_save_load_and_records(pathlib.Path(tempfile.mkdtemp()))
+    print("PASS: corpus tests")
@@ -0,0 +1,59 @@
+"""
+Tests for the request latency budget: the search answers from its last
+completed depth at the deadline, and /api/move reports which engine answered
+and how much of the budget it used.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import app
+from opening_book import START
+from search import Searcher
+
+def test_search_stops_at_deadline():
+    searcher = Searcher("random", table={})
+    start = time.monotonic()
+    # The three-wall opening is far too wide to reach depth 30
+    move, _, log = searcher.search(START, 0, 30, free_walls=3, deadline=start + 0.3)
+    assert time.monotonic() - start < 1.0
+    assert searcher.timed_out
+    assert log and move == log[-1][1]
+
+def test_expired_deadline_still_returns_a_move():
+    searcher = Searcher("random", table={})
+    move, _, log = searcher.search(START, 0, 6, free_walls=3, deadline=time.monotonic() - 1)
+    assert searcher.timed_out and log == []
+    assert move is not None
+
+def slow_spectra(pig_pos, walls, low_priority=False, deadline=None, timings=None):
+    # Behaves like spectra_search when the budget runs out mid-candidate
+    time.sleep(deadline.remaining(app.SEARCH_RESERVE_SECONDS))
+    raise TimeoutError("request budget spent after 1 candidates")
+
+def test_api_reports_engine_and_budget(monkeypatch):
+    monkeypatch.setattr(app, "spectra_move", slow_spectra)
+    monkeypatch.setattr(app, "SPECULATE", False)
+    monkeypatch.setattr(app, "SEARCH_RESERVE_SECONDS", 0.3)
+    client = app.app.test_client()
+    walls = [{"q": 3, "r": 4}, {"q": 3, "r": 5}]
+    body = client.post("/api/move", json={"pig_pos": {"q": 2, "r": 5}, "walls": walls,
+                                          "phase": "MAIN", "budget_ms": 800}).json
+    assert body["engine"] == "search"
+    assert body["budget_ms"] == 800
+    assert body["used_ms"] < 1500
+    assert body["move"] not in walls
+    stats = body["search_stats"]
+    assert stats["nodes"] > 0 and stats["iterations"]
+
+def test_budget_is_capped():
+    assert app.request_budget({"budget_ms": 10**9}) == app.MAX_REQUEST_BUDGET_SECONDS
+    assert app.request_budget({"budget_ms": "soon"}) == app.REQUEST_BUDGET_SECONDS
+
+if __name__ == "__main__":
+    test_search_stops_at_deadline()
+    test_expired_deadline_still_returns_a_move()
+    test_budget_is_capped()
+    print("PASS: deadline tests (run the rest under pytest)")
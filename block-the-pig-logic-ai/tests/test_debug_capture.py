@@ -0,0 +1,73 @@
+"""
+Tests for the debug capture archive: captures are written off the calling
+thread, found again by board key, and old segments rotate away.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import debug_capture
+from debug_capture import DebugCapture
+
+def test_capture_round_trip(tmp_path):
+    archive = DebugCapture(str(tmp_path))
+    assert archive.capture("ab" * 32, "abababab_1", "Spectra said: nothing useful")
+    assert archive.capture("cd" * 32, "cdcdcdcd_1", "other board")
+    archive.flush()
+    records = debug_capture.find(str(tmp_path), "abab")
+    assert [r["text"] for r in records] == ["Spectra said: nothing useful"]
+    assert records[0]["tag"] == "abababab_1"
+    assert len(debug_capture.read_index(str(tmp_path))) == 2
+
+def test_segments_rotate_and_index_follows(tmp_path):
+    archive = DebugCapture(str(tmp_path), segment_bytes=200, max_segments=2)
+    for i in range(20):
+        archive.capture(f"{i:064x}", f"t{i}", os.urandom(150).hex())
+    archive.flush()
+    kept = debug_capture.segments(str(tmp_path))
+    assert len(kept) == 2
+    entries = debug_capture.read_index(str(tmp_path))
+    assert {e["segment"] for e in entries} <= set(kept)
+    assert entries[-1]["key"] == f"{19:064x}"
+    assert debug_capture.find(str(tmp_path), f"{0:064x}") == []
+
+def test_reopened_archive_appends(tmp_path):
+    first = DebugCapture(str(tmp_path))
+    first.capture("ef" * 32, "first", "one")
+    first.flush()
+    archive = DebugCapture(str(tmp_path))
+    archive.capture("ef" * 32, "second", "two")
+    archive.flush()
+    assert [r["text"] for r in debug_capture.find(str(tmp_path), "efef")][-1] == "two"
+
+def test_archives_sharing_a_directory(tmp_path):
+    # Two writers on one directory, as two app processes would be
+    archives = [DebugCapture(str(tmp_path), segment_bytes=200, max_segments=3) for _ in range(2)]
+    for i in range(30):
+        archive = archives[i % 6 == 5]
+        archive.capture(f"{i:064x}", f"t{i}", os.urandom(150).hex())
+        archive.flush()
+    kept = debug_capture.segments(str(tmp_path))
+    assert len(kept) == 3
+    entries = debug_capture.read_index(str(tmp_path))
+    assert {e["segment"] for e in entries} <= set(kept)
+    for e in entries:
+        assert debug_capture.read_record(str(tmp_path), e)["key"] == e["key"]
+    assert entries[-1]["key"] == f"{29:064x}"
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    archive = DebugCapture(str(tmp_path), queue_size=1)
+    archive._thread = object()  # writer not running: the queue fills up
+    assert archive.capture("k", "a", "x")
+    assert not archive.capture("k", "b", "y")
+    assert archive.dropped == 1
+
+if __name__ == "__main__":
+    import pathlib, tempfile
+    test_capture_round_trip(pathlib.Path(tempfile.mkdtemp()))
+    test_segments_rotate_and_index_follows(pathlib.Path(tempfile.mkdtemp()))
+    test_reopened_archive_appends(pathlib.Path(tempfile.mkdtemp()))
+    test_archives_sharing_a_directory(pathlib.Path(tempfile.mkdtemp()))
+    test_full_queue_drops_instead_of_blocking(pathlib.Path(tempfile.mkdtemp()))
+    print("PASS: debug capture tests")
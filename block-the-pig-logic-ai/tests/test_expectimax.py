@@ -0,0 +1,159 @@
+"""
+Tests for the expectimax search mode (random tie-breaking pig).
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from board import cell_index, cells_to_mask, pig_steps, INF
+from search import Searcher, search_move, add_stats, merge_stats, summarize_stats, WIN, WIN_THRESHOLD
+
+def random_board(seed):
+    rng = random.Random(seed)
+    walls = set()
+    for _ in range(rng.randint(5, 15)):
+        walls.add((rng.randint(0, 4), rng.randint(0, 10)))
+    walls.discard((2, 5))
+    return cell_index(2, 5), cells_to_mask(walls)
+
+def root_values(searcher, pig, walls, depth):
+    _, steps = pig_steps(pig, walls)
+    return [searcher.chance_node(pig, walls | 1 << m, depth - 1, -WIN, WIN)
+            for m in searcher.wall_candidates(pig, walls, steps)]
+
+def test_star_pruning_matches_plain_expectimax():
+    for seed in range(20):
+        pig, walls = random_board(seed)
+        dist, _ = pig_steps(pig, walls)
+        if dist in (0, INF):
+            continue
+        # Quiescence is off: its node budget runs out at different points with and without pruning
+        pruned = root_values(Searcher("random", pruning=True, table={}, quiescence=False), pig, walls, 6)
+        plain = root_values(Searcher("random", pruning=False, table={}, quiescence=False), pig, walls, 6)
+        for a, b in zip(pruned, plain):
+            assert abs(a - b) < 1e-6, (seed, pruned, plain)
+
+def test_star_pruning_with_unbounded_quiescence(monkeypatch):
+    import search
+    monkeypatch.setattr(search, "QUIESCENCE_NODE_BUDGET", 10 ** 9)
+    for seed in range(5):
+        pig, walls = random_board(seed)
+        dist, _ = pig_steps(pig, walls)
+        if dist in (0, INF):
+            continue
+        pruned = root_values(Searcher("random", pruning=True, table={}), pig, walls, 4)
+        plain = root_values(Searcher("random", pruning=False, table={}), pig, walls, 4)
+        for a, b in zip(pruned, plain):
+            assert abs(a - b) < 1e-6, (seed, pruned, plain)
+
+def test_quiescence_sees_double_threat():
+    # Pig two steps from the left edge; at depth 2 the raw distance hides that
+    # stepping to (1,5) leaves two escapes, quiescence resolves it
+    pig = cell_index(2, 5)
+    walls = cells_to_mask([(3, 5), (3, 4), (3, 6)])
+    _, blind, _ = Searcher("deterministic", table={}, quiescence=False).search(pig, walls, 2)
+    _, seen, _ = Searcher("deterministic", table={}).search(pig, walls, 2)
+    assert blind > 0
+    assert seen <= -WIN_THRESHOLD
+
+def test_single_shortest_step_matches_deterministic():
+    # Walls leave one shortest escape: both pig models agree
+    pig = cell_index(2, 5)
+    walls = cells_to_mask([(1, 4), (2, 4), (1, 5), (1, 6), (2, 6), (3, 4), (3, 6)])
+    det = root_values(Searcher("deterministic", table={}), pig, walls, 6)
+    rnd = root_values(Searcher("random", table={}), pig, walls, 6)
+    assert det == rnd
+
+def test_chance_table_is_reused():
+    pig, walls = random_board(7)
+    table = {}
+    first = Searcher("random", table=table)
+    first.search(pig, walls, 8)
+    second = Searcher("random", table=table)
+    second.search(pig, walls, 8)
+    assert table
+    assert second.nodes < first.nodes
+
+def test_budget_cut_values_stay_out_of_the_shared_table(monkeypatch):
+    import search
+    pig, walls = random_board(3)
+    fresh = root_values(Searcher("random", table={}), pig, walls, 4)
+    table = {}
+    monkeypatch.setattr(search, "QUIESCENCE_NODE_BUDGET", 10)
+    starved = Searcher("random", table=table)
+    starved.search(pig, walls, 4)
+    assert starved.q_cuts > 0 and starved.cut_table
+    monkeypatch.undo()
+    assert root_values(Searcher("random", table=table), pig, walls, 4) == fresh
+
+def test_quiescence_budget_is_per_iteration(monkeypatch):
+    import search
+    monkeypatch.setattr(search, "QUIESCENCE_NODE_BUDGET", 10)
+    searcher = Searcher("random", table={})
+    searcher.search(*random_board(3), 6)
+    per_iteration = [it["q_nodes"] for it in searcher.stats()["iterations"]]
+    assert len(per_iteration) == 3 and sum(per_iteration) == searcher.q_nodes
+    # Each iteration gets the whole allowance (plus the lines in flight when it ran out)
+    assert all(10 <= n < 20 for n in per_iteration), per_iteration
+
+def test_quiescence_stops_at_deadline():
+    import search, time
+    pig, walls = random_board(3)
+    searcher = Searcher("random", table={})
+    searcher.deadline = time.monotonic() - 1
+    searcher.q_nodes = 1023
+    try:
+        searcher.quiesce_chance(pig, walls, None, None, -WIN, WIN)
+        assert False, "quiescence ran past the deadline"
+    except search.SearchTimeout:
+        pass
+
+def test_finds_immediate_trap():
+    # Pig at (2,5) with five of six neighbours walled: closing the last one wins
+    walls = [{'q': 3, 'r': 5}, {'q': 3, 'r': 4}, {'q': 2, 'r': 4},
+             {'q': 1, 'r': 5}, {'q': 2, 'r': 6}]
+    for model in ("deterministic", "random"):
+        move, _ = search_move({'q': 2, 'r': 5}, walls, max_depth=4, pig_model=model)
+        assert move == {'q': 3, 'r': 6}
+
+def test_random_pig_value_reports_trap():
+    pig = cell_index(2, 5)
+    walls = cells_to_mask([(3, 5), (3, 4), (2, 4), (1, 5), (2, 6)])
+    _, score, _ = Searcher("random", table={}).search(pig, walls, 4)
+    assert score >= WIN_THRESHOLD
+
+def test_search_stats_add_up():
+    pig, walls = random_board(4)
+    searcher = Searcher("random", table={})
+    searcher.search(pig, walls, 6)
+    stats = searcher.stats()
+    assert stats["depth"] == stats["iterations"][-1]["depth"] == 6
+    assert sum(it["nodes"] for it in stats["iterations"]) == stats["nodes"]
+    assert sum(it["bfs_calls"] for it in stats["iterations"]) == stats["bfs_calls"] - 1   # the root BFS
+    assert stats["tt_hits"] <= stats["tt_probes"] and stats["max_ply"] >= 6
+    assert stats["ebf"] is not None and len(stats["cutoffs"]) == 6
+    # search_move reports the same counters
+    reported = {}
+    search_move({'q': 2, 'r': 5}, [], max_depth=4, pig_model="random", stats=reported)
+    assert reported["depth"] == 4 and reported["nodes"] > 0
+
+def test_stats_aggregate_over_moves():
+    totals = {}
+    for seed in range(3):
+        searcher = Searcher("random", table={})
+        searcher.search(*random_board(seed), 4)
+        add_stats(totals, searcher.stats())
+    doubled = merge_stats(merge_stats({}, totals), totals)
+    assert doubled["moves"] == 2 * totals["moves"] == 6
+    summary = summarize_stats(totals)
+    assert summary["nodes_per_move"] == totals["nodes"] / 3
+    assert summary["mean_depth"] == 4 and set(summary["iteration_ms"]) == {"2", "4"}
+    assert summarize_stats({}) == {}
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and "monkeypatch" not in fn.__code__.co_varnames:
+            fn()
+            print(f"PASS: {name}")
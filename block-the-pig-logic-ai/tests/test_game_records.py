@@ -0,0 +1,108 @@
+"""
+Tests for the binary game-record format: round trip, the game index and its
+rebuild, appends across writers and the NumPy view.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import engines
+import game_records
+from board import FULL_MASK
+from selfplay import game_rng, play_game
+
+def sample_games(n):
+    choose = engines.make_engine("greedy")
+    return [play_game(choose, engines.random_pig, game_rng(5, i)) for i in range(n)]
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "games.bin")
+    games = sample_games(20)
+    with game_records.Writer(path) as w:
+        for i, g in enumerate(games):
+            game_records.write_selfplay(w, 100 + i, g, "greedy")
+    with game_records.Reader(path) as r:
+        assert len(r) == sum(len(g["plies"]) for g in games)
+        assert len(r.games) == 20
+        plies = r.game(107)
+        g = games[7]
+        assert [p["move"] for p in plies] == [p[0] for p in g["plies"]]
+        assert plies[0]["walls"] == g["start_walls"] and plies[0]["pig"] == g["start_pig"]
+        assert all(p["walls"] <= FULL_MASK and p["engine"] == "greedy" for p in plies)
+        assert plies[-1]["flags"] & game_records.FLAG_LAST
+        assert bool(plies[0]["flags"] & game_records.FLAG_WON) == g["won"]
+        assert not plies[0]["flags"] & game_records.FLAG_PIG_MOVED   # opening wall
+
+def test_append_and_index_rebuild(tmp_path):
+    path = str(tmp_path / "games.bin")
+    games = sample_games(6)
+    for start in (0, 3):
+        with game_records.Writer(path) as w:
+            for i in range(start, start + 3):
+                game_records.write_selfplay(w, i, games[i], "search")
+    os.remove(path + ".idx")
+    with game_records.Reader(path) as r:
+        assert sorted(r.games) == list(range(6))
+        assert [p["move"] for p in r.game(4)] == [p[0] for p in games[4]["plies"]]
+        assert sum(1 for _ in r.iter_raw()) == len(r)
+
+def test_game_ids_are_unique_per_file(tmp_path):
+    path = str(tmp_path / "games.bin")
+    games = sample_games(4)
+    with game_records.Writer(path) as w:
+        assert w.next_game == 0
+        for i in range(2):
+            game_records.write_selfplay(w, i, games[i], "heuristic")
+    with game_records.Writer(path) as w:
+        try:
+            game_records.write_selfplay(w, 1, games[2], "heuristic")
+            assert False, "duplicate game id accepted"
+        except ValueError:
+            pass
+        base = w.next_game
+        for i in range(2, 4):
+            game_records.write_selfplay(w, base + i - 2, games[i], "heuristic")
+    with game_records.Reader(path) as r:
+        assert sorted(r.games) == [0, 1, 2, 3]
+        assert [p["move"] for p in r.game(3)] == [p[0] for p in games[3]["plies"]]
+        assert r.game(0)[0]["engine"] == "heuristic"
+
+def test_torn_tail_is_cut_on_open(tmp_path):
+    path = str(tmp_path / "games.bin")
+    games = sample_games(3)
+    with game_records.Writer(path) as w:
+        game_records.write_selfplay(w, 0, games[0], "greedy")
+    whole = os.path.getsize(path)
+    with open(path, "ab") as f:   # a killed writer: one whole ply of game 1, then half a record
+        f.write(game_records.RECORD.pack(0, 1, 0, 0, 0, 0, 0, 0))
+        f.write(b"\0" * 10)
+    with game_records.Writer(path) as w:
+        assert os.path.getsize(path) == whole and w.games == {0}
+        game_records.write_selfplay(w, 1, games[1], "greedy")
+    with game_records.Reader(path) as r:
+        assert sorted(r.games) == [0, 1]
+        assert [p["move"] for p in r.game(1)] == [p[0] for p in games[1]["plies"]]
+
+def test_numpy_view(tmp_path):
+    path = str(tmp_path / "games.bin")
+    games = sample_games(5)
+    with game_records.Writer(path) as w:
+        for i, g in enumerate(games):
+            game_records.write_selfplay(w, i, g, "greedy")
+    r = game_records.Reader(path)
+    arr = r.as_array()
+    assert len(arr) == len(r)
+    assert int((arr["flags"] & game_records.FLAG_LAST != 0).sum()) == 5
+    assert int(arr["pig"][0]) == games[0]["start_pig"]
+    del arr
+    r.close()
+
+if __name__ == "__main__":
+    import pathlib, tempfile
+    test_round_trip(pathlib.Path(tempfile.mkdtemp()))
+    test_append_and_index_rebuild(pathlib.Path(tempfile.mkdtemp()))
+    test_game_ids_are_unique_per_file(pathlib.Path(tempfile.mkdtemp()))
+    test_torn_tail_is_cut_on_open(pathlib.Path(tempfile.mkdtemp()))
+    test_numpy_view(pathlib.Path(tempfile.mkdtemp()))
+    print("PASS: game record tests")
@@ -0,0 +1,43 @@
+"""
+Tests for the /api/move load generator against app.py served in-process with
+the fake Spectra backend.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tools')))
+
+import app
+import load_test
+
+def test_concurrent_games_are_reported(monkeypatch):
+    monkeypatch.setattr(app, "SPECULATE", False)
+    # serve() repoints these at the fake backend and a fresh cache
+    for name in ("SPECTRA_BACKEND", "FAKE_SPECTRA_ARGS", "SPECTRA_CACHE"):
+        monkeypatch.setattr(app, name, getattr(app, name))
+    url, server = load_test.serve("fake", "--startup 0 --solve 0.02 --jitter 0")
+    try:
+        row = load_test.run_level(url, concurrency=3, duration=1.5, budget_ms=3000)
+    finally:
+        server.shutdown()
+    assert row["errors"] == 0 and row["requests"] >= 3
+    assert set(row["engines"]) <= {"book", "spectra", "search", "fallback"}
+    assert row["p50_ms"] <= row["p99_ms"] <= row["max_ms"]
+    assert row["throughput"] > 0
+
+def test_unreachable_server_counts_errors():
+    # Nothing listens on port 9 (discard) locally
+    results = []
+    load_test.play("http://127.0.0.1:9", load_test.random.Random(0), load_test.time.monotonic() + 1, None, 1.0,
+                   results)
+    assert results and all("error" in r for r in results)
+
+def test_timeout_metrics_are_parsed():
+    text = 'btp_timeouts_total{stage="spectra"} 3\nbtp_timeouts_total{stage="budget"} 1.0\n'
+    assert dict(load_test.METRIC_RE.findall(text)) == {"spectra": "3", "budget": "1.0"}
+
+if __name__ == "__main__":
+    test_unreachable_server_counts_errors()
+    test_timeout_metrics_are_parsed()
+    print("PASS: load test tests (run the rest under pytest)")
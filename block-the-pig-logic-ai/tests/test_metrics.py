@@ -0,0 +1,78 @@
+"""
+Tests for the metrics registry and the /metrics endpoint.
+"""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import metrics
+
+def test_counter_sums_thread_shards():
+    registry = metrics.Registry()
+    calls = registry.counter("t_calls_total", "Calls.", ["outcome"])
+    def work():
+        for _ in range(1000):
+            calls.inc("ok")
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    calls.inc("error")
+    assert calls.values() == {("ok",): 4000, ("error",): 1}
+    # Finished threads were folded into one shard
+    assert len(calls._shards) == 1
+    assert calls.values() == {("ok",): 4000, ("error",): 1}
+
+def test_finished_shards_are_folded_without_a_read():
+    registry = metrics.Registry()
+    calls = registry.counter("t_calls_total", "Calls.")
+    for _ in range(50):
+        t = threading.Thread(target=calls.inc)
+        t.start()
+        t.join()
+    # Each new thread folded the ones before it; nothing has been scraped yet
+    assert len(calls._shards) == 1
+    assert calls.values() == {(): 50}
+
+def test_histogram_render():
+    registry = metrics.Registry()
+    latency = registry.histogram("t_seconds", "Latency.", ["engine"], buckets=(0.1, 1))
+    for v in (0.05, 0.1, 0.5, 3):
+        latency.observe(v, "search")
+    text = registry.render()
+    assert '# TYPE t_seconds histogram' in text
+    assert 't_seconds_bucket{engine="search",le="0.1"} 2' in text
+    assert 't_seconds_bucket{engine="search",le="1"} 3' in text
+    assert 't_seconds_bucket{engine="search",le="+Inf"} 4' in text
+    assert 't_seconds_count{engine="search"} 4' in text
+
+def test_label_values_are_escaped():
+    registry = metrics.Registry()
+    registry.counter("t_total", "x", ["why"]).inc('said "no"\n')
+    assert 't_total{why="said \\"no\\"\\n"} 1' in registry.render()
+
+def test_metrics_endpoint(monkeypatch):
+    import app
+    monkeypatch.setattr(app, "SPECULATE", False)
+    def no_spectra(*args, **kwargs):
+        raise RuntimeError("no jar")
+    monkeypatch.setattr(app, "spectra_move", no_spectra)
+    client = app.app.test_client()
+    client.post("/api/move", json={"pig_pos": {"q": 2, "r": 5}, "walls": [{"q": 3, "r": 5}],
+                                   "phase": "MAIN", "budget_ms": 500})
+    response = client.get("/metrics")
+    assert response.content_type.startswith("text/plain")
+    text = response.get_data(as_text=True)
+    assert 'btp_move_request_seconds_count{engine="search"}' in text
+    assert "btp_search_nodes_count" in text
+    assert "btp_move_cache_evictions_total" in text
+
+if __name__ == "__main__":
+    test_counter_sums_thread_shards()
+    test_finished_shards_are_folded_without_a_read()
+    test_histogram_render()
+    test_label_values_are_escaped()
+    print("PASS: metrics tests (run the rest under pytest)")
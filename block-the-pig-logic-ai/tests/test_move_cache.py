@@ -0,0 +1,164 @@
+"""
+Tests for the single-flight move cache: concurrent identical requests cost
+one computation, across threads and across processes.
+"""
+import os
+import sys
+import threading
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import move_cache
+from move_cache import MoveCache
+
+MOVE = {"q": 1, "r": 4}
+
+def slow_compute(calls, delay=0.2):
+    def compute():
+        calls.append(1)
+        time.sleep(delay)
+        return MOVE
+    return compute
+
+def test_threads_share_one_computation():
+    cache = MoveCache()
+    calls, results = [], []
+    compute = slow_compute(calls)
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    sources = sorted(s for _, s in results)
+    assert sources.count(move_cache.COMPUTED) == 1
+    assert sources.count(move_cache.JOINED) == 7
+    assert cache.get_or_compute("k", compute) == (MOVE, move_cache.MEMORY)
+
+def test_failure_reaches_waiters_and_is_not_cached():
+    cache = MoveCache()
+    started = threading.Event()
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("no plan")
+    errors = []
+    def call():
+        try:
+            cache.get_or_compute("k", failing)
+        except RuntimeError as e:
+            errors.append(e)
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call)
+    follower.start()
+    leader.join()
+    follower.join()
+    assert len(errors) == 2
+    assert cache.get("k") is None
+
+def test_lru_evicts_oldest():
+    cache = MoveCache(max_entries=2)
+    cache.put("a", MOVE)
+    cache.put("b", MOVE)
+    cache.get("a")
+    cache.put("c", MOVE)
+    assert cache.evictions == 1
+    assert "a" in cache and "b" not in cache
+
+def _process_worker(args):
+    directory, log_path = args
+    cache = MoveCache(directory, poll_interval=0.01)
+    def compute():
+        with open(log_path, "a") as f:
+            f.write("computed\n")
+        time.sleep(0.5)
+        return MOVE
+    return cache.get_or_compute("shared", compute)
+
+def test_processes_share_one_computation(tmp_path):
+    directory = str(tmp_path / "cache")
+    log_path = str(tmp_path / "log.txt")
+    with Pool(4) as pool:
+        results = pool.map(_process_worker, [(directory, log_path)] * 4)
+    with open(log_path) as f:
+        assert f.read().count("computed") == 1
+    assert all(move == MOVE for move, _ in results)
+    assert sum(source == move_cache.COMPUTED for _, source in results) == 1
+    assert not [n for n in os.listdir(directory) if n.endswith(".lock")]
+
+def test_stale_lock_is_taken_over(tmp_path):
+    directory = str(tmp_path)
+    cache = MoveCache(directory, lock_timeout=0.1, poll_interval=0.01)
+    lock = os.path.join(directory, "k.lock")
+    open(lock, "w").close()
+    os.utime(lock, (time.time() - 10, time.time() - 10))
+    assert cache.get_or_compute("k", lambda: MOVE) == (MOVE, move_cache.COMPUTED)
+
+def test_heartbeat_keeps_a_slow_computation_locked(tmp_path):
+    # The computation outlasts the lock timeout several times over
+    directory = str(tmp_path)
+    calls = []
+    leader, follower = (MoveCache(directory, lock_timeout=0.2, poll_interval=0.01) for _ in range(2))
+    thread = threading.Thread(target=leader.get_or_compute, args=("k", slow_compute(calls, delay=1.0)))
+    thread.start()
+    time.sleep(0.1)
+    assert follower.get_or_compute("k", slow_compute(calls)) == (MOVE, move_cache.JOINED)
+    thread.join()
+    assert len(calls) == 1
+
+def test_fresh_lock_is_not_taken_over(tmp_path):
+    cache = MoveCache(str(tmp_path), lock_timeout=60)
+    lock = os.path.join(str(tmp_path), "k.lock")
+    open(lock, "w").close()
+    assert not cache._take_over_stale(lock)
+    assert os.path.exists(lock)
+    os.utime(lock, (time.time() - 120, time.time() - 120))
+    assert cache._take_over_stale(lock)
+    assert os.listdir(str(tmp_path)) == []
+
+def test_disk_is_bounded_by_count_and_age(tmp_path):
+    directory = str(tmp_path)
+    cache = MoveCache(directory, disk_entries=3, max_age=3600, prune_every=5)
+    for i in range(5):
+        cache.put(f"k{i}", MOVE)
+        cache._pruner.join()
+        path = os.path.join(directory, f"k{i}.json")
+        os.utime(path, (time.time() - 10 + i, time.time() - 10 + i))
+    assert len(os.listdir(directory)) == 5   # pruned after the first write only
+    cache.put("k5", MOVE)
+    cache._pruner.join()
+    assert sorted(os.listdir(directory)) == ["k3.json", "k4.json", "k5.json"]
+    assert cache.disk_evictions == 3
+    os.utime(os.path.join(directory, "k3.json"), (time.time() - 7200, time.time() - 7200))
+    assert MoveCache(directory, max_age=3600).get("k3") is None
+
+def test_app_keys_separate_backends(monkeypatch):
+    import app
+    board = ({"q": 2, "r": 5}, [{"q": 1, "r": 1}])
+    monkeypatch.setattr(app, "SPECTRA_RECORDING", "off")
+    monkeypatch.setattr(app, "SPECTRA_BACKEND", "jar")
+    real = app.spectra_cache_key(*board)
+    monkeypatch.setattr(app, "SPECTRA_BACKEND", "fake")
+    fake = app.spectra_cache_key(*board)
+    monkeypatch.setattr(app, "SPECTRA_BACKEND", "jar")
+    monkeypatch.setattr(app, "SPECTRA_RECORDING", "replay")
+    replayed = app.spectra_cache_key(*board)
+    assert len({real, fake, replayed}) == 3
+    assert real.endswith(app.board_cache_key(*board))
+
+if __name__ == "__main__":
+    import pathlib, tempfile
+    test_threads_share_one_computation()
+    test_failure_reaches_waiters_and_is_not_cached()
+    test_lru_evicts_oldest()
+    test_processes_share_one_computation(pathlib.Path(tempfile.mkdtemp()))
+    test_stale_lock_is_taken_over(pathlib.Path(tempfile.mkdtemp()))
+    test_heartbeat_keeps_a_slow_computation_locked(pathlib.Path(tempfile.mkdtemp()))
+    test_fresh_lock_is_not_taken_over(pathlib.Path(tempfile.mkdtemp()))
+    test_disk_is_bounded_by_count_and_age(pathlib.Path(tempfile.mkdtemp()))
+    print("PASS: move cache tests (run the rest under pytest)")
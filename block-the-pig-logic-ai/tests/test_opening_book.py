@@ -0,0 +1,83 @@
+"""
+Tests for the opening book: symmetry canonicalization, the binary file and
+the free-walls search that fills it.
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tools')))
+
+import build_opening_book
+from board import NEIGHBOR_MASKS, cell_index, cells_to_mask
+from opening_book import FLIP, OUTER_OK, START, WINDOW_CELLS, canonical_key, flip_mask, save, load
+from search import Searcher
+
+def test_flip_is_a_board_symmetry():
+    assert FLIP[START] == START
+    assert sorted(FLIP[c] for c in WINDOW_CELLS) == list(WINDOW_CELLS)
+    for c in range(55):
+        assert flip_mask(NEIGHBOR_MASKS[c]) == NEIGHBOR_MASKS[FLIP[c]]
+
+def test_mirrored_layouts_share_a_key():
+    rng = random.Random(0)
+    for _ in range(50):
+        walls = sum(1 << c for c in rng.sample(WINDOW_CELLS, 3))
+        assert canonical_key(walls, 3)[0] == canonical_key(flip_mask(walls), 3)[0]
+        assert canonical_key(walls, 3)[0] != canonical_key(walls, 2)[0]
+
+def test_lookup_maps_moves_back(tmp_path):
+    walls = cells_to_mask([(1, 4)])
+    mirrored = flip_mask(walls)
+    key, flipped = canonical_key(walls, 3)
+    move = cell_index(3, 4)
+    path = str(tmp_path / "book.bin")
+    save(path, {key: FLIP[move] if flipped else move})
+    book = load(path)
+    assert len(book) == 1
+    assert book.lookup(walls, 3) == move
+    assert book.lookup(mirrored, 3) == FLIP[move]
+    assert book.lookup(walls, 2) is None
+
+def test_free_walls_search_returns_a_wall_set():
+    searcher = Searcher("random", table={})
+    move, _, _ = searcher.search(START, 0, 4, free_walls=3)
+    assert len(set(searcher.plan)) == 3
+    assert move == searcher.plan[0]
+
+def test_outer_walls_need_a_confirmed_entry(monkeypatch, tmp_path):
+    import app
+    move = cell_index(1, 5)
+    plain, _ = canonical_key(0, 1)
+    ringed, flipped = canonical_key(cells_to_mask([(1, 4)]), 1)
+    path = str(tmp_path / "book.bin")
+    save(path, {plain: move, ringed: (FLIP[move] if flipped else move) | OUTER_OK})
+    monkeypatch.setattr(app, "OPENING_BOOK", load(path))
+    pig, outer = {"q": 2, "r": 5}, {"q": 4, "r": 10}
+    assert app.book_move(pig, [], 1)[0] == {"q": 1, "r": 5}   # exactly the searched position
+    answer, thoughts = app.book_move(pig, [outer], 1)
+    assert answer is None and "not confirmed" in thoughts[0]
+    assert app.book_move(pig, [{"q": 1, "r": 4}, outer], 1)[0] == {"q": 1, "r": 5}
+
+def test_builder_confirms_its_own_moves():
+    entries = build_opening_book.solve_layout(0, 2, "random", outer_samples=2, check_depth=2)
+    assert entries == build_opening_book.solve_layout(0, 2, "random", outer_samples=2, check_depth=2)
+    assert [key >> len(WINDOW_CELLS) for key, _ in entries] == [3, 2, 1]
+    searcher = Searcher("random", table={})
+    searcher.search(START, 0, 2, free_walls=3)
+    # With no outer walls the check agrees with the search it re-runs
+    assert all(build_opening_book.holds(0, cell, 3, 2, "random") for cell in searcher.plan)
+
+def test_missing_book_loads_as_none(tmp_path):
+    assert load(str(tmp_path / "absent.bin")) is None
+
+if __name__ == "__main__":
+    import pathlib, tempfile
+    test_flip_is_a_board_symmetry()
+    test_mirrored_layouts_share_a_key()
+    test_lookup_maps_moves_back(pathlib.Path(tempfile.mkdtemp()))
+    test_free_walls_search_returns_a_wall_set()
+    test_builder_confirms_its_own_moves()
+    test_missing_book_loads_as_none(pathlib.Path(tempfile.mkdtemp()))
+    print("PASS: opening book tests")
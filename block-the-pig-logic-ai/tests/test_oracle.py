@@ -0,0 +1,55 @@
+"""
+Tests for the batch oracle: it matches the scalar brute force exactly, and
+answer files merge and look up positions.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import corpus
+import oracle
+from board import INF, cell_index, walls_to_mask
+from positions import midgame_positions, start_positions
+
+def sample():
+    endgames = corpus.to_positions(*corpus.generate("endgame", 20, seed=2, chunk_size=1024))
+    return midgame_positions(1, 30) + start_positions(1, 6) + endgames
+
+def test_batch_matches_scalar():
+    positions = sample()
+    for plies in (1, 2, 3):
+        rows = oracle.solve(positions, plies, workers=1, batch_size=16)
+        for (pig, walls), row in zip(positions, rows):
+            assert (int(row["k_value"]), int(row["k_moves"])) == oracle.k_ply(pig, walls, plies)
+            assert int(row["one_moves"]) == oracle.one_ply(pig, walls)[1]
+
+def test_answer_file_merges_and_looks_up(tmp_path):
+    path = str(tmp_path / "answers.npy")
+    positions = midgame_positions(4, 20)
+    assert oracle.save_answers(oracle.solve(positions[:15], 1, workers=1), path) == 15
+    assert oracle.save_answers(oracle.solve(positions[10:], 2, workers=1), path) == 20
+    answers = oracle.Answers(path)
+    assert sorted(answers.positions()) == sorted(set(positions))
+    for i, (pig, walls) in enumerate(positions):
+        one, one_moves, plies, value, moves = answers.get(pig, walls)
+        assert plies == (1 if i < 10 else 2)
+        assert (value, moves) == oracle.k_ply(pig, walls, plies)
+        assert (one, one_moves) == oracle.one_ply(pig, walls)
+    pig, walls = positions[0]
+    assert answers.get(pig, walls | 1 << 0 | 1 << 54) is None
+
+def test_trapping_wall_is_infinite_one_ply(tmp_path):
+    pig = cell_index(2, 5)
+    walls = walls_to_mask([{"q": q, "r": r} for q, r in [(3, 5), (3, 4), (2, 4), (1, 5), (2, 6)]])
+    path = str(tmp_path / "answers.npy")
+    oracle.save_answers(oracle.solve([(pig, walls)], 2, workers=1), path)
+    one, moves, _, _, _ = oracle.Answers(path).get(pig, walls)
+    assert one == INF and moves == 1 << cell_index(3, 6)
+
+if __name__ == "__main__":
+    import pathlib, tempfile
+    test_batch_matches_scalar()
+    test_answer_file_merges_and_looks_up(pathlib.Path(tempfile.mkdtemp()))
+    test_trapping_wall_is_infinite_one_ply(pathlib.Path(tempfile.mkdtemp()))
+    print("PASS: oracle tests")
@@ -0,0 +1,89 @@
+"""
+Tests for the local-pattern database: exactness of the stored values and
+the O(1) lookup used by the search evaluation.
+"""
+import itertools
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from board import cell_index, NEIGHBOR_MASKS, ESCAPE_MASK
+from pattern_db import CLASS_SIGNATURES, PIG_LAYOUT, PatternDB, build_class, save, load
+from search import Searcher
+
+PIG = cell_index(2, 5)
+
+def local_exit(pig, walls, ring):
+    """Brute-force local BFS: steps to an escape cell or out of the ring, 0 if sealed."""
+    ring_mask = sum(1 << c for c in ring) | 1 << pig
+    frontier, seen, step, best = 1 << pig, 1 << pig, 0, 0
+    while frontier:
+        step += 1
+        nxt = 0
+        for i in range(55):
+            if frontier >> i & 1:
+                nxt |= NEIGHBOR_MASKS[i]
+        if nxt & ~ring_mask & ~walls:
+            best = step if not best else min(best, step)
+        frontier = nxt & ring_mask & ~walls & ~seen
+        seen |= frontier
+        if frontier & ESCAPE_MASK:
+            return step if not best else min(best, step)
+        if best:
+            return best
+    return best
+
+def brute_cut(pig, walls, ring):
+    free = [c for c in ring if not walls >> c & 1]
+    for k in range(len(free) + 1):
+        for extra in itertools.combinations(free, k):
+            if local_exit(pig, walls | sum(1 << c for c in extra), ring) == 0:
+                return k
+    return None
+
+def single_class_db(pig):
+    cls, _ = PIG_LAYOUT[pig]
+    tables = [b"" for _ in CLASS_SIGNATURES]
+    tables[cls] = build_class(CLASS_SIGNATURES[cls])
+    offsets, pos = [], 0
+    for t in tables:
+        offsets.append(pos)
+        pos += len(t)
+    return PatternDB(b"".join(tables), offsets)
+
+def test_empty_ring_values():
+    db = single_class_db(PIG)
+    # Six walls seal the 1-ring; the escape columns are two steps away
+    assert db.lookup(PIG, 0) == (6, 2)
+
+def test_values_match_brute_force():
+    db = single_class_db(PIG)
+    _, ring = PIG_LAYOUT[PIG]
+    rng = random.Random(0)
+    for _ in range(25):
+        walls = sum(1 << c for c in ring if rng.random() < 0.35)
+        cut, exit_steps = db.lookup(PIG, walls)
+        assert exit_steps == local_exit(PIG, walls, ring)
+        assert cut == brute_cut(PIG, walls, ring)
+
+def test_save_and_load_roundtrip(tmp_path):
+    path = str(tmp_path / "pdb.bin")
+    tables = [bytes([i]) * (1 << sum(1 for s in sig if s)) for i, sig in enumerate(CLASS_SIGNATURES)]
+    save(path, tables)
+    db = load(path)
+    cls, _ = PIG_LAYOUT[PIG]
+    assert db.lookup(PIG, 0) == (cls & 7, cls >> 3)
+
+def test_pattern_evaluation_falls_back_without_db(monkeypatch):
+    import search
+    monkeypatch.setattr(search, "_PATTERN_DB", [None])
+    assert Searcher(evaluation="pattern", table={}).evaluation == "distance"
+
+if __name__ == "__main__":
+    import pathlib, tempfile
+    test_empty_ring_values()
+    test_values_match_brute_force()
+    test_save_and_load_roundtrip(pathlib.Path(tempfile.mkdtemp()))
+    print("PASS: pattern database tests")
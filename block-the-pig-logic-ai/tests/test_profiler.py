@@ -0,0 +1,90 @@
+"""
+Tests for request profiling: the sampler sees the profiled thread's stacks,
+and /api/move only profiles when the admin setting is on.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import app
+import move_cache
+import profiler
+
+def busy_inner(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def busy_outer(seconds):
+    busy_inner(seconds)
+
+def test_sampler_collapses_stacks(tmp_path):
+    with profiler.Sampler(0.001) as sampler:
+        busy_outer(0.1)
+    assert sampler.samples > 5
+    lines = sampler.collapsed().splitlines()
+    assert any("test_profiler.py:busy_outer;test_profiler.py:busy_inner " in line for line in lines)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == sampler.samples
+    path = sampler.save(str(tmp_path), "abc")
+    assert os.path.basename(path).startswith("abc-") and path.endswith(".folded")
+
+def test_null_sampler_does_nothing():
+    with profiler.NULL as s:
+        pass
+    assert not s.enabled
+
+def test_profile_requires_admin_setting(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "SPECTRA_BACKEND", "fake")
+    monkeypatch.setattr(app, "FAKE_SPECTRA_ARGS", ["--startup", "0", "--solve", "0.05", "--jitter", "0"])
+    monkeypatch.setattr(app, "SPECTRA_CACHE", move_cache.MoveCache())
+    monkeypatch.setattr(app, "SPECULATE", False)
+    client = app.app.test_client()
+    body = {"pig_pos": {"q": 2, "r": 5}, "walls": [], "phase": "MAIN"}
+
+    monkeypatch.setattr(app, "PROFILE_DIR", "")
+    reply = client.post("/api/move", json=body, headers={app.PROFILE_HEADER: "1"}).json
+    assert "profile" not in reply
+
+    monkeypatch.setattr(app, "PROFILE_DIR", str(tmp_path))
+    assert "profile" not in client.post("/api/move", json=body).json
+    monkeypatch.setattr(app, "SPECTRA_CACHE", move_cache.MoveCache())   # profile a cache miss
+    reply = client.post("/api/move?profile=1", json=body).json
+    name = reply["profile"]
+    assert name.startswith(app.board_cache_key(body["pig_pos"], body["walls"]))
+    assert os.listdir(tmp_path) == [name]
+    assert "app.py:choose_move" in (tmp_path / name).read_text()
+
+def test_profile_requires_loopback_or_token(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "SPECTRA_BACKEND", "fake")
+    monkeypatch.setattr(app, "FAKE_SPECTRA_ARGS", ["--startup", "0", "--solve", "0", "--jitter", "0"])
+    monkeypatch.setattr(app, "SPECULATE", False)
+    monkeypatch.setattr(app, "PROFILE_DIR", str(tmp_path))
+    client = app.app.test_client()
+    body = {"pig_pos": {"q": 2, "r": 5}, "walls": [], "phase": "MAIN"}
+    remote = {"REMOTE_ADDR": "203.0.113.7"}
+    assert "profile" not in client.post("/api/move?profile=1", json=body, environ_base=remote).json
+
+    monkeypatch.setattr(app, "PROFILE_TOKEN", "s3cret")
+    for value in ("1", "wrong"):
+        reply = client.post("/api/move", json=body, headers={app.PROFILE_HEADER: value}).json
+        assert "profile" not in reply
+    reply = client.post("/api/move", json=body, headers={app.PROFILE_HEADER: "s3cret"}, environ_base=remote).json
+    assert "profile" in reply
+
+def test_prune_keeps_newest(tmp_path):
+    for i in range(5):
+        path = tmp_path / f"k-{i}.folded"
+        path.write_text("a 1\n")
+        os.utime(path, (1000 + i, 1000 + i))
+    (tmp_path / "notes.txt").write_text("")
+    profiler.prune(str(tmp_path), 2)
+    assert sorted(os.listdir(tmp_path)) == ["k-3.folded", "k-4.folded", "notes.txt"]
+    profiler.prune(str(tmp_path / "missing"), 2)
+
+if __name__ == "__main__":
+    test_null_sampler_does_nothing()
+    import pathlib, tempfile
+    test_prune_keeps_newest(pathlib.Path(tempfile.mkdtemp()))
+    print("PASS: profiler tests (run the rest under pytest)")
@@ -0,0 +1,80 @@
+"""
+Tests for offline self-play: seeded games replay exactly, engines make legal
+moves, and the win-rate interval is sane.
+"""
+import importlib.util
+import multiprocessing
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+TOOLS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tools'))
+
+import engines
+import search
+from board import INF, escape_distance
+from selfplay import game_rng, play_game, wilson_interval
+
+def test_same_seed_same_game():
+    choose = engines.make_engine("search", depth=2)
+    def alone(game_id):
+        # As with --first i --games 1: the opening search can hit the quiescence
+        # budget, and where it does depends on what the chance tables already hold
+        search.CHANCE_TABLES.clear()
+        return play_game(choose, engines.random_pig, game_rng(3, game_id))
+    a, b = alone(17), alone(17)
+    strip = lambda r: (r["start_walls"], [p[:2] for p in r["plies"]], r["won"])
+    assert strip(a) == strip(b)
+    assert strip(a) != strip(alone(18))
+
+def test_pool_workers_replay_games_exactly():
+    # Game 17 is one whose second play diverged while the worker kept its tables
+    spec = importlib.util.spec_from_file_location("selfplay_tool", os.path.join(TOOLS_DIR, "selfplay.py"))
+    tool = sys.modules["selfplay_tool"] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(tool)
+    with multiprocessing.get_context("fork").Pool(
+            1, initializer=tool.init_worker, initargs=("search", {"depth": "2"}, "random")) as pool:
+        a, b = pool.map(tool.play, [(3, 17, 3), (3, 17, 3)])
+    assert [p[:2] for p in a["plies"]] == [p[:2] for p in b["plies"]]
+
+def test_games_follow_the_rules():
+    for name in ("fallback", "greedy", "search"):
+        choose = engines.make_engine(name, **({"depth": 2} if name == "search" else {}))
+        for game_id in range(10):
+            record = play_game(choose, engines.random_pig, game_rng(0, game_id))
+            pig, walls = record["start_pig"], record["start_walls"]
+            for i, (wall, reply, _) in enumerate(record["plies"]):
+                assert wall != pig and not walls >> wall & 1
+                walls |= 1 << wall
+                if i < 2:
+                    assert reply is None   # the pig waits out the opening
+                if reply is not None:
+                    pig = reply
+            assert record["won"] == (escape_distance(pig, walls) == INF)
+
+def test_search_stats_are_summed_per_game():
+    record = play_game(engines.make_engine("search", depth=2), engines.random_pig, game_rng(0, 1))
+    assert record["search"]["moves"] == len(record["plies"])
+    assert record["search"]["nodes"] > 0
+    assert "search" not in play_game(engines.make_engine("fallback"), engines.random_pig, game_rng(0, 1))
+
+def test_wilson_interval():
+    lo, hi = wilson_interval(60, 100)
+    assert lo < 0.6 < hi and hi - lo < 0.2
+    assert wilson_interval(0, 10)[0] == 0.0
+
+def test_unknown_engine():
+    try:
+        engines.make_engine("spectra")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+if __name__ == "__main__":
+    test_same_seed_same_game()
+    test_pool_workers_replay_games_exactly()
+    test_games_follow_the_rules()
+    test_search_stats_are_summed_per_game()
+    test_wilson_interval()
+    test_unknown_engine()
+    print("PASS: self-play tests")
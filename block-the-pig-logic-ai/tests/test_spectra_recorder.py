@@ -0,0 +1,80 @@
+"""
+Tests for Spectra record/replay: runs recorded through the fake backend are
+served again without launching anything, with scaled latency.
+"""
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import app
+import move_cache
+import spectra_recorder
+from spectra_recorder import Recorder
+
+PIG = {"q": 2, "r": 5}
+WALLS = [{"q": 3, "r": 4}, {"q": 3, "r": 5}]
+
+def configure(monkeypatch, tmp_path, mode, *fake_args):
+    monkeypatch.setattr(app, "SPECTRA_RECORDING", mode)
+    monkeypatch.setattr(app, "SPECTRA_RECORDER", Recorder(str(tmp_path)))
+    monkeypatch.setattr(app, "SPECTRA_CACHE", move_cache.MoveCache())
+    monkeypatch.setattr(app, "SPECULATE", False)
+    monkeypatch.setattr(app, "SPECTRA_BACKEND", "fake")
+    monkeypatch.setattr(app, "FAKE_SPECTRA_ARGS", ["--startup", "0", "--solve", "0.2", "--jitter", "0", *fake_args])
+
+def ask():
+    return app.app.test_client().post("/api/move", json={"pig_pos": PIG, "walls": WALLS, "phase": "MAIN"}).json
+
+def test_replay_matches_recording(monkeypatch, tmp_path):
+    configure(monkeypatch, tmp_path, "record")
+    recorded = ask()
+    assert recorded["engine"] == "spectra"
+
+    configure(monkeypatch, tmp_path, "replay")
+    monkeypatch.setattr(app, "SPECTRA_BACKEND", "jar")
+    monkeypatch.setattr(app, "SPECTRA_JAR", str(tmp_path / "missing.jar"))
+    monkeypatch.setattr(app, "SPECTRA_REPLAY_SPEED", 0.0)
+    replayed = ask()
+    assert replayed["engine"] == "spectra"
+    assert replayed["move"] == recorded["move"]
+    assert replayed["used_ms"] < recorded["used_ms"]
+
+def test_failures_and_misses(tmp_path):
+    recorder = Recorder(str(tmp_path))
+    def fail():
+        raise RuntimeError("Spectra failed (code 1)")
+    try:
+        recorder.record("problem A", 5, fail)
+    except RuntimeError:
+        pass
+    try:
+        recorder.replay("problem A", 5, speed=0)
+        assert False, "expected RuntimeError"
+    except RuntimeError as e:
+        assert "code 1" in str(e)
+    try:
+        recorder.replay("problem B", 5)
+        assert False, "expected LookupError"
+    except LookupError:
+        pass
+
+def test_scaled_latency_and_timeout(tmp_path):
+    recorder = Recorder(str(tmp_path))
+    recorder.save("slow", spectra_recorder.OUTPUT, 2.0, "[(PlaceWall C_1_0) ]")
+    start = time.monotonic()
+    assert recorder.replay("slow", 5, speed=0.05) == "[(PlaceWall C_1_0) ]"
+    assert 0.1 <= time.monotonic() - start < 1.0
+    try:
+        recorder.replay("slow", 0.2, speed=1.0)
+        assert False, "expected TimeoutExpired"
+    except subprocess.TimeoutExpired:
+        pass
+
+if __name__ == "__main__":
+    import pathlib, tempfile
+    test_failures_and_misses(pathlib.Path(tempfile.mkdtemp()))
+    test_scaled_latency_and_timeout(pathlib.Path(tempfile.mkdtemp()))
+    print("PASS: recorder tests (run the rest under pytest)")
@@ -0,0 +1,71 @@
+"""
+Tests for the streaming Spectra reader: a stand-in process prints a plan and
+keeps running; run_spectra must return the plan and stop it right away.
+"""
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import app
+
+def fake_spectra(monkeypatch, tmp_path, body):
+    script = tmp_path / "fake_spectra.py"
+    pid_file = tmp_path / "pid"
+    script.write_text(f"import os, sys, time\nopen({str(pid_file)!r}, 'w').write(str(os.getpid()))\n" + body)
+    monkeypatch.setattr(app, "SPECTRA_JAR", str(script))
+    monkeypatch.setattr(app, "spectra_cmd", lambda: [sys.executable, str(script)])
+    return pid_file
+
+def is_running(pid_file):
+    try:
+        os.kill(int(pid_file.read_text()), 0)
+    except OSError:
+        return False
+    return True
+
+def test_stops_at_first_plan(monkeypatch, tmp_path):
+    pid_file = fake_spectra(monkeypatch, tmp_path, (
+        "print('solving...', flush=True)\n"
+        "sys.stdout.write('[(PlaceWall c_1_m1)'); sys.stdout.flush(); time.sleep(0.2)\n"
+        "print(' ]', flush=True)\n"
+        "while True:\n    print('still logging', flush=True); time.sleep(0.05)\n"))
+    start = time.monotonic()
+    out = app.run_spectra("problem.clj", timeout_s=10)
+    assert time.monotonic() - start < 5
+    assert out.endswith("]") and "still logging" not in out
+    assert app.extract_placewall_cell(app.parse_first_bracket_list(out)) == "c_1_m1"
+    assert not is_running(pid_file)
+
+def test_failure_marker_stops_early(monkeypatch, tmp_path):
+    pid_file = fake_spectra(monkeypatch, tmp_path, (
+        "sys.stderr.write('Exception in thread \"main\" java.lang.IllegalStateException\\n'); sys.stderr.flush()\n"
+        "time.sleep(30)\n"))
+    start = time.monotonic()
+    try:
+        app.run_spectra("problem.clj", timeout_s=10)
+        assert False, "expected RuntimeError"
+    except RuntimeError as e:
+        assert "IllegalStateException" in str(e)
+    assert time.monotonic() - start < 5
+    assert not is_running(pid_file)
+
+def test_timeout_kills_process(monkeypatch, tmp_path):
+    pid_file = fake_spectra(monkeypatch, tmp_path, "time.sleep(30)\n")
+    try:
+        app.run_spectra("problem.clj", timeout_s=0.5)
+        assert False, "expected TimeoutExpired"
+    except subprocess.TimeoutExpired:
+        pass
+    assert not is_running(pid_file)
+
+def test_exit_without_plan_returns_output(monkeypatch, tmp_path):
+    fake_spectra(monkeypatch, tmp_path, "print('realizability check done')\n")
+    assert app.run_spectra("problem.clj", timeout_s=10) == "realizability check done"
+
+if __name__ == "__main__":
+    # Every test here patches app through monkeypatch, so hand the file to pytest
+    import pytest
+    sys.exit(pytest.main(["-q", __file__]))
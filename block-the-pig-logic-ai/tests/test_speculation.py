@@ -0,0 +1,114 @@
+"""
+Tests for the speculation worker in app.py: after a move is answered, the
+positions after each likely pig reply are solved into the cache.
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import app
+import move_cache
+
+def fake_spectra(calls):
+    def spectra_move(pig_pos, walls, low_priority=False, deadline=None, timings=None):
+        calls.append((dict(pig_pos), len(walls), low_priority))
+        key = app.spectra_cache_key(pig_pos, walls)
+        if key in app.SPECTRA_CACHE:
+            return app.SPECTRA_CACHE[key], ["[SPECTRA] Cache hit: returning previously computed move."]
+        move = {"q": 0, "r": 0}
+        app.SPECTRA_CACHE[key] = move
+        return move, []
+    return spectra_move
+
+def test_predicted_replies_are_shortest_steps():
+    # Right side walled: the pig's shortest steps lead left
+    walls = [{"q": 3, "r": 4}, {"q": 3, "r": 5}, {"q": 3, "r": 6}]
+    replies = app.predicted_replies({"q": 2, "r": 5}, walls)
+    assert {"q": 1, "r": 5} in replies
+    assert all(r["q"] <= 2 for r in replies)
+    # Pig one step from the edge escapes next: nothing to predict
+    assert app.predicted_replies({"q": 1, "r": 5}, []) == []
+
+def test_next_request_hits_the_cache(monkeypatch):
+    calls = []
+    monkeypatch.setattr(app, "spectra_move", fake_spectra(calls))
+    monkeypatch.setattr(app, "SPECTRA_CACHE", {})
+    client = app.app.test_client()
+    walls = [{"q": 3, "r": 4}, {"q": 3, "r": 5}]
+    body = client.post("/api/move", json={"pig_pos": {"q": 2, "r": 5}, "walls": walls, "phase": "MAIN"}).json
+    app._speculation_jobs.join()
+
+    after = walls + [body["move"]]
+    speculative = [c for c in calls if c[2]]
+    assert [c[0] for c in speculative] == app.predicted_replies({"q": 2, "r": 5}, after)
+
+    reply = speculative[0][0]
+    body = client.post("/api/move", json={"pig_pos": reply, "walls": after, "phase": "MAIN"}).json
+    assert any("Cache hit" in t for t in body["thoughts"])
+
+def test_opening_speculates_same_pig(monkeypatch):
+    calls = []
+    monkeypatch.setattr(app, "spectra_move", fake_spectra(calls))
+    monkeypatch.setattr(app, "SPECTRA_CACHE", {})
+    monkeypatch.setattr(app, "OPENING_BOOK", None)
+    client = app.app.test_client()
+    client.post("/api/move", json={"pig_pos": {"q": 2, "r": 5}, "walls": [], "phase": "OPENING", "opening_left": 3})
+    app._speculation_jobs.join()
+    assert [c[0] for c in calls if c[2]] == [{"q": 2, "r": 5}]
+
+def start_speculation(monkeypatch, pig, walls):
+    """Speculate on (pig, walls) on a thread the way the worker does; a list
+    that receives the exception it ends with, and the thread."""
+    monkeypatch.setattr(app, "SPECTRA_BACKEND", "fake")
+    monkeypatch.setattr(app, "FAKE_SPECTRA_ARGS", ["--startup", "0", "--solve", "1", "--jitter", "0"])
+    monkeypatch.setattr(app, "SPECTRA_RECORDING", "off")
+    monkeypatch.setattr(app, "SPECTRA_CACHE", move_cache.MoveCache())
+    key = app.spectra_cache_key(pig, walls)
+    errors = []
+    def speculate():
+        deadline = app.Deadline(app.SPECULATION_BUDGET_SECONDS, cancel=lambda: app.requests_elsewhere(key))
+        try:
+            app.spectra_move(pig, walls, low_priority=True, deadline=deadline)
+        except Exception as e:
+            errors.append(e)
+    background = threading.Thread(target=speculate)
+    background.start()
+    time.sleep(0.3)
+    return errors, background
+
+def test_request_for_the_speculated_board_joins_it(monkeypatch):
+    pig, walls = {"q": 2, "r": 5}, [{"q": 3, "r": 4}]
+    errors, background = start_speculation(monkeypatch, pig, walls)
+    with app.foreground_request(app.spectra_cache_key(pig, walls)):
+        move, thoughts = app.spectra_move(pig, walls, deadline=app.Deadline(10))
+    background.join()
+    assert not errors
+    assert move is not None and any("Joined" in t for t in thoughts)
+
+def test_request_elsewhere_stops_speculation(monkeypatch):
+    pig, walls = {"q": 2, "r": 5}, [{"q": 3, "r": 4}]
+    errors, background = start_speculation(monkeypatch, pig, walls)
+    joined = []
+    def same_board():
+        with app.foreground_request(app.spectra_cache_key(pig, walls)):
+            joined.append(app.spectra_move(pig, walls, deadline=app.Deadline(10)))
+    request = threading.Thread(target=same_board)
+    request.start()
+    time.sleep(0.2)
+    other = {"q": 2, "r": 6}
+    with app.foreground_request(app.spectra_cache_key(other, walls)):
+        start = time.monotonic()
+        background.join()
+        assert time.monotonic() - start < 0.5
+    request.join()
+    assert errors and isinstance(errors[0], app.SpeculationCancelled)
+    # The request that had joined the cancelled run computed the move itself
+    move, thoughts = joined[0]
+    assert move is not None and not any("Joined" in t for t in thoughts)
+
+if __name__ == "__main__":
+    test_predicted_replies_are_shortest_steps()
+    print("PASS: speculation tests (run the rest under pytest)")
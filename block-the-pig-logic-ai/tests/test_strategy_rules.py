@@ -0,0 +1,70 @@
+"""
+Tests for the .sadj strategy-rule compiler and the move filter built from it.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from board import ESCAPE_MASK, NEIGHBORS, cell_index, cells_to_mask
+from search import Searcher
+from strategy_rules import MoveFilter, RuleError, compile_rules, load
+
+SADJ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'adjudicator', 'btp.sadj'))
+PIG = cell_index(2, 5)
+
+def test_btp_rules_compile():
+    rules = load(SADJ)
+    assert [r.name for r in rules] == ["badMove", "lostPattern"]
+    bad, lost = rules
+    # badMove only looks at the placed wall, so it folds into a constant mask
+    assert bad.move_var == "w" and bad.static_mask == ESCAPE_MASK
+    assert lost.move_var is None and lost.static_mask is None
+
+def test_bad_move_eliminates_escape_walls():
+    bad = load(SADJ)[0]
+    assert bad.fires(cell_index(1, 5), 0, cell_index(0, 5))
+    assert not bad.fires(PIG, 0, cell_index(3, 5))
+
+def test_lost_pattern_checks_pig_neighbourhood():
+    lost = load(SADJ)[1]
+    # (3,5), (3,4), (2,4) walled: (1,5), (2,6), (3,6) remain free around the pig
+    walls = cells_to_mask([(3, 5), (3, 4), (2, 4)])
+    # Walling (2,6) leaves (1,5) and (3,6) free, and they are not adjacent
+    assert not lost.fires(PIG, walls, cell_index(2, 6))
+    # Walling (1,5) leaves the adjacent pair (2,6), (3,6)
+    assert lost.fires(PIG, walls, cell_index(1, 5))
+
+def test_filter_counts_and_never_empties():
+    f = MoveFilter(load(SADJ))
+    moves = list(NEIGHBORS[PIG])
+    # Open board: every move leaves an adjacent free pair, so the filter stands down
+    assert f.filter(PIG, 0, moves) == moves
+    assert f.overridden == 1
+    walls = cells_to_mask([(3, 5), (3, 4), (2, 4)])
+    free = [m for m in moves if not walls >> m & 1]
+    assert f.filter(PIG, walls, free) == [cell_index(2, 6)]
+    assert f.pruned == {"badMove": 0, "lostPattern": 2}
+
+def test_search_applies_filter():
+    f = MoveFilter(load(SADJ))
+    walls = cells_to_mask([(3, 5), (3, 4), (2, 4)])
+    move, _, _ = Searcher(move_filter=f).search(PIG, walls, 2)
+    assert move == cell_index(2, 6)
+    assert f.pruned["lostPattern"] > 0
+
+def test_negation_and_errors():
+    rules = compile_rules("strategy inner(w : Cell) :- HasWall(w) & ~Escape(w).\neliminate inner.\n")
+    assert rules[0].static_mask & ESCAPE_MASK == 0
+    with pytest.raises(RuleError):
+        compile_rules("strategy odd(w : Cell) :- Reachable(w).\neliminate odd.\n")
+    with pytest.raises(RuleError):
+        compile_rules("eliminate missing.\n")
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"PASS: {name}")
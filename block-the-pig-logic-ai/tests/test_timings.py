@@ -0,0 +1,51 @@
+"""
+Tests for per-stage timings: spans add up by stage, the null object records
+nothing, and /api/move reports where a Spectra answer spent its time.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import app
+import move_cache
+import timings
+
+def test_spans_accumulate_by_stage():
+    t = timings.Timings()
+    for _ in range(2):
+        with t.span("parse"):
+            time.sleep(0.01)
+    t.add("cache", 1_000_000)
+    assert t.stages["parse"][1] == 2
+    assert t.as_ms()["parse"] >= 20
+    assert t.as_ms()["cache"] == 1.0
+    assert "parse=" in t.summary() and "x2" in t.summary()
+
+def test_null_timings_record_nothing():
+    with timings.NULL.span("parse"):
+        pass
+    timings.NULL.add("cache", 5)
+    assert timings.NULL.as_ms() == {} and timings.NULL.total_ns() == 0
+
+def test_move_response_has_stage_timings(monkeypatch, tmp_path):
+    script = tmp_path / "fake_spectra.py"
+    script.write_text("import time\ntime.sleep(0.05)\nprint('[(PlaceWall c_1_m1)]', flush=True)\ntime.sleep(30)\n")
+    monkeypatch.setattr(app, "SPECTRA_JAR", str(script))
+    monkeypatch.setattr(app, "spectra_cmd", lambda: [sys.executable, str(script)])
+    monkeypatch.setattr(app, "SPECTRA_CACHE", move_cache.MoveCache())
+    monkeypatch.setattr(app, "SPECULATE", False)
+    client = app.app.test_client()
+    body = client.post("/api/move", json={"pig_pos": {"q": 2, "r": 5}, "walls": [], "phase": "MAIN"}).json
+    assert body["engine"] == "spectra"
+    stages = body["timings_ms"]
+    for stage in ("cache", "candidates", "render", "write", "jvm_first_output", "parse"):
+        assert stage in stages
+    assert stages["jvm_first_output"] >= 50
+    assert sum(stages.values()) <= body["used_ms"] + 1
+
+if __name__ == "__main__":
+    test_spans_accumulate_by_stage()
+    test_null_timings_record_nothing()
+    print("PASS: timing tests (run the rest under pytest)")
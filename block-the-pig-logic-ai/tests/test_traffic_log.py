@@ -0,0 +1,65 @@
+"""
+Tests for the /api/move traffic log and its replay tool.
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tools')))
+
+import app
+import load_test
+import replay_traffic
+import traffic_log
+
+def test_records_are_read_back_in_arrival_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "traffic.jsonl")
+        log = traffic_log.TrafficLog(path)
+        for t in (3.0, 1.0, 2.0):
+            assert log.log(t, {"walls": []}, {"move": {"q": int(t), "r": 0}})
+        log.flush()
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"time": 4.0, "requ')   # torn write
+        assert [r["time"] for r in traffic_log.read(path)] == [1.0, 2.0, 3.0]
+        assert log.dropped == 0
+
+def test_api_move_is_logged_and_replayed(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "traffic.jsonl")
+        monkeypatch.setattr(app, "SPECULATE", False)
+        monkeypatch.setattr(app, "TRAFFIC_LOG", traffic_log.TrafficLog(path))
+        # serve() repoints these at the fake backend and a fresh cache
+        for name in ("SPECTRA_BACKEND", "FAKE_SPECTRA_ARGS", "SPECTRA_CACHE"):
+            monkeypatch.setattr(app, name, getattr(app, name))
+        url, server = load_test.serve("fake", "--startup 0 --solve 0.02 --jitter 0")
+        try:
+            body = {"pig_pos": {"q": 2, "r": 5}, "walls": [{"q": 0, "r": 0}], "phase": "MAIN", "budget_ms": 2000}
+            for _ in range(3):
+                reply = load_test.post_move(url, body, 30)
+            app.TRAFFIC_LOG.flush()
+            records = traffic_log.read(path)
+            assert len(records) == 3
+            assert records[0]["request"] == body
+            assert records[-1]["response"]["move"] == reply["move"]
+            assert records[-1]["response"]["engine"] == reply["engine"]
+            assert "thoughts" not in records[0]["response"]
+
+            fast = replay_traffic.replay(url, records, speed=None, concurrency=2)
+            timed = replay_traffic.replay(url, records, speed=10.0)
+        finally:
+            server.shutdown()
+    for r in (fast, timed):
+        assert r["requests"] == 3 and r["errors"] == 0
+        assert r["captured_engines"] == {reply["engine"]: 3}
+        assert r["p50_ms"] <= r["max_ms"]
+
+def test_speed_parsing():
+    assert replay_traffic.parse_speed("max") is None
+    assert replay_traffic.parse_speed("10") == 10.0
+
+if __name__ == "__main__":
+    test_records_are_read_back_in_arrival_order()
+    test_speed_parsing()
+    print("PASS: traffic log tests (run the rest under pytest)")
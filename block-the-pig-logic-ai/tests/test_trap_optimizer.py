@@ -0,0 +1,100 @@
+"""
+Tests for the minimum-walls-to-trap optimizer: exactness against brute force
+on small regions, and status reporting on the hex boards.
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from board import NEIGHBOR_MASKS, ESCAPE_MASK, FULL_MASK, iter_bits
+import trap_optimizer
+from trap_optimizer import TrapOptimizer, game_geometry, hex_geometry, minimum_walls, INF
+
+def region(pig, walls):
+    seen = frontier = 1 << pig
+    while frontier:
+        nxt = 0
+        for c in iter_bits(frontier):
+            nxt |= NEIGHBOR_MASKS[c]
+        frontier = nxt & ~walls & ~seen
+        seen |= frontier
+    return seen
+
+def brute_can_trap(pig, walls, budget):
+    """Plain AND-OR search over every wall in the pig's region and every pig step."""
+    for w in iter_bits(region(pig, walls) & ~(1 << pig)):
+        after = walls | 1 << w
+        if not region(pig, after) & ESCAPE_MASK:
+            return True
+        if budget == 1:
+            continue
+        moves = list(iter_bits(NEIGHBOR_MASKS[pig] & ~after))
+        if all(not ESCAPE_MASK >> s & 1 and brute_can_trap(s, after, budget - 1) for s in moves):
+            return True
+    return False
+
+def brute_value(pig, walls):
+    if not region(pig, walls) & ESCAPE_MASK:
+        return 0
+    for k in range(1, (region(pig, walls) & ~(1 << pig)).bit_count() + 1):
+        if brute_can_trap(pig, walls, k):
+            return k
+    return INF
+
+def small_region_boards(count, seed=0):
+    """Crowded boards where the pig's region is small enough to brute force."""
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        walls = sum(1 << rng.randrange(55) for _ in range(rng.randint(28, 38)))
+        free = [c for c in iter_bits(FULL_MASK & ~walls & ~ESCAPE_MASK)]
+        if not free:
+            continue
+        pig = rng.choice(free)
+        size = region(pig, walls).bit_count()
+        if 3 <= size <= 9 and region(pig, walls) & ESCAPE_MASK:
+            boards.append((pig, walls))
+    return boards
+
+def test_matches_brute_force():
+    for pig, walls in small_region_boards(40):
+        res = TrapOptimizer(game_geometry(), time_budget=30).solve(pig, walls)
+        expected = brute_value(pig, walls)
+        if expected == INF:
+            assert res["status"] == trap_optimizer.STATUS_UNTRAPPABLE, (pig, walls, res)
+        else:
+            assert res["status"] == trap_optimizer.STATUS_OPTIMAL, (pig, walls, res)
+            assert res["value"] == expected, (pig, walls, res, expected)
+
+def test_immediate_trap():
+    walls = [(3, 5), (3, 4), (2, 4), (1, 5), (2, 6)]
+    res = minimum_walls(game_geometry(), (2, 5), walls, time_budget=5)
+    assert res["status"] == trap_optimizer.STATUS_OPTIMAL
+    assert (res["value"], res["move"]) == (1, (3, 6))
+
+def test_open_board_is_untrappable():
+    # The pig reaches a cell next to two escapes before the player can react
+    res = minimum_walls(game_geometry(), (2, 5), [], time_budget=5)
+    assert res["status"] == trap_optimizer.STATUS_UNTRAPPABLE
+    res = minimum_walls(hex_geometry(4), (0, 0), [], time_budget=5)
+    assert res["status"] == trap_optimizer.STATUS_UNTRAPPABLE
+
+def test_hex_ring_cannot_be_walled():
+    h = hex_geometry(3)
+    assert h.escape.bit_count() == 18
+    assert not h.wallable & h.escape
+
+def test_timeout_reports_bounds():
+    res = minimum_walls(hex_geometry(5), (0, 0), [], time_budget=0.5)
+    assert res["status"] in (trap_optimizer.STATUS_UNKNOWN, trap_optimizer.STATUS_BEST_FOUND,
+                             trap_optimizer.STATUS_UNTRAPPABLE)
+    assert res["lower_bound"] >= 1
+    assert res["elapsed"] < 2.0
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"PASS: {name}")
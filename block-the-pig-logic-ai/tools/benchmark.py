@@ -0,0 +1,254 @@
+"""
+Micro and macro benchmarks with stored baselines.
+
+Usage: python tools/benchmark.py run [--quick] [--only SUBSTRING] [--seed 0] [--out FILE]
+                                     [--save-baseline]
+       python tools/benchmark.py compare [BASELINE] CURRENT [--threshold 0.10] [--stat p50]
+       python tools/benchmark.py list
+
+Every benchmark runs over a seeded corpus from positions.py, is warmed up,
+then timed repeatedly; results hold percentiles of seconds per operation.
+Kernels are timed a whole corpus pass at a time, batch kernels (NumPy, from
+corpus.py) one 16384-position batch at a time, move and game benchmarks one
+call at a time. The Spectra pipeline runs against tools/fake_spectra.py with
+no simulated latency, so it measures our own overhead (process launch, problem
+rendering, parsing). Search benchmarks also report the search statistics of
+their timed calls (search.summarize_stats). Results go to data/benchmarks/;
+--save-baseline also makes them the baseline that compare uses by default, and
+compare exits with status 1 when any benchmark got slower than the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import app
+import engines
+import move_cache
+import search
+from board import NEIGHBOR_MASKS, cell_qr, escape_distance, iter_bits, mask_to_walls, pig_steps
+from positions import midgame_positions
+from selfplay import game_rng, play_game
+
+BENCH_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'benchmarks'))
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+# name -> (function(corpus size) -> (op, items[, search totals]), per_call, corpus size, quick corpus size).
+# An op that searches adds its Searcher.stats() to the totals.
+BENCHMARKS = {}
+
+def benchmark(name, size, quick, per_call=False):
+    def register(setup):
+        BENCHMARKS[name] = (setup, per_call, size, quick)
+        return setup
+    return register
+
+def ui(pig, walls):
+    q, r = cell_qr(pig)
+    return {"q": q, "r": r}, mask_to_walls(walls)
+
+# Kernels
+@benchmark("kernel/escape_distance", 2000, 200)
+def bench_escape_distance(seed, n):
+    return (lambda p: escape_distance(*p)), midgame_positions(seed, n)
+
+@benchmark("kernel/pig_steps", 2000, 200)
+def bench_pig_steps(seed, n):
+    return (lambda p: pig_steps(*p)), midgame_positions(seed, n)
+
+@benchmark("kernel/bfs_escape_path", 2000, 200)
+def bench_bfs_escape_path(seed, n):
+    items = []
+    for pig, walls in midgame_positions(seed, n):
+        items.append((*cell_qr(pig), {cell_qr(c) for c in iter_bits(walls)}))
+    return (lambda p: app.bfs_escape_path(*p)), items
+
+@benchmark("kernel/candidate_scoring", 1000, 100)
+def bench_candidate_scoring(seed, n):
+    def score(position):
+        # Distance after each wall next to the pig, as the move ordering does
+        pig, walls = position
+        return [pig_steps(pig, walls | 1 << c)[0] for c in iter_bits(NEIGHBOR_MASKS[pig] & ~walls)]
+    return score, midgame_positions(seed, n)
+
+@benchmark("batch/escape_distance_16k", 8, 2)
+def bench_escape_distance_batch(seed, n):
+    import corpus   # NumPy only for the batch kernels
+    pigs, walls = corpus.generate("midgame", n * 16384, seed)
+    batches = [(pigs[i:i + 16384], walls[i:i + 16384]) for i in range(0, len(pigs), 16384)]
+    return (lambda b: corpus.escape_distances(*b)), batches
+
+# Move selection
+@benchmark("move/search", 40, 8, per_call=True)
+def bench_search(seed, n):
+    totals = {}
+    def move(position):
+        searcher = search.Searcher("random", table={})
+        result = searcher.search(*position, max_depth=4)
+        search.add_stats(totals, searcher.stats())
+        return result
+    return move, midgame_positions(seed, n), totals
+
+@benchmark("move/fallback", 1000, 100)
+def bench_fallback(seed, n):
+    return (lambda p: app.fallback_move(*p)), [ui(*p) for p in midgame_positions(seed, n)]
+
+@benchmark("pipeline/spectra_fake", 20, 4, per_call=True)
+def bench_spectra_pipeline(seed, n):
+    app.SPECTRA_BACKEND = "fake"
+    app.FAKE_SPECTRA_ARGS = ["--startup", "0", "--solve", "0", "--jitter", "0"]
+    app.SPECTRA_RECORDING = "off"
+    def move(position):
+        app.SPECTRA_CACHE = move_cache.MoveCache()   # always a miss
+        return app.spectra_move(*position)
+    return move, [ui(*p) for p in midgame_positions(seed, n)]
+
+# Whole games
+@benchmark("game/search_depth2", 30, 6, per_call=True)
+def bench_game(seed, n):
+    choose = engines.make_engine("search", depth=2)
+    totals = {}
+    retired = []
+    def game(i):
+        # Every game starts from empty chance tables, or the timed games would
+        # replay positions the warmup already stored. The old tables are kept
+        # alive so freeing them is not timed.
+        retired.append(search.CHANCE_TABLES)
+        search.CHANCE_TABLES = {}
+        record = play_game(choose, engines.random_pig, game_rng(seed, i))
+        search.merge_stats(totals, record.get("search", {}))
+        return record
+    return game, list(range(n)), totals
+
+# Running
+def percentile(sorted_values, p):
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+def summarize(samples):
+    s = sorted(samples)
+    mean = statistics.fmean(s)
+    return {"p50": percentile(s, 50), "p90": percentile(s, 90), "p99": percentile(s, 99),
+            "mean": mean, "min": s[0], "max": s[-1], "ops_per_sec": 1 / mean if mean else None,
+            "samples": len(s)}
+
+def run_one(name, seed, quick, repeats):
+    setup, per_call, size, quick_size = BENCHMARKS[name]
+    op, items, *totals = setup(seed, quick_size if quick else size)
+    for item in items[:max(1, len(items) // 10)]:   # warmup
+        op(item)
+    for t in totals:
+        t.clear()
+    samples = []
+    if per_call:
+        for item in items:
+            start = time.perf_counter_ns()
+            op(item)
+            samples.append((time.perf_counter_ns() - start) / 1e9)
+    else:
+        for _ in range(repeats):
+            start = time.perf_counter_ns()
+            for item in items:
+                op(item)
+            samples.append((time.perf_counter_ns() - start) / 1e9 / len(items))
+    result = summarize(samples)
+    result["corpus"] = len(items)
+    if totals:
+        result["search"] = search.summarize_stats(totals[0])
+    return result
+
+def run(args):
+    names = [n for n in BENCHMARKS if args.only is None or args.only in n]
+    results = {"meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "seed": args.seed, "quick": args.quick,
+                        "python": platform.python_version(), "machine": platform.machine(),
+                        "platform": platform.platform()},
+               "benchmarks": {}}
+    for name in names:
+        r = run_one(name, args.seed, args.quick, args.repeats)
+        results["benchmarks"][name] = r
+        print(f"{name:<28} p50 {format_seconds(r['p50']):>10}  p90 {format_seconds(r['p90']):>10}  "
+              f"p99 {format_seconds(r['p99']):>10}  ({r['samples']} samples)", flush=True)
+        if r.get("search"):
+            print("    " + search.format_stats(r["search"]).replace("\n", "\n    "), flush=True)
+
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    out = args.out or os.path.join(BENCH_DIR, time.strftime("bench-%Y%m%d-%H%M%S.json"))
+    save(out, results)
+    print(f"Saved {out}")
+    if args.save_baseline:
+        save(BASELINE_PATH, results)
+        print(f"Saved baseline {BASELINE_PATH}")
+
+def save(path, results):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+def format_seconds(s):
+    if s >= 1:
+        return f"{s:.2f}s"
+    if s >= 1e-3:
+        return f"{s * 1e3:.2f}ms"
+    return f"{s * 1e6:.1f}us"
+
+def compare(baseline, current, stat="p50", threshold=0.10):
+    """[(name, baseline value, current value, ratio, verdict)] for benchmarks in both."""
+    rows = []
+    for name, cur in current["benchmarks"].items():
+        base = baseline["benchmarks"].get(name)
+        if base is None:
+            continue
+        ratio = cur[stat] / base[stat] if base[stat] else float("inf")
+        verdict = "REGRESSION" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "ok"
+        rows.append((name, base[stat], cur[stat], ratio, verdict))
+    return rows
+
+def compare_command(args):
+    paths = args.files if len(args.files) == 2 else [BASELINE_PATH] + args.files
+    with open(paths[0], encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(paths[1], encoding="utf-8") as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.stat, args.threshold)
+    for name, base, cur, ratio, verdict in rows:
+        print(f"{name:<28} {format_seconds(base):>10} -> {format_seconds(cur):>10}  {ratio:6.2f}x  {verdict}")
+    regressions = [r for r in rows if r[4] == "REGRESSION"]
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%} on {args.stat}")
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("run")
+    p.add_argument("--quick", action="store_true", help="small corpora, for a smoke run")
+    p.add_argument("--only", help="run benchmarks whose name contains this")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--repeats", type=int, default=15, help="corpus passes for kernel benchmarks")
+    p.add_argument("--out")
+    p.add_argument("--save-baseline", action="store_true")
+    p = sub.add_parser("compare")
+    p.add_argument("files", nargs="+", help="[baseline] current")
+    p.add_argument("--stat", default="p50", choices=["p50", "p90", "p99", "mean", "min"])
+    p.add_argument("--threshold", type=float, default=0.10)
+    sub.add_parser("list")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run(args)
+    elif args.command == "compare":
+        if len(args.files) > 2:
+            parser.error("compare takes at most two files")
+        compare_command(args)
+    else:
+        for name, (_, per_call, size, quick) in BENCHMARKS.items():
+            print(f"{name:<28} corpus {size} (quick {quick}), {'per call' if per_call else 'per pass'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Generate a position corpus as a NumPy .npy file (see corpus.py).
+
+Usage: python tools/build_corpus.py DISTRIBUTION [--count 1000000] [--seed 0]
+                                    [--opt max_plies=8 ...] [--out FILE]
+       python tools/build_corpus.py selfplay --records FILE [--count N] [--seed 0] [--out FILE]
+
+DISTRIBUTION is start, midgame or endgame; selfplay takes the distinct
+playable positions of a game-record file written by tools/selfplay.py
+--records. The corpus goes to data/corpus/<distribution>-<seed>-<count>.npy
+unless --out is given, with its parameters in a .json next to it.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import corpus
+
+CORPUS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'corpus'))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("distribution", choices=sorted(corpus.DISTRIBUTIONS) + ["selfplay"])
+    parser.add_argument("--count", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--opt", action="append", default=[], metavar="KEY=VALUE",
+                        help="sampler option, e.g. max_plies=12 or max_exits=1")
+    parser.add_argument("--records", help="game-record file for the selfplay distribution")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    options = dict(pair.partition("=")[::2] for pair in args.opt)
+    start = time.time()
+    if args.distribution == "selfplay":
+        if not args.records:
+            parser.error("selfplay needs --records")
+        pigs, walls = corpus.from_records(args.records, args.count, args.seed)
+        options["records"] = os.path.abspath(args.records)
+    else:
+        pigs, walls = corpus.generate(args.distribution, args.count or 1_000_000, args.seed, **options)
+    elapsed = time.time() - start
+
+    out = args.out or os.path.join(CORPUS_DIR, f"{args.distribution}-{args.seed}-{len(pigs)}.npy")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    corpus.save(out, pigs, walls, {"distribution": args.distribution, "seed": args.seed, "count": len(pigs),
+                                   "options": options, "chunk_size": corpus.CHUNK_SIZE})
+    distances = corpus.escape_distances(pigs, walls)
+    print(f"{len(pigs)} positions in {elapsed:.1f}s ({len(pigs) / max(elapsed, 1e-9):,.0f}/s)")
+    print(f"Walls: mean {corpus.popcount(walls).mean():.1f}, escape distance: mean {distances.mean():.2f}, "
+          f"max {distances.max()}")
+    print(f"Saved {out}")
+
+if __name__ == "__main__":
+    main()
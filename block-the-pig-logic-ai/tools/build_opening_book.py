@@ -0,0 +1,136 @@
+"""
+Build the opening book served for phase 'OPENING' requests.
+
+Usage: python tools/build_opening_book.py [--max-walls 3] [--depth 8] [--pig-model random]
+                                         [--outer-samples 8] [--check-depth 4]
+                                         [--out data/opening_book.bin] [--workers N]
+
+Every layout of up to --max-walls random walls inside the pig's 2-ring is
+searched for its best set of three opening walls, and the chain of positions
+it passes through (3, 2 and 1 walls left) goes into the book. Each move is
+then checked on --outer-samples boards that add resetGame's random walls
+outside the ring: it is marked OUTER_OK when, on every one of them, some set
+of the remaining opening walls that contains it scores as well as the best
+set at --check-depth. Only marked moves are served on boards with outer
+walls, which is nearly every real one.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from functools import partial
+from itertools import combinations
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from board import NUM_COLS, NUM_ROWS, cell_index, pig_steps
+from opening_book import (
+    OPENING_BOOK_PATH, OPENING_WALLS, OUTER_OK, START, WINDOW_CELLS, WINDOW_MASK, FLIP,
+    canonical_key, pattern, save,
+)
+from positions import start_position
+from search import PIG_MODELS, WIN, Searcher
+
+def root_layouts(max_walls):
+    """One wall mask per canonical window layout with at most max_walls walls."""
+    seen = set()
+    layouts = []
+    for k in range(max_walls + 1):
+        for cells in combinations(WINDOW_CELLS, k):
+            walls = sum(1 << c for c in cells)
+            key, _ = canonical_key(walls, OPENING_WALLS)
+            if key not in seen:
+                seen.add(key)
+                layouts.append(walls)
+    return layouts
+
+def solve_layout(walls, depth, pig_model, outer_samples=0, check_depth=4):
+    """[(key, move byte)] along the best opening from this layout."""
+    # A table of its own: what earlier layouts left in a shared one would move
+    # the quiescence budget cut and make the book depend on worker scheduling
+    searcher = Searcher(pig_model, table={})
+    move, _, _ = searcher.search(START, walls, depth, free_walls=OPENING_WALLS)
+    entries = []
+    if move is None:
+        return entries
+    for i, cell in enumerate(searcher.plan):
+        left = OPENING_WALLS - i
+        key, flipped = canonical_key(walls, left)
+        byte = FLIP[cell] if flipped else cell
+        rng = random.Random(key)
+        if outer_samples and all(holds(walls | start_position(rng)[1] & ~WINDOW_MASK, cell, left,
+                                       check_depth, pig_model) for _ in range(outer_samples)):
+            byte |= OUTER_OK
+        entries.append((key, byte))
+        walls |= 1 << cell
+    return entries
+
+def holds(walls, move, left, depth, pig_model):
+    """Whether some set of left opening walls containing move scores as well
+    as the best set on walls, at this depth."""
+    searcher = Searcher(pig_model, table={})
+    _, best, _ = searcher.search(START, walls, depth, free_walls=left)
+    _, steps = pig_steps(START, walls)
+    others = [c for c in searcher.opening_candidates(START, walls, steps) if c != move]
+    bound = best - 1e-9
+    for rest in combinations(others, left - 1):
+        after = walls | 1 << move
+        for c in rest:
+            after |= 1 << c
+        if searcher.chance_node(START, after, depth - 1, bound, WIN) >= bound:
+            return True
+    return False
+
+def coverage(max_walls, samples=20000):
+    """Share of game.js resetGame() boards whose 2-ring holds at most max_walls walls."""
+    rng = random.Random(0)
+    hits = 0
+    for _ in range(samples):
+        walls = set()
+        for _ in range(rng.randint(5, 15)):
+            while True:
+                c = cell_index(rng.randrange(NUM_COLS), rng.randrange(NUM_ROWS))
+                if c != START and c not in walls:
+                    walls.add(c)
+                    break
+        hits += bin(pattern(sum(1 << c for c in walls))).count("1") <= max_walls
+    return hits / samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max-walls", type=int, default=3)
+    parser.add_argument("--depth", type=int, default=8)
+    parser.add_argument("--pig-model", choices=PIG_MODELS, default="random")
+    parser.add_argument("--outer-samples", type=int, default=8,
+                        help="boards with outer walls each move is checked on (0: none)")
+    parser.add_argument("--check-depth", type=int, default=4)
+    parser.add_argument("--out", default=OPENING_BOOK_PATH)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    layouts = root_layouts(args.max_walls)
+    print(f"Searching {len(layouts)} canonical layouts (depth {args.depth}, {args.pig_model} pig) "
+          f"with {args.workers} workers...")
+    start = time.time()
+    entries = {}
+    work = partial(solve_layout, depth=args.depth, pig_model=args.pig_model,
+                   outer_samples=args.outer_samples, check_depth=args.check_depth)
+    with Pool(args.workers) as pool:
+        # In layout order, so a key reached from several layouts always keeps
+        # the first layout's move and rebuilds give the same book
+        for i, chain in enumerate(pool.imap(work, layouts, chunksize=4), 1):
+            for key, move in chain:
+                entries.setdefault(key, move)
+            if i % 100 == 0:
+                print(f"  {i}/{len(layouts)} layouts, {len(entries)} entries ({time.time() - start:.0f}s)")
+    save(args.out, entries)
+    print(f"Wrote {len(entries)} entries ({os.path.getsize(args.out)} bytes) to {args.out} "
+          f"in {time.time() - start:.1f}s")
+    confirmed = sum(1 for move in entries.values() if move & OUTER_OK)
+    print(f"Ring layouts cover {coverage(args.max_walls):.0%} of random starting boards; "
+          f"{confirmed} of {len(entries)} entries also answer with walls outside the ring")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Build the local-pattern database used by the search evaluation.
+
+Usage: python tools/build_pattern_db.py [--out data/pattern_db.bin] [--workers N]
+"""
+import argparse
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from pattern_db import CLASS_SIGNATURES, PATTERN_DB_PATH, build_class, save
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", default=PATTERN_DB_PATH)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    print(f"Building {len(CLASS_SIGNATURES)} edge/parity classes with {args.workers} workers...")
+    start = time.time()
+    with Pool(args.workers) as pool:
+        tables = pool.map(build_class, CLASS_SIGNATURES)
+    save(args.out, tables)
+    size = sum(len(t) for t in tables)
+    print(f"Wrote {size} patterns ({os.path.getsize(args.out) / 1024:.0f} KiB) to {args.out} in {time.time() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Compare wall engines on strength against latency.
+
+Usage: python tools/compare_engines.py [--engines SPEC ...] [--games 200] [--positions 300]
+                                       [--corpus FILE | --answers FILE] [--plies 3] [--seed 0] [--workers N]
+                                       [--tiers 1,10,100,1000] [--out FILE]
+
+SPEC is an engine from engines.py with options, e.g. search:depth=4 or
+search:depth=12,pig_model=deterministic; "spectra" plays app.spectra_move with
+the backend chosen by BTP_SPECTRA_BACKEND (only the jar backend says anything
+about strength). Every engine plays the same seeded games against the random
+pig and answers the same corpus positions (corpus.py midgame, or --corpus FILE
+from tools/build_corpus.py, or the positions of an --answers file). Corpus
+answers are checked against oracle.py: the 1-ply column is the share of moves
+among the brute-force one-wall optima, the k-ply column the share among the
+exact --plies optima. Latency is engine ms per move over games and positions,
+--workers engines' moves running at a time.
+
+The table marks the Pareto front (no other engine wins as often with lower
+p50 and p99) and, for each --tiers p99 budget in ms, the strongest engine
+inside it. Results go to data/engine_comparison/.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import corpus
+import engines
+import oracle
+import search
+from selfplay import game_rng, play_game, wilson_interval
+
+OUT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'engine_comparison'))
+
+DEFAULT_ENGINES = [
+    "fallback", "greedy", "logic_ai", "minimax2", "heuristic",
+    "search:depth=2", "search:depth=4", "search:depth=6",
+    "search:depth=12,pig_model=deterministic", "optimizer:time_budget=0.2",
+]
+
+def spectra_engine():
+    import app
+    from board import cell_index, cell_qr, mask_to_walls
+    def choose(pig, walls, opening_left=0):
+        q, r = cell_qr(pig)
+        move, _ = app.spectra_move({"q": q, "r": r}, mask_to_walls(walls))
+        if move is None:
+            move, _ = app.fallback_move({"q": q, "r": r}, mask_to_walls(walls))
+        return None if move is None else cell_index(move["q"], move["r"])
+    return choose
+
+def make(spec):
+    return spectra_engine() if spec == "spectra" else engines.from_spec(spec)
+
+_worker = {}
+
+def init_worker(spec):
+    _worker["choose"] = make(spec)
+
+def play(job):
+    kind, seed, i, pig, walls = job
+    # Empty chance tables per job: what earlier jobs left in this worker would
+    # move the quiescence budget cut and change the engine's moves
+    search.CHANCE_TABLES.clear()
+    if kind == "game":
+        record = play_game(_worker["choose"], engines.random_pig, game_rng(seed, i))
+        return kind, i, record["won"], [ply[2] for ply in record["plies"]]
+    start = time.perf_counter()
+    move = _worker["choose"](pig, walls, 0)
+    return kind, i, move, [(time.perf_counter() - start) * 1000]
+
+def percentile(values, p):
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round((len(s) - 1) * p / 100)))] if s else None
+
+def evaluate(spec, positions, answers, games, seed, workers):
+    jobs = [("game", seed, i, None, None) for i in range(games)]
+    jobs += [("position", seed, i, pig, walls) for i, (pig, walls) in enumerate(positions)]
+    wins, latencies, agree_one, agree_k = 0, [], 0, 0
+    with Pool(workers, initializer=init_worker, initargs=(spec,)) as pool:
+        for kind, i, result, ms in pool.imap_unordered(play, jobs, chunksize=4):
+            latencies += ms
+            if kind == "game":
+                wins += result
+            elif result is not None:
+                one, k = answers[i]
+                agree_one += one >> result & 1
+                agree_k += k >> result & 1
+    lo, hi = wilson_interval(wins, games)
+    n = max(len(positions), 1)
+    return {"engine": spec, "games": games, "wins": wins, "win_rate": wins / max(games, 1),
+            "ci": [lo, hi], "p50_ms": percentile(latencies, 50), "p99_ms": percentile(latencies, 99),
+            "moves": len(latencies), "agree_1ply": agree_one / n, "agree_kply": agree_k / n}
+
+def pareto_front(rows):
+    """Engines no other engine beats on win rate, p50 and p99 at once."""
+    def dominates(a, b):
+        better_or_equal = (a["win_rate"] >= b["win_rate"] and a["p50_ms"] <= b["p50_ms"]
+                           and a["p99_ms"] <= b["p99_ms"])
+        strictly = (a["win_rate"] > b["win_rate"] or a["p50_ms"] < b["p50_ms"] or a["p99_ms"] < b["p99_ms"])
+        return better_or_equal and strictly
+    return [r["engine"] for r in rows if not any(dominates(o, r) for o in rows if o is not r)]
+
+def tier_picks(rows, tiers):
+    """{p99 budget ms: strongest engine within it, or None}"""
+    picks = {}
+    for budget in tiers:
+        inside = [r for r in rows if r["p99_ms"] <= budget]
+        best = max(inside, key=lambda r: (r["win_rate"], r["agree_kply"], -r["p50_ms"]), default=None)
+        picks[budget] = best["engine"] if best else None
+    return picks
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", nargs="+", default=DEFAULT_ENGINES, metavar="SPEC")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--positions", type=int, default=300)
+    parser.add_argument("--corpus", help=".npy corpus from tools/build_corpus.py")
+    parser.add_argument("--answers", help="oracle answer file (tools/oracle_answers.py) to take positions from")
+    parser.add_argument("--plies", type=int, default=3, help="oracle depth in walls")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--tiers", default="1,10,100,1000", help="p99 budgets in ms")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    start = time.time()
+    if args.answers:
+        stored = oracle.Answers(args.answers)
+        solved = stored.rows[:args.positions]
+        positions = stored.positions(args.positions)
+        args.plies = int(solved["plies"].min()) if len(solved) else args.plies
+    else:
+        if args.corpus:
+            pigs, walls = corpus.load(args.corpus)
+            pigs, walls = pigs[:args.positions], walls[:args.positions]
+        else:
+            pigs, walls = corpus.generate("midgame", args.positions, args.seed)
+        positions = corpus.to_positions(pigs, walls)
+        solved = oracle.solve(positions, args.plies, args.workers)
+    answers = list(zip(solved["one_moves"].tolist(), solved["k_moves"].tolist()))
+    print(f"Oracle: {len(positions)} positions at {args.plies} plies in {time.time() - start:.1f}s", flush=True)
+
+    rows = []
+    for spec in args.engines:
+        start = time.time()
+        rows.append(evaluate(spec, positions, answers, args.games, args.seed, args.workers))
+        print(f"  {spec}: {time.time() - start:.1f}s", flush=True)
+
+    front = pareto_front(rows)
+    tiers = tier_picks(rows, [float(t) for t in args.tiers.split(",")])
+    print(f"\n{'engine':<42}{'win':>7}  {'95% CI':<13}{'p50 ms':>9}{'p99 ms':>9}{'1-ply':>7}"
+          f"{f'{args.plies}-ply':>7}")
+    for r in sorted(rows, key=lambda r: r["p50_ms"]):
+        lo, hi = r["ci"]
+        mark = " *" if r["engine"] in front else ""
+        print(f"{r['engine']:<42}{r['win_rate']:>7.1%}  {lo:>5.1%}-{hi:<6.1%}{r['p50_ms']:>9.3f}{r['p99_ms']:>9.3f}"
+              f"{r['agree_1ply']:>7.0%}{r['agree_kply']:>7.0%}{mark}")
+    print("* Pareto front (win rate vs p50/p99)")
+    for budget, engine in tiers.items():
+        print(f"p99 <= {budget:g} ms: {engine or '-'}")
+
+    os.makedirs(OUT_DIR, exist_ok=True)
+    out = args.out or os.path.join(OUT_DIR, time.strftime("compare-%Y%m%d-%H%M%S.json"))
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"seed": args.seed, "games": args.games, "positions": len(positions), "plies": args.plies,
+                   "rows": rows, "pareto": front, "tiers": {str(k): v for k, v in tiers.items()}}, f, indent=2)
+    print(f"Saved {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Stand-in for `java -jar Spectra.jar problem.clj` that needs no JVM.
+
+Usage: python tools/fake_spectra.py problem.clj [--startup 0.5] [--solve 1.0] [--jitter 0.2]
+                                               [--fail-rate 0] [--hang-rate 0] [--empty-rate 0]
+                                               [--tail 0] [--seed 0]
+
+Reads the :start and :goal blocks that app.py writes and prints a plan in
+Spectra's format: [(PlaceWall C_x_y) ] when the goal wall can be placed, []
+when the goal already holds or the cell is the pig's. Latency and outcomes are
+simulated: --startup is the JVM start before the first output, --solve the mean
+solve time (+-jitter), --fail-rate the share of runs that die with a Java
+exception, --hang-rate the share that never answer (the caller's timeout must
+kill them), --empty-rate the share that print [] anyway, and --tail how long
+to keep logging after the plan. Outcomes are drawn from the problem text and
+--seed, so the same board always behaves the same way.
+
+Select it in app.py with SPECTRA_BACKEND = "fake" (or BTP_SPECTRA_BACKEND=fake)
+and pass flags through FAKE_SPECTRA_ARGS (or BTP_FAKE_SPECTRA_ARGS).
+"""
+import argparse
+import hashlib
+import random
+import re
+import sys
+import time
+
+START_RE = re.compile(r":start\s*\[(.*?)\]", re.DOTALL)
+GOAL_RE = re.compile(r":goal\s*\[(.*?)\]", re.DOTALL)
+FACT_RE = re.compile(r"\(\s*(\w+)\s+([cC]_\w+)\s*\)")
+
+def parse_problem(text):
+    """(pig cell, wall cells, free cells, goal cell) from a generated problem."""
+    start, goal = START_RE.search(text), GOAL_RE.search(text)
+    if not start or not goal:
+        raise ValueError("problem has no :start [...] or :goal [...] block")
+    pig, walls, free = None, set(), set()
+    for pred, cell in FACT_RE.findall(start.group(1)):
+        if pred == "OccupiedByPig":
+            pig = cell
+        elif pred == "HasWall":
+            walls.add(cell)
+        elif pred == "Free":
+            free.add(cell)
+    goals = [cell for pred, cell in FACT_RE.findall(goal.group(1)) if pred == "HasWall"]
+    if pig is None or len(goals) != 1:
+        raise ValueError("expected one OccupiedByPig fact and one HasWall goal")
+    return pig, walls, free, goals[0]
+
+def plan_for(pig, walls, free, goal):
+    if goal in walls or goal == pig or goal not in free:
+        return "[]"
+    return f"[(PlaceWall {goal}) ]"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("problem")
+    parser.add_argument("--startup", type=float, default=0.5)
+    parser.add_argument("--solve", type=float, default=1.0)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--empty-rate", type=float, default=0.0)
+    parser.add_argument("--tail", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with open(args.problem, "r", encoding="utf-8") as f:
+        text = f.read()
+    digest = hashlib.sha256(f"{args.seed}:{text}".encode("utf-8")).digest()
+    rng = random.Random(int.from_bytes(digest[:8], "little"))
+    roll = rng.random()
+
+    time.sleep(args.startup)
+    print("Spectra (fake) 0.0: loading problem", flush=True)
+    try:
+        problem = parse_problem(text)
+    except ValueError as e:
+        print(f'Exception in thread "main" java.lang.IllegalArgumentException: {e}', file=sys.stderr, flush=True)
+        return 1
+
+    if roll < args.fail_rate:
+        time.sleep(args.solve * rng.random())
+        print('Exception in thread "main" java.lang.RuntimeException: simulated failure', file=sys.stderr, flush=True)
+        return 1
+    roll -= args.fail_rate
+    if roll < args.hang_rate:
+        print("Searching...", flush=True)
+        while True:
+            time.sleep(3600)
+    roll -= args.hang_rate
+
+    print("Searching...", flush=True)
+    time.sleep(max(0.0, args.solve * (1 + args.jitter * (2 * rng.random() - 1))))
+    print("[]" if roll < args.empty_rate else plan_for(*problem), flush=True)
+
+    end = time.monotonic() + args.tail
+    while time.monotonic() < end:
+        print("Search statistics: expanding remaining nodes", flush=True)
+        time.sleep(0.05)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Load-test /api/move with concurrent simulated games.
+
+Usage: python tools/load_test.py [--url http://127.0.0.1:5000 | --serve [--backend fake] [--fake-args ARGS]]
+                                 [--concurrency 1,4,16] [--duration 30] [--budget-ms MS] [--seed 0]
+                                 [--out data/loadtest/load-<time>.json]
+
+Each client thread plays games the way the browser does: a resetGame start,
+three OPENING requests while the pig stands still, then MAIN requests with
+the pig's reply (game.js pigTurn: a random shortest step) played locally
+between requests. Every --concurrency level runs for --duration seconds and
+reports throughput, client-side latency percentiles, the engine mix
+(fallback count), timeouts by stage (btp_timeouts_total deltas from
+/metrics) and HTTP errors.
+
+--serve runs app.py in this process on a free port with the given Spectra
+backend and a fresh in-memory move cache. The default "fake" backend is
+tools/fake_spectra.py with --fake-args as its latency model (default a JVM
+startup of 0.5s and a 1s solve), so the one-process-per-candidate design
+can be pushed without Java; --backend jar uses the real Spectra.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from board import ESCAPE_MASK, INF, cell_index, cell_qr, escape_distance, mask_to_walls
+from positions import pig_reply, start_position
+
+OUT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'loadtest'))
+OPENING_WALLS = 3
+DEFAULT_FAKE_ARGS = "--startup 0.5 --solve 1 --jitter 0.2"
+METRIC_RE = re.compile(r'^btp_timeouts_total\{stage="([^"]*)"\} (\S+)$', re.MULTILINE)
+
+def serve(backend="fake", fake_args=DEFAULT_FAKE_ARGS):
+    """Start app.py on a free local port; returns (url, server)."""
+    from werkzeug.serving import make_server
+    import app
+    import move_cache
+    app.SPECTRA_BACKEND = backend
+    app.FAKE_SPECTRA_ARGS = fake_args.split()
+    app.SPECTRA_CACHE = move_cache.MoveCache()
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)   # no access log per request
+    server = make_server("127.0.0.1", 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server
+
+def post_move(url, body, timeout):
+    req = urllib.request.Request(url + "/api/move", data=json.dumps(body).encode(),
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.load(resp)
+
+def timeouts(url):
+    """{stage: count} from the server's btp_timeouts_total."""
+    with urllib.request.urlopen(url + "/metrics", timeout=10) as resp:
+        text = resp.read().decode()
+    return {stage: float(value) for stage, value in METRIC_RE.findall(text)}
+
+def play(url, rng, stop_at, budget_ms, http_timeout, results):
+    """Play games until stop_at; one result dict per request, one per finished game."""
+    while time.monotonic() < stop_at:
+        pig, walls = start_position(rng)
+        placed = 0
+        while time.monotonic() < stop_at:
+            q, r = cell_qr(pig)
+            body = {"pig_pos": {"q": q, "r": r}, "walls": mask_to_walls(walls),
+                    "phase": "OPENING" if placed < OPENING_WALLS else "MAIN",
+                    "opening_left": OPENING_WALLS - placed}   # as game.js sends it
+            if budget_ms:
+                body["budget_ms"] = budget_ms
+            start = time.perf_counter()
+            try:
+                reply = post_move(url, body, http_timeout)
+            except (urllib.error.URLError, OSError, ValueError) as e:
+                results.append({"kind": "request", "error": type(e).__name__,
+                                "ms": (time.perf_counter() - start) * 1000})
+                break
+            results.append({"kind": "request", "ms": (time.perf_counter() - start) * 1000,
+                            "engine": reply.get("engine"), "used_ms": reply.get("used_ms")})
+            move = reply.get("move")
+            if move is None:
+                results.append({"kind": "game", "won": False})
+                break
+            walls |= 1 << cell_index(move["q"], move["r"])
+            placed += 1
+            if escape_distance(pig, walls) == INF:
+                results.append({"kind": "game", "won": True})
+                break
+            if placed < OPENING_WALLS:
+                continue
+            pig = pig_reply(pig, walls, rng)
+            if ESCAPE_MASK >> pig & 1:
+                results.append({"kind": "game", "won": False})
+                break
+
+def percentile(values, p):
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round((len(s) - 1) * p / 100)))] if s else None
+
+def run_level(url, concurrency, duration, budget_ms=None, seed=0, http_timeout=150.0):
+    before = timeouts(url)
+    results = []
+    stop_at = time.monotonic() + duration
+    start = time.monotonic()
+    threads = [threading.Thread(target=play, args=(url, random.Random(f"{seed}:{concurrency}:{i}"), stop_at,
+                                                   budget_ms, http_timeout, results))
+               for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+    after = timeouts(url)
+
+    requests = [r for r in results if r["kind"] == "request"]
+    answered = [r for r in requests if "error" not in r]
+    games = [r for r in results if r["kind"] == "game"]
+    latencies = [r["ms"] for r in answered]
+    engines = {}
+    for r in answered:
+        engines[r["engine"]] = engines.get(r["engine"], 0) + 1
+    return {"concurrency": concurrency, "seconds": elapsed, "requests": len(answered),
+            "errors": len(requests) - len(answered), "throughput": len(answered) / elapsed,
+            "p50_ms": percentile(latencies, 50), "p90_ms": percentile(latencies, 90),
+            "p99_ms": percentile(latencies, 99), "max_ms": max(latencies, default=None),
+            "engines": engines, "fallbacks": engines.get("fallback", 0),
+            "timeouts": {s: after.get(s, 0) - before.get(s, 0) for s in after if after.get(s, 0) != before.get(s, 0)},
+            "games": len(games), "wins": sum(g["won"] for g in games)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--serve", action="store_true", help="run app.py in this process")
+    parser.add_argument("--backend", default="fake", choices=["fake", "jar"])
+    parser.add_argument("--fake-args", default=DEFAULT_FAKE_ARGS)
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated client counts")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per level")
+    parser.add_argument("--budget-ms", type=int, help="budget_ms sent with each request")
+    parser.add_argument("--http-timeout", type=float, default=150.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    url = args.url
+    if args.serve:
+        url, _ = serve(args.backend, args.fake_args)
+        print(f"Serving app.py at {url} with the {args.backend} backend")
+
+    rows = []
+    for level in [int(c) for c in args.concurrency.split(",")]:
+        row = run_level(url, level, args.duration, args.budget_ms, args.seed, args.http_timeout)
+        rows.append(row)
+        print(f"  {level} clients: {row['requests']} requests, {row['errors']} errors", flush=True)
+
+    print(f"\n{'clients':>7}{'req/s':>8}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+          f"{'fallback':>10}{'errors':>8}  timeouts / engines")
+    for r in rows:
+        fmt = lambda v: f"{v:9.0f}" if v is not None else f"{'-':>9}"
+        engines = " ".join(f"{k}={v}" for k, v in sorted(r["engines"].items()))
+        stalls = " ".join(f"{k}={v:g}" for k, v in sorted(r["timeouts"].items())) or "none"
+        print(f"{r['concurrency']:>7}{r['throughput']:>8.2f}{fmt(r['p50_ms'])}{fmt(r['p90_ms'])}{fmt(r['p99_ms'])}"
+              f"{fmt(r['max_ms'])}{r['fallbacks']:>10}{r['errors']:>8}  {stalls} / {engines}")
+
+    os.makedirs(OUT_DIR, exist_ok=True)
+    out = args.out or os.path.join(OUT_DIR, time.strftime("load-%Y%m%d-%H%M%S.json"))
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"url": url, "serve": args.serve, "backend": args.backend if args.serve else None,
+                   "fake_args": args.fake_args if args.serve else None, "duration": args.duration,
+                   "budget_ms": args.budget_ms, "levels": rows}, f, indent=2)
+    print(f"Saved {out}")
+
+if __name__ == "__main__":
+    main()
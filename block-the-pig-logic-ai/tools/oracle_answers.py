@@ -0,0 +1,110 @@
+"""
+Build and check against the brute-force oracle's answer file.
+
+Usage: python tools/oracle_answers.py build [--corpus FILE | --distribution midgame --count 10000]
+                                            [--seed 0] [--plies 3] [--workers N] [--answers FILE]
+       python tools/oracle_answers.py check SPEC [SPEC ...] [--answers FILE] [--limit N]
+                                            [--min-agreement 0.9] [--show 5] [--workers N]
+
+build answers every position not yet in the file at --plies or deeper
+(oracle.solve: NumPy batches on a process pool) and merges the results into
+the file, data/oracle/answers.npy by default. check plays each engine SPEC
+(as in tools/compare_engines.py) on the stored positions and prints how
+often its move is among the one-ply and k-ply optima, with a few of the
+positions where it is not. It exits with status 1 when any engine's k-ply
+agreement is below --min-agreement, so it can run in CI after an engine
+change.
+"""
+import argparse
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import corpus
+import engines
+import oracle
+from board import cell_qr, iter_bits
+
+def build(args):
+    if args.corpus:
+        pigs, walls = corpus.load(args.corpus)
+    else:
+        pigs, walls = corpus.generate(args.distribution, args.count, args.seed)
+    positions = corpus.to_positions(pigs, walls)
+    if os.path.exists(args.answers):
+        rows = oracle.Answers(args.answers).rows
+        known = set(rows["key"][rows["plies"] >= args.plies].tolist())
+        positions = [(p, w) for p, w in positions if oracle.position_key(p, w) not in known]
+    start = time.time()
+    rows = oracle.solve(positions, args.plies, args.workers)
+    elapsed = time.time() - start
+    total = oracle.save_answers(rows, args.answers)
+    print(f"Solved {len(rows)} positions at {args.plies} plies in {elapsed:.1f}s "
+          f"({len(rows) / max(elapsed, 1e-9):,.0f}/s)")
+    print(f"{args.answers}: {total} positions")
+
+_worker = {}
+
+def init_worker(spec):
+    _worker["choose"] = engines.from_spec(spec)
+
+def answer(position):
+    return _worker["choose"](*position, 0)
+
+def check(args):
+    stored = oracle.Answers(args.answers)
+    positions = stored.positions(args.limit)
+    rows = stored.rows[:len(positions)]
+    failed = False
+    for spec in args.specs:
+        start = time.time()
+        with Pool(args.workers, initializer=init_worker, initargs=(spec,)) as pool:
+            moves = pool.map(answer, positions, chunksize=64)
+        bits = np.array([0 if m is None else 1 << m for m in moves], dtype=np.uint64)
+        one = (rows["one_moves"] & bits) != 0
+        k = (rows["k_moves"] & bits) != 0
+        print(f"{spec}: {one.mean():.1%} one-ply, {k.mean():.1%} k-ply agreement "
+              f"over {len(positions)} positions ({time.time() - start:.1f}s)")
+        for i in np.nonzero(~k)[0][:args.show]:
+            pig, walls = positions[i]
+            best = [cell_qr(c) for c in iter_bits(int(rows["k_moves"][i]))]
+            played = None if moves[i] is None else cell_qr(moves[i])
+            print(f"  pig {cell_qr(pig)} walls {walls:#x}: played {played}, "
+                  f"optimal {best} (value {rows['k_value'][i]})")
+        if k.mean() < args.min_agreement:
+            failed = True
+    if failed:
+        print(f"k-ply agreement below {args.min_agreement:.0%}")
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("build")
+    p.add_argument("--corpus", help=".npy corpus from tools/build_corpus.py")
+    p.add_argument("--distribution", default="midgame", choices=sorted(corpus.DISTRIBUTIONS))
+    p.add_argument("--count", type=int, default=10000)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--plies", type=int, default=3)
+    p.add_argument("--workers", type=int, default=os.cpu_count())
+    p.add_argument("--answers", default=oracle.ANSWERS_PATH)
+    p = sub.add_parser("check")
+    p.add_argument("specs", nargs="+", metavar="SPEC")
+    p.add_argument("--answers", default=oracle.ANSWERS_PATH)
+    p.add_argument("--limit", type=int)
+    p.add_argument("--min-agreement", type=float, default=0.0)
+    p.add_argument("--show", type=int, default=5, help="disagreements to print per engine")
+    p.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    if args.command == "build":
+        build(args)
+    else:
+        check(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Read Spectra outputs back from the debug capture archive.
+
+Usage: python tools/query_debug.py <board key or prefix> [--dir spectra_debug]
+       python tools/query_debug.py --list [--dir spectra_debug]
+
+The board key is the sha256 from board_cache_key in app.py; the thoughts of a
+failed request show its first 12 characters.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import debug_capture
+
+DEFAULT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'spectra_debug'))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("key", nargs="?", default="", help="board key or prefix")
+    parser.add_argument("--dir", default=DEFAULT_DIR)
+    parser.add_argument("--list", action="store_true", help="list captures instead of printing them")
+    args = parser.parse_args()
+
+    if args.list:
+        for e in debug_capture.read_index(args.dir):
+            if e["key"].startswith(args.key):
+                stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(e["time"]))
+                print(f"{stamp}  {e['key'][:12]}  {e['tag']:<12} segment {e['segment']} ({e['length']} bytes)")
+        return
+
+    if not args.key:
+        parser.error("give a board key (or --list)")
+    records = debug_capture.find(args.dir, args.key)
+    if not records:
+        print(f"No captures for {args.key}")
+        sys.exit(1)
+    for r in records:
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(r["time"]))
+        print(f"=== {r['tag']}  {r['key']}  {stamp}")
+        print(r["text"])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Replay /api/move traffic captured with BTP_TRAFFIC_LOG against a server.
+
+Usage: python tools/replay_traffic.py LOG [--url http://127.0.0.1:5000 | --serve [--backend fake] [--fake-args ARGS]]
+                                          [--speed 1 | 10 | max] [--concurrency 16] [--limit N]
+                                          [--out data/loadtest/replay-<time>.json]
+
+Requests are sent on the captured arrival schedule divided by --speed (1 is
+real time, 10 ten times faster), each on its own thread so a slow answer
+never holds back the requests due after it; "lateness" is how far behind
+schedule they actually went out. --speed max sends them back to back with
+--concurrency requests in flight. The report gives throughput, latency
+percentiles, the engine mix next to the captured one, how often the server
+answered the captured move, and timeouts by stage from /metrics. --serve
+runs app.py in this process as tools/load_test.py does.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import traffic_log
+from load_test import DEFAULT_FAKE_ARGS, OUT_DIR, percentile, post_move, serve, timeouts
+
+MAX_THREADS = 256   # in-flight requests when replaying on the captured schedule
+
+def send(url, record, due, http_timeout):
+    """Replay one record; a result dict."""
+    sent = time.monotonic()
+    result = {"late_ms": (sent - due) * 1000 if due is not None else 0.0,
+              "captured_engine": record["response"].get("engine"),
+              "captured_ms": record["response"].get("used_ms")}
+    try:
+        reply = post_move(url, record["request"], http_timeout)
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        result.update(error=type(e).__name__, ms=(time.monotonic() - sent) * 1000)
+        return result
+    result.update(ms=(time.monotonic() - sent) * 1000, engine=reply.get("engine"),
+                  same_move=reply.get("move") == record["response"].get("move"))
+    return result
+
+def replay(url, records, speed=1.0, concurrency=16, http_timeout=150.0):
+    """Send every record; speed None is as fast as possible. One result per record, in order."""
+    before = timeouts(url)
+    start = time.monotonic()
+    if speed is None:
+        with ThreadPoolExecutor(concurrency) as pool:
+            futures = [pool.submit(send, url, r, None, http_timeout) for r in records]
+    else:
+        t0 = records[0]["time"] if records else 0.0
+        with ThreadPoolExecutor(MAX_THREADS) as pool:
+            futures = []
+            for r in records:
+                due = start + (r["time"] - t0) / speed
+                wait = due - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                futures.append(pool.submit(send, url, r, due, http_timeout))
+    results = [f.result() for f in futures]
+    elapsed = time.monotonic() - start
+    after = timeouts(url)
+    return summarize(results, elapsed, before, after)
+
+def summarize(results, elapsed, before, after):
+    answered = [r for r in results if "error" not in r]
+    latencies = [r["ms"] for r in answered]
+    late = [r["late_ms"] for r in results]
+    engines, captured = {}, {}
+    for r in answered:
+        engines[r["engine"]] = engines.get(r["engine"], 0) + 1
+    for r in results:
+        captured[r["captured_engine"]] = captured.get(r["captured_engine"], 0) + 1
+    return {"seconds": elapsed, "requests": len(answered), "errors": len(results) - len(answered),
+            "throughput": len(answered) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 50), "p90_ms": percentile(latencies, 90),
+            "p99_ms": percentile(latencies, 99), "max_ms": max(latencies, default=None),
+            "captured_p50_ms": percentile([r["captured_ms"] for r in results if r["captured_ms"] is not None], 50),
+            "late_p99_ms": percentile(late, 99), "late_max_ms": max(late, default=None),
+            "same_move": sum(r["same_move"] for r in answered) / len(answered) if answered else None,
+            "engines": engines, "captured_engines": captured,
+            "timeouts": {s: after.get(s, 0) - before.get(s, 0) for s in after if after.get(s, 0) != before.get(s, 0)}}
+
+def parse_speed(text):
+    return None if text == "max" else float(text)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", help="JSONL file written with BTP_TRAFFIC_LOG")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--serve", action="store_true", help="run app.py in this process")
+    parser.add_argument("--backend", default="fake", choices=["fake", "jar"])
+    parser.add_argument("--fake-args", default=DEFAULT_FAKE_ARGS)
+    parser.add_argument("--speed", type=parse_speed, default=1.0, help="time scale, or max")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight with --speed max")
+    parser.add_argument("--limit", type=int, help="replay only the first N requests")
+    parser.add_argument("--http-timeout", type=float, default=150.0)
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    records = traffic_log.read(args.log)[:args.limit]
+    url = args.url
+    if args.serve:
+        url, _ = serve(args.backend, args.fake_args)
+        print(f"Serving app.py at {url} with the {args.backend} backend")
+    span = records[-1]["time"] - records[0]["time"] if records else 0.0
+    speed = "as fast as possible" if args.speed is None else f"{args.speed:g}x ({span / args.speed:.0f}s)"
+    print(f"Replaying {len(records)} requests captured over {span:.0f}s at {speed}", flush=True)
+
+    r = replay(url, records, args.speed, args.concurrency, args.http_timeout)
+    fmt = lambda v: f"{v:.0f}" if v is not None else "-"
+    print(f"{r['requests']} answered, {r['errors']} errors in {r['seconds']:.1f}s ({r['throughput']:.2f} req/s)")
+    print(f"latency ms: p50 {fmt(r['p50_ms'])}  p90 {fmt(r['p90_ms'])}  p99 {fmt(r['p99_ms'])}  "
+          f"max {fmt(r['max_ms'])}  (captured p50 {fmt(r['captured_p50_ms'])})")
+    print(f"late ms: p99 {fmt(r['late_p99_ms'])}  max {fmt(r['late_max_ms'])}")
+    if r["same_move"] is not None:
+        print(f"same move as captured: {r['same_move']:.1%}")
+    print("engines: " + " ".join(f"{k}={v}" for k, v in sorted(r["engines"].items(), key=str)))
+    print("captured: " + " ".join(f"{k}={v}" for k, v in sorted(r["captured_engines"].items(), key=str)))
+    print("timeouts: " + (" ".join(f"{k}={v:g}" for k, v in sorted(r["timeouts"].items())) or "none"))
+
+    os.makedirs(OUT_DIR, exist_ok=True)
+    out = args.out or os.path.join(OUT_DIR, time.strftime("replay-%Y%m%d-%H%M%S.json"))
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"log": args.log, "url": url, "speed": args.speed or "max", "serve": args.serve,
+                   "backend": args.backend if args.serve else None, **r}, f, indent=2)
+    print(f"Saved {out}")
+
+if __name__ == "__main__":
+    main()
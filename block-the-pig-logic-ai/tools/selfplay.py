@@ -0,0 +1,111 @@
+"""
+Play many games between a wall engine and a pig policy across a process pool.
+
+Usage: python tools/selfplay.py [--games 1000] [--engine search] [--opt depth=4 ...]
+                                [--pig random] [--seed 0] [--workers N]
+                                [--out data/selfplay/<engine>-<pig>-<seed>.jsonl] [--records FILE]
+
+Game i is played from the generator seeded with "<seed>:<i>", so a game can be
+replayed alone with --first i --games 1. Each finished game is appended to the
+JSONL file as it arrives; the summary gives the win rate with a 95% Wilson
+interval, mean engine ms per move and games per second, and for searching
+engines the search statistics over all moves (search.summarize_stats).
+--records also appends every ply to a binary game-record file (see
+game_records.py); game i is recorded under id next_game + i - first, so
+runs appended to the same file keep distinct ids.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import engines
+import game_records
+import search
+from selfplay import OPENING_WALLS, game_rng, play_game, wilson_interval
+
+OUT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'selfplay'))
+
+_worker = {}
+
+def init_worker(engine, options, pig):
+    _worker["choose"] = engines.make_engine(engine, **options)
+    _worker["pig"] = engines.PIG_POLICIES[pig]
+
+def play(job):
+    seed, game_id, opening = job
+    # Where the quiescence budget runs out depends on what the chance tables
+    # hold, so every game starts from empty ones to play the same in any worker
+    search.CHANCE_TABLES.clear()
+    record = play_game(_worker["choose"], _worker["pig"], game_rng(seed, game_id), opening)
+    record["game"] = game_id
+    return record
+
+def parse_options(pairs):
+    options = {}
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        options[key] = value
+    return options
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--first", type=int, default=0, help="id of the first game")
+    parser.add_argument("--engine", default="search", choices=sorted(engines.ENGINES))
+    parser.add_argument("--opt", action="append", default=[], metavar="KEY=VALUE",
+                        help="engine option, e.g. depth=4 or pig_model=deterministic")
+    parser.add_argument("--pig", default="random", choices=sorted(engines.PIG_POLICIES))
+    parser.add_argument("--opening", type=int, default=OPENING_WALLS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out")
+    parser.add_argument("--records", help="also append plies to this binary game-record file")
+    args = parser.parse_args()
+
+    options = parse_options(args.opt)
+    out = args.out or os.path.join(OUT_DIR, f"{args.engine}-{args.pig}-{args.seed}.jsonl")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    jobs = [(args.seed, i, args.opening) for i in range(args.first, args.first + args.games)]
+
+    start = time.time()
+    wins = moves = 0
+    engine_ms = 0.0
+    search_totals = {}
+    with game_records.Writer(args.records) if args.records else contextlib.nullcontext() as records, \
+            open(out, "w", encoding="utf-8") as f, \
+            Pool(args.workers, initializer=init_worker, initargs=(args.engine, options, args.pig)) as pool:
+        base = records.next_game if records is not None else 0
+        f.write(json.dumps({"engine": args.engine, "options": options, "pig": args.pig,
+                            "seed": args.seed, "opening": args.opening}) + "\n")
+        for done, record in enumerate(pool.imap_unordered(play, jobs, chunksize=4), 1):
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            if records is not None:
+                game_records.write_selfplay(records, base + record["game"] - args.first, record, args.engine)
+                records.flush()
+            wins += record["won"]
+            moves += len(record["plies"])
+            engine_ms += sum(ply[2] for ply in record["plies"])
+            search.merge_stats(search_totals, record.get("search", {}))
+            if done % 100 == 0 or done == len(jobs):
+                print(f"  {done}/{len(jobs)} games, {wins} won", flush=True)
+
+    elapsed = time.time() - start
+    games = len(jobs)
+    lo, hi = wilson_interval(wins, games)
+    print(f"{args.engine} {options or ''} vs {args.pig} pig, seed {args.seed}")
+    print(f"Win rate: {wins}/{games} = {wins / games:.1%} (95% CI {lo:.1%} - {hi:.1%})")
+    print(f"Engine: {engine_ms / max(moves, 1):.2f} ms/move over {moves} moves")
+    print(f"Throughput: {games / elapsed:.1f} games/s with {args.workers} workers ({elapsed:.1f}s)")
+    if search_totals:
+        print(search.format_stats(search.summarize_stats(search_totals)))
+    print(f"Records: {out}")
+
+if __name__ == "__main__":
+    main()
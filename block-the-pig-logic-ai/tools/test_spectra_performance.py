@@ -2,6 +2,10 @@ import os
 import time
 import subprocess
 import concurrent.futures
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import trap_optimizer
 
 SPECTRA_JAR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'Spectra.jar'))
 
@@ -172,6 +176,14 @@ def run_test(radius, timeout=60):
     except Exception as e:
         print(f"Error running Spectra: {e}")
 
+    # Same objective from the Python branch-and-bound, under the same time budget
+    res = trap_optimizer.minimum_walls(
+        trap_optimizer.hex_geometry(radius), (pig_pos['q'], pig_pos['r']),
+        [(w['q'], w['r']) for w in walls], time_budget=timeout)
+    print(f"Optimizer: status={res['status']} value={res['value']} "
+          f"bounds=[{res['lower_bound']}, {res['upper_bound']}] first wall={res['move']} "
+          f"nodes={res['nodes']} in {res['elapsed']:.2f}s")
+
 if __name__ == "__main__":
     # Test Radius 4 first (baseline)
     run_test(radius=4, timeout=30)